@@ -0,0 +1,47 @@
+"""变异的微基准：比较逐个变异都做一次编码/解码的旧实现（benchmarks/legacy_mutator.py，
+原样取自栈式变异之前的 utils/Mutator.py）与在同一个 bytearray 上栈式变异的新实现。
+
+用法：python -m benchmarks.bench_mutator [stack depths...]
+"""
+import random
+import sys
+import time
+
+from benchmarks.legacy_mutator import Mutator as LegacyMutator
+from utils.Mutator import Mutator
+from utils.ObjectUtils import load_object
+
+DEPTHS = [1, 5, 10]
+SECONDS = 1.0
+
+
+def legacy_stack(mutator, data, count):
+    """旧实现：与旧 GreyBoxFuzzer.create_candidate 相同，逐个调用字符串变异"""
+    for _ in range(count):
+        data = mutator.mutate(data)
+    return data
+
+
+def bench(mutator, stack, seeds, depth):
+    """返回每秒生成的候选输入数"""
+    random.seed(0)
+    done = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < SECONDS:
+        for seed in seeds:
+            stack(mutator, seed, depth)
+        done += len(seeds)
+    return done / (time.perf_counter() - start)
+
+
+def main(depths):
+    seeds = [seed for i in range(1, 5) for seed in load_object(f"corpus/corpus_{i}")]
+    print(f"{'depth':>6}{'legacy cand/s':>18}{'stacked cand/s':>18}{'speedup':>10}")
+    for depth in depths:
+        legacy = bench(LegacyMutator(), legacy_stack, seeds, depth)
+        stacked = bench(Mutator(), Mutator.stack, seeds, depth)
+        print(f"{depth:>6}{legacy:>18.0f}{stacked:>18.0f}{stacked / legacy:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEPTHS)
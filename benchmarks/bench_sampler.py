@@ -0,0 +1,59 @@
+"""种子选择的微基准：比较逐次全量计算能量的旧实现与基于 WeightedSampler 的增量实现。
+
+用法：python -m benchmarks.bench_sampler [sizes...]
+"""
+import random
+import sys
+import time
+
+import schedule.PowerSchedule as power_schedule
+from schedule.PathPowerSchedule import PathPowerSchedule
+from schedule.SeedAwarePowerSchedule import SeedAwarePowerSchedule
+from utils.Population import Population
+from utils.Seed import Seed
+
+SIZES = [100, 1000, 10000, 100000]
+
+
+def legacy_choose(schedule, population):
+    """旧实现：每次选择都为所有种子重新计算能量并归一化"""
+    schedule.assign_energy(population)
+    schedule.assign_energy(population)
+    norm_energy = schedule.normalized_energy(population)
+    return random.choices(population, weights=norm_energy, k=1)[0]
+
+
+def feedback(schedule, seed, i):
+    """模拟每次执行后的调度反馈"""
+    if isinstance(schedule, PathPowerSchedule):
+        schedule.update_path_info(seed.id, i % 97)
+    else:
+        schedule.update_seed_metadata(seed.id, i % 5)
+
+
+def bench(schedule_class, size, choose, rounds):
+    schedule = schedule_class()
+    population = Population(Seed(f"seed-{i}", set()) for i in range(size))
+    seed = schedule.choose(population)
+    start = time.perf_counter()
+    for i in range(rounds):
+        seed = choose(schedule, population)
+        feedback(schedule, seed, i)
+    return (time.perf_counter() - start) / rounds
+
+
+def main(sizes):
+    # 基准中不触发淘汰（淘汰会把种子写入磁盘）
+    power_schedule.MAX_SEEDS = max(sizes) + 1
+    print(f"{'schedule':<24}{'seeds':>8}{'legacy us/choose':>20}{'sampler us/choose':>20}{'speedup':>10}")
+    for schedule_class in (PathPowerSchedule, SeedAwarePowerSchedule):
+        for size in sizes:
+            legacy_rounds = max(3, 200000 // size)
+            legacy = bench(schedule_class, size, legacy_choose, legacy_rounds)
+            sampler = bench(schedule_class, size, schedule_class.choose, 20000)
+            print(f"{schedule_class.__name__:<24}{size:>8}{legacy * 1e6:>20.1f}"
+                  f"{sampler * 1e6:>20.1f}{legacy / sampler:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
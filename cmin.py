@@ -0,0 +1,39 @@
+import argparse
+import time
+
+from samples.Samples import sample1, sample2, sample3, sample4
+from utils.Budget import ExecutionBudget
+from utils.CorpusMinimizer import CorpusMinimizer
+from utils.ObjectUtils import load_object
+from utils.Scope import InstrumentationScope
+
+SAMPLES = {1: sample1, 2: sample2, 3: sample3, 4: sample4}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="语料库最小化：保留覆盖相同位置（及边）的最小输入子集")
+    parser.add_argument("sample_id", type=int, choices=sorted(SAMPLES))
+    parser.add_argument("-i", "--input", help="输入语料库，默认为 corpus/corpus_<sample_id>")
+    parser.add_argument("-o", "--output", help="输出路径，默认为 <输入>_min")
+    parser.add_argument("-j", "--workers", type=int, default=0, help="worker 进程数，默认为 CPU 核数")
+    parser.add_argument("--edges", action="store_true", help="同时保留只带来新边的输入")
+    parser.add_argument("--timeout", type=float, default=2.0, help="单个输入的执行时间上限（秒）")
+    args = parser.parse_args()
+
+    in_path = args.input or f"corpus/corpus_{args.sample_id}"
+    out_path = args.output or f"{in_path}_min"
+    # 与 main.py 相同的插桩范围
+    scope = InstrumentationScope(include=["samples", "html", "_markupbase"])
+    minimizer = CorpusMinimizer(SAMPLES[args.sample_id], workers=args.workers, scope=scope,
+                                budget=ExecutionBudget(timeout=args.timeout), edges=args.edges)
+
+    corpus = load_object(in_path)
+    start = time.time()
+    minimized = minimizer.minimize_file(in_path, out_path)
+    print(f"{in_path}: {len(corpus)} -> {len(minimized)} inputs, "
+          f"{sum(map(len, corpus))} -> {sum(map(len, minimized))} bytes "
+          f"({time.time() - start:.2f}s), written to {out_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,10 @@
 import subprocess
 import time
-from typing import Tuple, List
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple, List
 
 from runner.Runner import Runner
+from utils.OutcomeStats import OutcomeStats
+from utils.Telemetry import Telemetry
 
 Outcome = str
 
@@ -10,11 +12,19 @@ Outcome = str
 class Fuzzer:
     """Base class for fuzzers."""
 
-    def __init__(self) -> None:
-        """Constructor"""
+    def __init__(self, is_print: bool = True, batch_size: int = 1) -> None:
+        """Constructor.
+        `is_print` - whether to print stats periodically while running
+        `batch_size` - number of inputs generated and executed per batch
+        """
+        self.is_print = is_print
+        self.batch_size = batch_size
         self.start_time = time.time()
         self.total_execs = 0
-        self.last_print_time = self.start_time
+        # 按 outcome 的计数与最近的结果
+        self.outcomes = OutcomeStats()
+        # 统计输出由遥测的后台线程完成，默认只在 is_print 时打印统计表
+        self.telemetry: Optional[Telemetry] = None
 
     def fuzz(self) -> str:
         """Return fuzz input"""
@@ -23,6 +33,20 @@ class Fuzzer:
     def print_stats(self):
         pass
 
+    def stats(self) -> Dict[str, Any]:
+        """当前统计信息，只读取增量维护的计数器（O(1)），可在后台线程中调用"""
+        run_time = time.time() - self.start_time
+        return {
+            "run_time": run_time,
+            "execs": self.total_execs,
+            "execs_per_sec": self.total_execs / run_time if run_time > 0 else 0.0,
+        }
+
+    def _telemetry(self) -> Telemetry:
+        if self.telemetry is None:
+            self.telemetry = Telemetry(self, print_table=self.is_print)
+        return self.telemetry
+
     def run(
         self, runner: Runner = Runner()
     ) -> Tuple[subprocess.CompletedProcess, Outcome]:
@@ -30,17 +54,42 @@ class Fuzzer:
 
         res = runner.run(self.fuzz())
         self.total_execs += 1
-        if time.time() - self.last_print_time > 1:
-            self.print_stats()
-            self.last_print_time = time.time()
         return res
 
-    def runs(
-        self, runner: Runner = Runner(), run_time: int = 60
+    def run_batch(
+        self, runner: Runner = Runner()
     ) -> List[Tuple[subprocess.CompletedProcess, Outcome]]:
-        """Run `runner` with fuzz input, `trials` times"""
+        """Run `runner` with `batch_size` fuzz inputs"""
+        return [self.run(runner) for _ in range(self.batch_size)]
 
+    def stream(
+        self, runner: Runner = Runner(), run_time: int = 60
+    ) -> Iterator[Tuple[subprocess.CompletedProcess, Outcome]]:
+        """Run `runner` with fuzz input until `run_time` seconds have passed,
+        yielding each (result, outcome) as it is produced"""
+        with self._telemetry():
+            while time.time() - self.start_time < run_time:
+                if self.batch_size > 1:
+                    batch = self.run_batch(runner)
+                else:
+                    batch = [self.run(runner)]
+                for result, outcome in batch:
+                    self.outcomes.record(result, outcome)
+                    yield result, outcome
+
+    def runs(
+        self, runner: Runner = Runner(), run_time: int = 60,
+        callback: Optional[Callable[[Any, Outcome], None]] = None, collect: bool = True,
+    ) -> List[Tuple[subprocess.CompletedProcess, Outcome]]:
+        """Run `runner` with fuzz input for `run_time` seconds.
+        `callback(result, outcome)` is invoked after every run.
+        Returns all (result, outcome) pairs; with `collect=False` only the most
+        recent ones kept in `self.outcomes` are returned, so memory stays flat.
+        """
         res = list()
-        while time.time() - self.start_time < run_time:
-            res.append(self.run(runner))
-        return res
+        for result, outcome in self.stream(runner, run_time):
+            if callback is not None:
+                callback(result, outcome)
+            if collect:
+                res.append((result, outcome))
+        return res if collect else list(self.outcomes.recent)
@@ -1,16 +1,20 @@
 import os
 import time
-from typing import List, Any, Tuple, Set
+from collections import deque
+from typing import Deque, Dict, List, Any, Optional, Tuple, Set, Union
 
 import random
 
 from fuzzer.Fuzzer import Fuzzer
 from runner.Runner import Runner
-from utils.Coverage import Location
+from utils.CoverageMap import Line
+from utils.CmpLog import InputToStateStage
+from utils.Deterministic import DETERMINISTIC_MAX_LEN, DeterministicStage
 from utils.Mutator import Mutator
 from runner.FunctionCoverageRunner import FunctionCoverageRunner
 from schedule.PowerSchedule import PowerSchedule
 
+from utils.Population import Population
 from utils.Seed import Seed
 from utils.ObjectUtils import load_object, dump_object  # 新增导入
 
@@ -18,29 +22,48 @@ from utils.ObjectUtils import load_object, dump_object  # 新增导入
 class GreyBoxFuzzer(Fuzzer):
 
     def __init__(
-        self, seeds: List[str], schedule: PowerSchedule, is_print: bool, mutator: Mutator = None
+        self, seeds: List[str], schedule: PowerSchedule, is_print: bool, mutator: Mutator = None,
+        batch_size: int = 1,
     ) -> None:
         """Constructor.
         `seeds` - a list of (input) strings to mutate.
         `mutator` - the mutator to apply.
         `schedule` - the power schedule to apply.
+        `batch_size` - candidates generated and evaluated per batch (1 = one at a time).
         """
         if mutator is None:
             mutator = Mutator()
         self.schedule = schedule
-        super().__init__()
+        super().__init__(is_print, batch_size)
         self.mutator = mutator
         self.last_crash_time = self.start_time
-        self.population = []
+        self.population = Population()
         # 加载持久化的种子
         top_seeds = self._load_top_seeds(50)  # 加载前50个高能量种子
         self.population.extend(top_seeds)
         self.file_map = {}
-        self.covered_line: Set[Location] = set()
+        # 覆盖的行 (filename, lineno)
+        self.covered_line: Set[Line] = set()
         self.seed_index = 0
+        # 每个 crash/hang 桶只保存第一个触发它的输入 {inp: 签名}，大小与运行时长无关
         self.crash_map = dict()
+        # 超出执行预算的输入单独保存 {inp: hang 签名}
+        self.hang_map = dict()
+        self.crash_signatures: Set[str] = set()
+        self.hang_signatures: Set[str] = set()
+        self.last_hang_time = self.start_time
+        # 当前候选输入的父种子，初始种子阶段为 None
+        self.seed = None
         self.seeds = seeds
-        self.mutator = Mutator()
+        # 等待执行确定性阶段的新种子；每个种子只执行一次（从存储加载的种子视为已完成）。
+        # runner 开启 cmplog 时，输入到状态替换阶段排在队首，先于确定性阶段执行
+        self.deterministic: Deque[Union[DeterministicStage, InputToStateStage]] = deque()
+        self.deterministic_done: Set[int] = set(seed.id for seed in top_seeds)
+        # 当前候选输入所属的确定性阶段及其标签，havoc 候选为 None
+        self.stage: Optional[Union[DeterministicStage, InputToStateStage]] = None
+        self.stage_tag: Optional[int] = None
+        # 当前 havoc 候选依次应用的变异算子下标（mutator 为 adaptive 时），用于报告算子收益
+        self.applied: Optional[List[int]] = None
 
         # 加载初始种子
         for s in seeds:
@@ -56,34 +79,47 @@ class GreyBoxFuzzer(Fuzzer):
             
     def _load_top_seeds(self, count: int) -> List[Seed]:
         """加载能量最高的种子"""
-        sorted_seeds = sorted(
-            self.schedule.seed_registry.items(),
-            key=lambda x: x[1]["energy"],
-            reverse=True
-        )[:count]
-        return [self.schedule.load_seed(sid) for sid, _ in sorted_seeds]
+        return self.schedule.top_seeds(count)
 
     def create_candidate(self) -> str:
         """Returns an input generated by fuzzing a seed in the population"""
         seed = self.schedule.choose(self.population)
+        self.seed = seed
 
-        # Stacking: Apply multiple mutations to generate the candidate
-        candidate = seed.data
-        # change to energy
-        trials = int(seed.energy)
-        for i in range(trials):
-            candidate = self.mutator.mutate(candidate)
+        # Stacking: apply int(energy) mutations to one bytearray, decoded once at the end
+        candidate = self.mutator.stack(seed.data, int(seed.energy))
+        if self.mutator.scheduler is not None:
+            self.applied = self.mutator.applied
         return candidate
 
+    def _next_deterministic(self) -> Optional[str]:
+        """确定性阶段的下一个候选输入，所有新种子都已完成时返回 None"""
+        while self.deterministic:
+            stage = self.deterministic[0]
+            item = next(stage.candidates, None)
+            if item is None:
+                self.deterministic.popleft()
+                continue
+            self.seed = stage.seed
+            self.stage = stage
+            candidate, self.stage_tag = item
+            return candidate
+        return None
+
     def fuzz(self) -> str:
-        """Returns first each seed once and then generates new inputs"""
+        """Returns first each seed once, then the deterministic stage of new seeds,
+        and then havoc inputs"""
+        self.stage, self.stage_tag, self.applied = None, None, None
         if self.seed_index < len(self.seeds):
             # Still seeding
             self.inp = self.seeds[self.seed_index]
+            self.seed = None
             self.seed_index += 1
         else:
             # Mutating
-            self.inp = self.create_candidate()
+            self.inp = self._next_deterministic()
+            if self.inp is None:
+                self.inp = self.create_candidate()
 
         return self.inp
 
@@ -103,25 +139,104 @@ class GreyBoxFuzzer(Fuzzer):
                 23
             ),
             total_exec=str(self.total_execs).center(19),
-            uniq_crash=str(len(set(self.crash_map.values()))).center(16),
+            uniq_crash=str(len(self.crash_signatures)).center(16),
             covered_line=str(len(self.covered_line)).center(19),
         )
         print(template)
 
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats.update(
+            unique_crashes=len(self.crash_signatures),
+            unique_hangs=len(self.hang_signatures),
+            covered_lines=len(self.covered_line),
+            seeds=len(self.population),
+            last_crash=self.last_crash_time - self.start_time,
+        )
+        if self.mutator.scheduler is not None:
+            # 各变异算子与各栈深度的收益：{"operators": {...}, "depths": {...}}
+            stats.update(self.mutator.scheduler.stats())
+        return stats
+
     def run(self, runner: FunctionCoverageRunner) -> Tuple[Any, str]:  # type: ignore
-        """Run function(inp) while tracking coverage.
+        """Run function(inp) while tracking coverage."""
+        result, outcome = super().run(runner)
+        self.evaluate(runner, result, outcome)
+        return result, outcome
+
+    def run_batch(self, runner: FunctionCoverageRunner) -> List[Tuple[Any, str]]:  # type: ignore
+        """Generate `batch_size` candidates and evaluate them under one tracer"""
+        inputs, parents = [], []
+        for _ in range(self.batch_size):
+            inputs.append(self.fuzz())
+            parents.append((self.seed, self.stage, self.stage_tag, self.applied))
+
+        def evaluate(index: int, result: Any, outcome: str) -> None:
+            self.inp = inputs[index]
+            self.seed, self.stage, self.stage_tag, self.applied = parents[index]
+            self.total_execs += 1
+            self.evaluate(runner, result, outcome)
+
+        results = runner.run_batch(inputs, evaluate)
+        return [(result, outcome) for result, outcome, _ in results]
+
+    def _queue_deterministic(self, seed: Seed, runner: FunctionCoverageRunner) -> None:
+        """新种子在进入 havoc 之前执行一次确定性阶段"""
+        if seed.id in self.deterministic_done:
+            return
+        self.deterministic_done.add(seed.id)
+        if len(seed.data) <= DETERMINISTIC_MAX_LEN:
+            self.deterministic.append(DeterministicStage(seed, runner.path()))
+        self._queue_input_to_state(seed, runner)
+
+    def _queue_input_to_state(self, seed: Seed, runner: FunctionCoverageRunner) -> None:
+        """追踪 seed 的比较并把输入到状态替换阶段放到队首；比较中的子串加入变异字典"""
+        if not runner.cmplog:
+            return
+        comparisons = runner.trace_comparisons(seed.data)
+        if not comparisons:
+            return
+        stage = InputToStateStage(seed, comparisons)
+        self.deterministic.appendleft(stage)
+        if self.mutator.dictionary is not None:
+            for token in stage.tokens:
+                self.mutator.dictionary.add(token)
+
+    def evaluate(self, runner: FunctionCoverageRunner, result: Any, outcome: str) -> None:
+        """Process the outcome of running `self.inp`.
         If we reach new coverage,
         add inp to population and its coverage to population_coverage
         """
-        result, outcome = super().run(runner)
-        if len(self.covered_line) != len(runner.all_coverage):
-            self.covered_line |= runner.all_coverage
-            if outcome == Runner.PASS:
-                # We have new coverage
-                seed = Seed(self.inp, runner.coverage())
-                self.population.append(seed)
+        if self.stage_tag is not None:
+            self.stage.feedback(self.stage_tag, runner.path())
+        # runner 只报告本次执行新发现的位置，无需与累计覆盖整体比较
+        if runner.new_locations:
+            self.covered_line.update(runner.new_locations)
+        # 启用边覆盖时，新的跳转（NEW_COVERAGE）或仅新的循环次数分桶（NEW_BUCKET）同样视为新覆盖
+        found = bool(runner.novelty) and outcome == Runner.PASS
+        crashed = outcome == Runner.FAIL and result not in self.crash_signatures
+        if self.applied is not None:
+            self.mutator.scheduler.update(self.applied, found, crashed)
+        if found:
+            # We have new coverage
+            seed = Seed(self.inp, runner.coverage())
+            if not self.population.append(seed):
+                # 初始种子在构造时已加入种子集合
+                seed = self.population.get(self.inp)
+            self._queue_deterministic(seed, runner)
         if outcome == Runner.FAIL:
-            self.last_crash_time = time.time()
-            self.crash_map[self.inp] = result
-
-        return result, outcome
+            if crashed:
+                self.crash_signatures.add(result)
+                self.last_crash_time = time.time()
+                self.crash_map[self.inp] = result
+                # 更深的检查往往只有失败的输入才能到达（如 sample3 的 assert 之后），
+                # 新 crash 桶的输入同样做一次比较替换
+                self._queue_input_to_state(Seed(self.inp, set()), runner)
+        elif outcome == Runner.HANG:
+            if result not in self.hang_signatures:
+                self.hang_signatures.add(result)
+                self.last_hang_time = time.time()
+                self.hang_map[self.inp] = result
+            # 降低产生 hang 的种子的优先级；初始种子阶段则是该输入自身
+            seed = self.seed if self.seed is not None else Seed(self.inp, set())
+            self.schedule.mark_hang(seed)
@@ -0,0 +1,275 @@
+import multiprocessing
+import os
+import queue
+import random
+import time
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Type
+
+from fuzzer.Fuzzer import Fuzzer
+from fuzzer.GreyBoxFuzzer import GreyBoxFuzzer
+from runner.FunctionCoverageRunner import FunctionCoverageRunner
+from runner.Runner import Runner
+from schedule.PowerSchedule import PowerSchedule
+from utils.CoverageMap import MAP_SIZE, REGISTRY, Line
+from utils.Mutator import Mutator
+from utils.Population import Population
+from utils.Seed import Seed
+
+# worker 与协调者之间的消息类型
+MSG_SEED = "seed"
+MSG_CRASH = "crash"
+MSG_HANG = "hang"
+MSG_STATS = "stats"
+MSG_DONE = "done"
+
+
+def _fuzz_worker(index: int, runner: FunctionCoverageRunner, seeds: List[str],
+                 fuzzer_class: Type[GreyBoxFuzzer], schedule_class: Type[PowerSchedule],
+                 mutator: Optional[Mutator], deadline: float, sync_interval: float, shm_name: str,
+                 results: Any, inbox: Any, execs: Any) -> None:
+    """worker 进程：运行独立的 GreyBoxFuzzer 循环，只上报全局新覆盖与新 crash/hang 桶；
+    每次同步及结束时另外上报本 worker 按 outcome 的执行计数"""
+    # fork 出来的进程共享随机状态，必须重新播种，否则所有 worker 产生相同的变异序列
+    random.seed()
+    shm = shared_memory.SharedMemory(name=shm_name)
+    shared = shm.buf
+    mask = len(shared) - 1
+
+    # 每个 worker（及每种调度）使用独立的种子存储，避免多个写入者追加同一文件
+    schedule = schedule_class(namespace=f"{runner.function.__name__}-{schedule_class.__name__}-worker{index}")
+    fuzzer = fuzzer_class(seeds=seeds, schedule=schedule, is_print=False, mutator=mutator)
+    seen_crashes: Set[str] = set()
+    seen_hangs: Set[str] = set()
+    # {outcome: 次数}，覆盖每一次执行
+    outcome_counts: Dict[str, int] = {}
+    last_sync = time.time()
+
+    try:
+        while time.time() < deadline:
+            result, outcome = fuzzer.run(runner)
+            outcome_counts[outcome] = outcome_counts.get(outcome, 0) + 1
+
+            if runner.new_coverage:
+                # 本 worker 的新覆盖，再用共享位图判断是否为全局新覆盖
+                new_locations: List[Line] = []
+                for idx in runner.new_coverage:
+                    slot = REGISTRY.stable_hash(idx) & mask
+                    if not shared[slot]:
+                        shared[slot] = 1
+                        new_locations.append(REGISTRY.line(idx))
+                if new_locations:
+                    results.put((MSG_SEED, index, fuzzer.inp, outcome, new_locations))
+
+            if outcome == Runner.FAIL and result not in seen_crashes:
+                seen_crashes.add(result)
+                results.put((MSG_CRASH, index, fuzzer.inp, result))
+            elif outcome == Runner.HANG and result not in seen_hangs:
+                seen_hangs.add(result)
+                results.put((MSG_HANG, index, fuzzer.inp, result))
+
+            now = time.time()
+            if now - last_sync > sync_interval:
+                last_sync = now
+                execs[index] = fuzzer.total_execs
+                results.put((MSG_STATS, index, dict(outcome_counts)))
+                # 导入其他 worker 发现的种子
+                while True:
+                    try:
+                        data, coverage = inbox.get_nowait()
+                    except queue.Empty:
+                        break
+                    fuzzer.population.append(Seed(data, coverage))
+    finally:
+        # worker 进程退出时不执行 atexit，报告完成前等待被淘汰的种子写盘
+        schedule.store.close()
+        execs[index] = fuzzer.total_execs
+        results.put((MSG_DONE, index, dict(outcome_counts)))
+        del shared
+        shm.close()
+
+
+class ParallelFuzzer(Fuzzer):
+    """多进程并行模糊测试。
+
+    启动 N 个 worker 进程，每个进程对同一个 FunctionCoverageRunner 的副本运行自己的
+    GreyBoxFuzzer 循环。worker 通过 shared_memory 中的覆盖率位图判断全局新覆盖，
+    只把全局新种子与新 crash/hang 桶发送给协调者；协调者维护全局的 covered_line、crash_map、hang_map
+    与 population，并把新种子转发给其他 worker。
+    """
+
+    def __init__(self, seeds: List[str], fuzzer_class: Type[GreyBoxFuzzer] = GreyBoxFuzzer,
+                 schedule_class: Type[PowerSchedule] = PowerSchedule, workers: int = 0,
+                 is_print: bool = True, sync_interval: float = 0.5,
+                 map_size: int = MAP_SIZE, mutator: Optional[Mutator] = None) -> None:
+        """Constructor.
+        `seeds` - initial inputs, given to every worker
+        `fuzzer_class` / `schedule_class` - fuzzer and schedule each worker runs
+        `workers` - number of worker processes, defaults to the number of cores
+        `sync_interval` - seconds between a worker's exec-count updates and inbox syncs
+        `map_size` - size of the shared coverage bitmap (power of two)
+        `mutator` - mutator copied into every worker (default: a plain Mutator)
+        """
+        super().__init__(is_print)
+        assert map_size & (map_size - 1) == 0, "map_size must be a power of two"
+        self.seeds = seeds
+        self.fuzzer_class = fuzzer_class
+        self.schedule_class = schedule_class
+        self.workers = workers or os.cpu_count() or 1
+        self.sync_interval = sync_interval
+        self.map_size = map_size
+        self.mutator = mutator
+
+        self.covered_line: Set[Line] = set()
+        self.crash_map: Dict[str, Any] = dict()
+        self.crash_signatures: Set[str] = set()
+        self.hang_map: Dict[str, Any] = dict()
+        self.hang_signatures: Set[str] = set()
+        self.last_hang_time = self.start_time
+        self.population = Population(Seed(s, set()) for s in seeds)
+        self.last_crash_time = self.start_time
+        self.worker_execs: List[int] = [0] * self.workers
+        # 各 worker 最近上报的 {outcome: 次数}，其和即 self.outcomes 的计数
+        self.worker_outcomes: List[Dict[str, int]] = [{} for _ in range(self.workers)]
+
+        if is_print:
+            print(
+                """
+┌───────────────────────┬───────────────────────┬───────────────────┬───────────────────┬────────────────┬───────────────────┐
+│        Run Time       │    Last Uniq Crash    │    Total Execs    │     Execs/sec     │  Uniq Crashes  │   Covered Lines   │
+├───────────────────────┼───────────────────────┼───────────────────┼───────────────────┼────────────────┼───────────────────┤"""
+            )
+
+    def print_stats(self):
+        def format_seconds(seconds):
+            hours = int(seconds) // 3600
+            minutes = int(seconds % 3600) // 60
+            remaining_seconds = int(seconds) % 60
+            return f"{hours:02d}:{minutes:02d}:{remaining_seconds:02d}"
+
+        elapsed = time.time() - self.start_time
+        template = """│{runtime}│{crash_time}│{total_exec}│{exec_rate}│{uniq_crash}│{covered_line}│
+├───────────────────────┼───────────────────────┼───────────────────┼───────────────────┼────────────────┼───────────────────┤"""
+
+        template = template.format(
+            runtime=format_seconds(elapsed).center(23),
+            crash_time=format_seconds(self.last_crash_time - self.start_time).center(
+                23
+            ),
+            total_exec=str(self.total_execs).center(19),
+            exec_rate=f"{self.execs_per_sec():.1f}".center(19),
+            uniq_crash=str(len(self.crash_signatures)).center(16),
+            covered_line=str(len(self.covered_line)).center(19),
+        )
+        print(template)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats.update(
+            unique_crashes=len(self.crash_signatures),
+            unique_hangs=len(self.hang_signatures),
+            covered_lines=len(self.covered_line),
+            seeds=len(self.population),
+            last_crash=self.last_crash_time - self.start_time,
+            workers=self.workers,
+        )
+        return stats
+
+    def execs_per_sec(self) -> float:
+        """所有 worker 的总执行速度"""
+        elapsed = time.time() - self.start_time
+        return self.total_execs / elapsed if elapsed > 0 else 0.0
+
+    def _handle(self, message: Tuple, inboxes: List[Any]) -> Tuple[Any, str]:
+        kind, index = message[0], message[1]
+        if kind == MSG_SEED:
+            _, _, inp, outcome, locations = message
+            self.covered_line.update(locations)
+            if outcome == Runner.PASS:
+                seed = Seed(inp, set(locations))
+                self.population.append(seed)
+                for other, inbox in enumerate(inboxes):
+                    if other != index:
+                        inbox.put((inp, seed.coverage))
+            return locations, outcome
+        # MSG_CRASH / MSG_HANG：不同 worker 可能各自报告同一个桶，只保留第一个输入
+        _, _, inp, signature = message
+        if kind == MSG_HANG:
+            if signature not in self.hang_signatures:
+                self.hang_signatures.add(signature)
+                self.last_hang_time = time.time()
+                self.hang_map[inp] = signature
+            return signature, Runner.HANG
+        if signature not in self.crash_signatures:
+            self.crash_signatures.add(signature)
+            self.last_crash_time = time.time()
+            self.crash_map[inp] = signature
+        return signature, Runner.FAIL
+
+    def runs(self, runner: FunctionCoverageRunner, run_time: int = 60,
+             callback: Optional[Callable[[Any, str], None]] = None, collect: bool = True
+             ) -> List[Tuple[Any, str]]:  # type: ignore
+        """Run `runner` in `workers` processes for `run_time` seconds.
+        Returns the (result, outcome) pairs reported by the workers (new global
+        coverage and new crashes); see `Fuzzer.runs` for `callback` and `collect`."""
+        deadline = self.start_time + run_time
+        shm = shared_memory.SharedMemory(create=True, size=self.map_size)
+        shm.buf[:self.map_size] = bytes(self.map_size)
+        results = multiprocessing.Queue()
+        inboxes = [multiprocessing.Queue() for _ in range(self.workers)]
+        execs = multiprocessing.Array("Q", self.workers, lock=False)
+
+        processes = [
+            multiprocessing.Process(
+                target=_fuzz_worker,
+                args=(i, runner, self.seeds, self.fuzzer_class, self.schedule_class,
+                      self.mutator, deadline, self.sync_interval, shm.name, results, inboxes[i], execs),
+                daemon=True,
+            )
+            for i in range(self.workers)
+        ]
+        for process in processes:
+            process.start()
+
+        res = list()
+        running = self.workers
+        telemetry = self._telemetry()
+        telemetry.start()
+        try:
+            # 运行结束后继续接收消息，直到所有 worker 报告完成
+            while running:
+                try:
+                    message = results.get(timeout=self.sync_interval)
+                except queue.Empty:
+                    message = None
+                if message is not None:
+                    if message[0] in (MSG_STATS, MSG_DONE):
+                        # 与单进程模式一致，按 outcome 统计所有执行而不只是上报的消息
+                        self.worker_outcomes[message[1]] = message[2]
+                        self.outcomes.merge(self.worker_outcomes)
+                        if message[0] == MSG_DONE:
+                            running -= 1
+                    else:
+                        result, outcome = self._handle(message, inboxes)
+                        self.outcomes.remember(result, outcome)
+                        if callback is not None:
+                            callback(result, outcome)
+                        if collect:
+                            res.append((result, outcome))
+
+                self.worker_execs = list(execs)
+                self.total_execs = sum(self.worker_execs)
+
+                if time.time() > deadline + 10 and not any(p.is_alive() for p in processes):
+                    break
+        finally:
+            telemetry.stop()
+            for process in processes:
+                process.join(timeout=1)
+                if process.is_alive():
+                    process.terminate()
+            for inbox in inboxes:
+                inbox.cancel_join_thread()
+            shm.close()
+            shm.unlink()
+        return res if collect else list(self.outcomes.recent)
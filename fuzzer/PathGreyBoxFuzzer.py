@@ -1,5 +1,5 @@
 import time
-from typing import List, Tuple, Any
+from typing import Any, Dict, List
 
 from fuzzer.GreyBoxFuzzer import GreyBoxFuzzer
 from schedule.PathPowerSchedule import PathPowerSchedule
@@ -11,9 +11,11 @@ from utils.Mutator import Mutator
 class PathGreyBoxFuzzer(GreyBoxFuzzer):
     """Count how often individual paths are exercised."""
 
-    def __init__(self, seeds: List[str], schedule: PathPowerSchedule, is_print: bool, mutator:Mutator = None):
+    def __init__(self, seeds: List[str], schedule: PathPowerSchedule, is_print: bool, mutator:Mutator = None,
+                 batch_size: int = 1):
         # 阻止父类打印表
-        super().__init__(seeds, schedule, is_print=False, mutator=mutator)
+        super().__init__(seeds, schedule, is_print=False, mutator=mutator, batch_size=batch_size)
+        self.is_print = is_print
 
         # 存储所有已发现的路径
         self.path_set = set()
@@ -53,23 +55,30 @@ class PathGreyBoxFuzzer(GreyBoxFuzzer):
             ),
             total_exec=str(self.total_execs).center(19),
             total_path=str(len(self.path_set)).center(19),
-            uniq_crash=str(len(set(self.crash_map.values()))).center(16),
+            uniq_crash=str(len(self.crash_signatures)).center(16),
             covered_line=str(len(self.covered_line)).center(19),
         )
         print(template)
 
-    def run(self, runner: FunctionCoverageRunner) -> Tuple[Any, str]:
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats.update(paths=len(self.path_set), last_new_path=self.last_new_path_time - self.start_time)
+        return stats
+
+    def evaluate(self, runner: FunctionCoverageRunner, result: Any, outcome: str) -> None:
         """Inform scheduler about path frequency"""
         prev_population_len = len(self.population)
-        result, outcome = super().run(runner)
-        self.total_execs += 1
-
-        if hasattr(runner, "coverage") and callable(getattr(runner, "coverage", None)):
-            # 使用 coverage 集合的不可变副本作为路径标识，保证唯一性
-            path = frozenset(runner.coverage())
+        super().evaluate(runner, result, outcome)
+
+        if hasattr(runner, "path") and callable(getattr(runner, "path", None)):
+            # 由 runner 给出 64 位路径 id：分桶边覆盖或覆盖位图的哈希
+            path = runner.path()
+        elif hasattr(runner, "coverage") and callable(getattr(runner, "coverage", None)):
+            # 只保存覆盖集合的哈希，不保留集合本身
+            path = hash(frozenset(runner.coverage()))
         else:
-            # 兜底：用字符串表示
-            path = str(getattr(runner, "coverage", lambda: "unknown")())
+            # 兜底：用字符串的哈希表示
+            path = hash(str(getattr(runner, "coverage", lambda: "unknown")()))
 
         # 记录路径
         if path not in self.path_set:
@@ -81,12 +90,7 @@ class PathGreyBoxFuzzer(GreyBoxFuzzer):
             # 新增了 seed，取最后一个
             seed = self.population[-1]
             self.schedule.update_path_info(seed.id, path)
-        else:
-            # 没有新 seed，也可以用当前输入构造一个临时 id 反馈
-            temp_id = self.inp
-            self.schedule.update_path_info(temp_id, path)
-
-        if hasattr(self, "is_print") and self.is_print:
-            self.print_stats()
-
-        return result, outcome
+        elif self.stage is None:
+            # 没有新 seed：只统计路径频率，不记录输入本身。
+            # 确定性阶段均匀地遍历每个位置，其执行不计入频率，以免在 havoc 开始前压低种子的能量
+            self.schedule.update_path_info(None, path)
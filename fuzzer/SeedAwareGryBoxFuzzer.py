@@ -1,5 +1,5 @@
 import time
-from typing import Dict, List, Tuple, Any, Set
+from typing import Dict, List, Any, Set
 
 from fuzzer.GreyBoxFuzzer import GreyBoxFuzzer
 from schedule.SeedAwarePowerSchedule import SeedAwarePowerSchedule
@@ -12,10 +12,12 @@ class SeedAwareGreyBoxFuzzer(GreyBoxFuzzer):
     """跟踪种子年龄和覆盖率变化的增强灰盒模糊测试器"""
 
     def __init__(
-        self, seeds: List[str], schedule: SeedAwarePowerSchedule, is_print: bool, mutator:Mutator = None
+        self, seeds: List[str], schedule: SeedAwarePowerSchedule, is_print: bool, mutator:Mutator = None,
+        batch_size: int = 1,
     ):
         # 阻止父类打印表头
-        super().__init__(seeds, schedule, is_print=False, mutator=mutator)
+        super().__init__(seeds, schedule, is_print=False, mutator=mutator, batch_size=batch_size)
+        self.is_print = is_print
 
         # 记录每个种子的覆盖变化 {seed.id: coverage_set}
         self.seed_coverage: Dict[str, Set[Location]] = {}
@@ -30,24 +32,26 @@ class SeedAwareGreyBoxFuzzer(GreyBoxFuzzer):
 ├───────────────────────┼───────────────────────┼───────────────────────┼───────────────────┼───────────────────┼────────────────┼───────────────────┤"""
             )
 
-    def run(self, runner: FunctionCoverageRunner) -> Tuple[Any, str]:
-        """增强的 run 方法，跟踪覆盖率变化"""
+    def evaluate(self, runner: FunctionCoverageRunner, result: Any, outcome: str) -> None:
+        """增强的 evaluate 方法，跟踪覆盖率变化"""
         
         prev_coverage = len(self.covered_line)
-        result, outcome = super().run(runner)
+        super().evaluate(runner, result, outcome)
         new_coverage = len(self.covered_line)
 
         # 计算本次覆盖率增长
         coverage_gain = max(0, new_coverage - prev_coverage)
 
         # 更新当前种子的元信息
-        if self.inp in self.population:
-            current_seed = next(
-                seed for seed in self.population if seed.data == self.inp
-            )
+        current_seed = self.population.get(self.inp)
+        if current_seed is not None:
             self.schedule.update_seed_metadata(current_seed.id, coverage_gain)
 
-        return result, outcome
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        total_time_hours = stats["run_time"] / 3600
+        stats["coverage_rate"] = len(self.covered_line) / total_time_hours if total_time_hours > 0 else 0
+        return stats
 
     def print_stats(self):
         """自定义统计信息打印"""
@@ -76,7 +80,7 @@ class SeedAwareGreyBoxFuzzer(GreyBoxFuzzer):
             ),
             total_exec=str(self.total_execs).center(19),
             total_seeds=str(len(self.population)).center(19),
-            uniq_crash=str(len(set(self.crash_map.values()))).center(16),
+            uniq_crash=str(len(self.crash_signatures)).center(16),
             covered_line=str(len(self.covered_line)).center(19),
         )
         print(template)
@@ -2,11 +2,18 @@ import os
 import sys
 import time
 from typing import Dict
+from fuzzer.ParallelFuzzer import ParallelFuzzer
 from fuzzer.PathGreyBoxFuzzer import PathGreyBoxFuzzer
 from fuzzer.SeedAwareGryBoxFuzzer import SeedAwareGreyBoxFuzzer
 from runner.FunctionCoverageRunner import FunctionCoverageRunner
 from schedule.PathPowerSchedule import PathPowerSchedule
+from utils.Budget import ExecutionBudget
+from utils.CoverageReport import CoverageReport
+from utils.CrashMinimizer import CrashMinimizer
+from utils.Dictionary import Dictionary
 from utils.Mutator import Mutator
+from utils.Scope import InstrumentationScope
+from utils.Telemetry import Telemetry
 from schedule.SeedAwarePowerSchedule import SeedAwarePowerSchedule
 from samples.Samples import sample1, sample2, sample3, sample4
 from utils.ObjectUtils import dump_object, load_object
@@ -32,28 +39,70 @@ class Result:
         )
 
 
-def run_fuzzing(sample_func, corpus_path, sample_id, schedule_type, run_time):
+def run_fuzzing(sample_func, corpus_path, sample_id, schedule_type, run_time, workers=1, budget=None):
     """运行测试并返回 Result 对象"""
-    f_runner = FunctionCoverageRunner(sample_func)
+    # 只追踪样例程序以及 sample4 用到的 html.parser，标准库其余部分全速运行
+    scope = InstrumentationScope(include=["samples", "html", "_markupbase"])
+    # 新种子额外做一次比较追踪，驱动输入到状态替换阶段
+    f_runner = FunctionCoverageRunner(sample_func, budget=budget, scope=scope, cmplog=True)
     seeds = load_object(corpus_path)
-
-    if schedule_type == "Path":
+    # 从插桩范围内的代码常量自动提取字典，dictionaries/<sample>.dict 中的 token 追加在其上
+    dictionary = Dictionary.from_target(sample_func, scope)
+    dict_path = os.path.join("dictionaries", f"{sample_func.__name__}.dict")
+    if os.path.exists(dict_path):
+        dictionary.load(dict_path)
+
+    if workers > 1:
+        # 多进程并行模式
+        fuzzer = ParallelFuzzer(
+            seeds=seeds,
+            fuzzer_class=PathGreyBoxFuzzer if schedule_type == "Path" else SeedAwareGreyBoxFuzzer,
+            schedule_class=PathPowerSchedule if schedule_type == "Path" else SeedAwarePowerSchedule,
+            workers=workers,
+            is_print=True,
+            mutator=Mutator(dictionary, adaptive=True),
+        )
+    elif schedule_type == "Path":
         fuzzer = PathGreyBoxFuzzer(
             seeds=seeds,
-            schedule=PathPowerSchedule(),
-            mutator=Mutator(),
+            # 两种调度在同一进程中先后运行，各自使用独立的种子存储
+            schedule=PathPowerSchedule(namespace=f"{sample_func.__name__}-path"),
+            mutator=Mutator(dictionary, adaptive=True),
             is_print=True,
         )
     else:
         fuzzer = SeedAwareGreyBoxFuzzer(
             seeds=seeds,
-            schedule=SeedAwarePowerSchedule(),
-            mutator=Mutator(),
+            schedule=SeedAwarePowerSchedule(namespace=f"{sample_func.__name__}-seedaware"),
+            mutator=Mutator(dictionary, adaptive=True),
             is_print=True,
         )
 
+    # 后台线程每秒打印统计表，并输出 JSONL 时间序列与 Prometheus textfile
+    fuzzer.telemetry = Telemetry(
+        fuzzer,
+        jsonl_path=f"_result/telemetry-{sample_id}-{schedule_type}.jsonl",
+        prometheus_path=f"_result/telemetry-{sample_id}-{schedule_type}.prom",
+        labels={"target": sample_func.__name__, "schedule": schedule_type},
+    )
+
     start_time = time.time()
-    fuzzer.runs(f_runner, run_time)
+    # 流式运行：只保留按 outcome 的计数与最近的结果，内存占用与运行时长无关
+    fuzzer.runs(f_runner, run_time, collect=False)
+    print(f"Outcomes: {fuzzer.outcomes}")
+    if workers <= 1:
+        # 并行模式下覆盖率位图位于各 worker 进程中，只为单进程运行生成报告
+        report = CoverageReport.from_map(f_runner.all_coverage_map)
+        print(report.text(functions=False))
+        report.write_html(f"_result/coverage-{sample_id}-{schedule_type}")
+
+    # 最小化每个 crash 桶的输入（保持签名不变），便于复现与分析
+    minimizer = CrashMinimizer(sample_func, workers=workers, scope=scope, budget=budget, timeout=30)
+    minimized = minimizer.minimize_all(fuzzer.crash_map)
+    for inp, signature in fuzzer.crash_map.items():
+        print(f"Crash {signature[:8]}: {len(inp)} -> {len(minimized[signature])} chars "
+              f"{minimized[signature][:40]!r}")
+    dump_object(f"_result/crashes-{sample_id}-{schedule_type}.pkl", minimized)
     return Result(
         fuzzer.covered_line, set(fuzzer.crash_map.values()), start_time, time.time()
     )
@@ -67,18 +116,27 @@ if __name__ == "__main__":
         3: (sample3, "corpus/corpus_3", 600),
         4: (sample4, "corpus/corpus_4", 1200),
     }
+    # 单次执行预算：sample1 的近不动点递归按行数中止，其余样本按墙钟时间中止
+    budgets = {
+        1: ExecutionBudget(max_lines=1000, timeout=1.0),
+        2: ExecutionBudget(timeout=1.0),
+        3: ExecutionBudget(timeout=1.0),
+        4: ExecutionBudget(timeout=2.0),
+    }
 
     # 检查命令行参数
     if (
-        len(sys.argv) != 2
+        len(sys.argv) not in (2, 3)
         or not sys.argv[1].isdigit()
         or int(sys.argv[1]) not in samples
+        or (len(sys.argv) == 3 and not sys.argv[2].isdigit())
     ):
-        print("Usage: python main.py <sample_id>")
+        print("Usage: python main.py <sample_id> [workers]")
         print("Available sample_ids: 1, 2, 3, 4")
         sys.exit(1)
 
     target_sample_id = int(sys.argv[1])
+    workers = int(sys.argv[2]) if len(sys.argv) == 3 else 1
     target_sample = samples[target_sample_id]
 
     all_results: Dict[int, Dict[str, Result]] = {}
@@ -88,7 +146,8 @@ if __name__ == "__main__":
         print(f"\nTesting Sample {target_sample_id} with {schedule_type}...")
         sample_func, corpus_path, run_time = target_sample
         res = run_fuzzing(
-            sample_func, corpus_path, target_sample_id, schedule_type, run_time
+            sample_func, corpus_path, target_sample_id, schedule_type, run_time, workers,
+            budgets[target_sample_id],
         )
 
         if target_sample_id not in all_results:
@@ -1,42 +1,170 @@
-import hashlib
-import traceback
-from typing import Tuple, Callable, Set, Any, List
+from typing import Tuple, Callable, Set, Any, List, Optional
 
 from runner.Runner import Runner
-from utils.Coverage import Coverage, Location
+from utils.CmpLog import Comparison, cmplog_backend
+from utils.Coverage import TRACER_CODES, Location, coverage_backend
+from utils.Budget import BudgetExceeded, ExecutionBudget
+from utils.CoverageMap import NEW_BUCKET, NEW_COVERAGE, REGISTRY, CoverageMap, EdgeMap, Line, VirginMap
+from utils.CrashBucket import CRASH_DEPTH, CrashBucketer
+from utils.Scope import InstrumentationScope
 
 
 class FunctionCoverageRunner(Runner):
-    def __init__(self, function: Callable) -> None:
-        """Initialize.  `function` is a function to be executed"""
-        self._coverage = None
+    def __init__(self, function: Callable, backend: str = "settrace", edges: bool = False,
+                 crash_depth: int = CRASH_DEPTH, budget: Optional[ExecutionBudget] = None,
+                 scope: Optional[InstrumentationScope] = None, cmplog: bool = False) -> None:
+        """Initialize.  `function` is a function to be executed.
+        `backend` - coverage backend, "settrace" or "monitoring" (Python 3.12+)
+        `edges` - also record edge coverage with AFL-style hit-count buckets
+        `crash_depth` - number of innermost frames used for crash signatures
+        `budget` - per-exec line/time budget; over-budget inputs end as HANG
+        `scope` - instrumentation scope; code outside it runs untraced
+        `cmplog` - let fuzzers trace the comparisons of new seeds (`trace_comparisons`)
+        """
+        self.coverage_class = coverage_backend(backend)
+        self._coverage: Optional[Set[Location]] = None
         self.function = function
-        self.cumulative_coverage: List[int] = []
-        self.all_coverage: Set[Location] = set()
+        # 累计覆盖的行 (filename, lineno)
+        self.all_coverage: Set[Line] = set()
+
+        # 本次执行与累计的覆盖率位图；新颖性由 virgin map 只针对本次命中的位置判断
+        self.coverage_map = CoverageMap()
+        self.all_coverage_map = CoverageMap()
+        self.virgin_lines = VirginMap()
+        self.virgin_fail = VirginMap()
+        # crash 分桶，run 的 FAIL 结果即为桶签名；签名不包含 runner 自身与追踪函数的栈帧
+        harness = [FunctionCoverageRunner.run.__code__,
+                   FunctionCoverageRunner.run_function.__code__,
+                   FunctionCoverageRunner.run_batch.__code__, *TRACER_CODES]
+        self.crashes = CrashBucketer(crash_depth, harness)
+        # 超出预算的执行单独分桶
+        self.budget = budget
+        self.scope = scope
+        self.hangs = CrashBucketer(crash_depth, harness)
+        self.cmplog = cmplog
+
+        # 本次执行新发现的位置 id 及对应的行 (filename, lineno)
+        self.new_coverage: List[int] = []
+        self.new_locations: List[Line] = []
+
+        # 边覆盖（可选）：本次执行的边命中次数与尚未见过的边/分桶
+        self.edge_map: Optional[EdgeMap] = EdgeMap() if edges else None
+        self.virgin_edges: Optional[VirginMap] = VirginMap(len(self.edge_map)) if edges else None
+        # 本次执行是否出现新的边或新的命中次数分桶
+        self.new_edges = False
+        # 本次执行的新颖性：0、NEW_BUCKET（仅新的命中次数分桶）或 NEW_COVERAGE（新位置或新边）。
+        # 与 AFL 为 crash/hang 单独维护 virgin map 一样，失败的执行只更新 virgin_fail，
+        # 只被失败执行覆盖过的位置在 virgin_lines 中仍是新的，之后通过的执行仍能成为种子
+        self.novelty = 0
 
     def run_function(self, inp: str) -> Any:
-        with Coverage() as cov:
-            try:
+        self.coverage_map.clear()
+        if self.edge_map is not None:
+            self.edge_map.clear()
+        try:
+            with self._coverage_context():
                 result = self.function(inp)
-            except Exception as exc:
-                raise exc
-            finally:
-                self._coverage = cov.coverage()
-                self.all_coverage |= cov.coverage()
-                self.cumulative_coverage.append(len(self.all_coverage))
-
+        except BaseException:
+            self._update_coverage(passed=False)
+            raise
+        # 在追踪结束后再做统计，避免把统计代码本身计入覆盖率
+        self._update_coverage()
         return result
 
+    def _coverage_context(self) -> Any:
+        return self.coverage_class(self.coverage_map, self.edge_map, self.budget, self.scope)
+
+    def _update_coverage(self, passed: bool = True) -> None:
+        self._coverage = None
+        virgin = self.virgin_lines if passed else self.virgin_fail
+        new_slots, _ = virgin.update(self.coverage_map.bits, REGISTRY.size)
+        self.novelty = NEW_COVERAGE if passed and new_slots else 0
+        # 两张 virgin map 之间只需对本次的新位置检查是否已被另一类执行覆盖过
+        self.all_coverage_map.ensure(REGISTRY.size)
+        all_bits = self.all_coverage_map.bits
+        self.new_coverage = [idx for idx in new_slots if not all_bits[idx]]
+        if self.new_coverage:
+            self.new_locations = [REGISTRY.line(idx) for idx in self.new_coverage]
+            self.all_coverage.update(self.new_locations)
+            for idx in self.new_coverage:
+                all_bits[idx] = 1
+        else:
+            self.new_locations = []
+        if self.edge_map is not None and not passed:
+            self.new_edges = False
+        elif self.edge_map is not None:
+            new_edges, new_buckets = self.virgin_edges.update(self.edge_map.classify())
+            self.new_edges = bool(new_edges or new_buckets)
+            if new_edges:
+                self.novelty = NEW_COVERAGE
+            elif new_buckets and not self.novelty:
+                self.novelty = NEW_BUCKET
+
     def coverage(self) -> Set[Location]:
+        # 仅在需要时由位图构造 (function_name, lineno) 集合
+        if self._coverage is None:
+            self._coverage = self.coverage_map.locations()
         return self._coverage
 
+    def path(self) -> int:
+        """本次执行的 64 位路径 id：启用边覆盖时为分桶边覆盖图的哈希，否则为覆盖行集合的哈希"""
+        if self.edge_map is not None:
+            return self.edge_map.path_id()
+        return self.coverage_map.path_id()
+
+    def trace_comparisons(self, inp: str) -> List[Comparison]:
+        """额外执行一次 inp 并记录其比较的操作数，不影响覆盖率状态。
+        opcode 级追踪很慢，只用于新种子"""
+        with cmplog_backend()(self.scope, self.budget) as cmplog:
+            try:
+                self.function(inp)
+            except (BudgetExceeded, Exception):
+                pass
+        return list(cmplog.comparisons)
+
+    def _outcome(self, result: Any, exc: Optional[BaseException]) -> Tuple[Any, str]:
+        if exc is None:
+            return result, self.PASS
+        if isinstance(exc, BudgetExceeded):
+            return self.hangs.record(exc), self.HANG
+        return self.crashes.record(exc), self.FAIL
+
     def run(self, inp: str) -> Tuple[Any, str]:
         try:
-            result = self.run_function(inp)
-            outcome = self.PASS
-        except Exception as exc:
-            stack_trace = "".join(traceback.format_tb(exc.__traceback__))
-            result = hashlib.md5(stack_trace.encode()).hexdigest()
-            outcome = self.FAIL
-
-        return result, outcome
+            return self._outcome(self.run_function(inp), None)
+        except (BudgetExceeded, Exception) as exc:
+            return self._outcome(None, exc)
+
+    def run_batch(self, inputs: List[str],
+                  callback: Optional[Callable[[int, Any, str], None]] = None
+                  ) -> List[Tuple[Any, str, List[int]]]:
+        """Run all `inputs` under a single installed tracer.
+        Returns (result, outcome, new_coverage) for each input, where
+        `new_coverage` holds the location ids first seen by that input.
+        `callback(index, result, outcome)` is invoked after each input while the
+        per-input state (`coverage_map`, `new_coverage`, `new_edges`) still
+        describes that input; tracing is paused while it runs.
+        """
+        results = []
+        with self._coverage_context() as cov:
+            # 两次输入之间暂停追踪，统计代码不计入覆盖率
+            cov.pause()
+            for index, inp in enumerate(inputs):
+                self.coverage_map.clear()
+                if self.edge_map is not None:
+                    self.edge_map.clear()
+
+                result, exc = None, None
+                cov.resume()
+                try:
+                    result = self.function(inp)
+                except (BudgetExceeded, Exception) as e:
+                    exc = e
+                cov.pause()
+
+                self._update_coverage(passed=exc is None)
+                result, outcome = self._outcome(result, exc)
+                results.append((result, outcome, self.new_coverage))
+                if callback is not None:
+                    callback(index, result, outcome)
+        return results
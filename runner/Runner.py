@@ -1,4 +1,4 @@
-from typing import Any
+from typing import Any, List
 
 
 class Runner:
@@ -7,6 +7,7 @@ class Runner:
     # Test outcomes
     PASS = "PASS"
     FAIL = "FAIL"
+    HANG = "HANG"  # 超出执行预算被中止
     UNRESOLVED = "UNRESOLVED"
 
     def __init__(self) -> None:
@@ -17,3 +18,7 @@ class Runner:
         """Run the runner with the given input"""
         print(inp)
         return inp, Runner.UNRESOLVED
+
+    def run_batch(self, inputs: List[str]) -> List[Any]:
+        """Run the runner with each of the given inputs"""
+        return [self.run(inp) for inp in inputs]
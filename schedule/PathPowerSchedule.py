@@ -1,6 +1,4 @@
-from typing import Dict, Sequence, List,Union
-import random
-import math
+from typing import Dict, Hashable, Optional, Sequence, List, Set, Union
 from schedule.PowerSchedule import PowerSchedule
 from utils.Seed import Seed
 
@@ -9,17 +7,22 @@ class PathPowerSchedule(PowerSchedule):
     """基于路径频率的调度策略：优先选择能触发稀有路径的 seed。
     
     在 Fuzzer 执行每个输入后，调用 schedule 的 update_path_info 方法，维护调度信息。
+    路径以 runner 给出的 64 位路径 id 表示（覆盖位图或分桶边覆盖图的哈希），
+    频率统计只保存整数，普通输入不记录在种子路径映射中，内存与执行次数无关。
     
     在选择 seed 时，调用 schedule 的 choose 方法。
     """
 
-    def __init__(self) -> None:
-        super().__init__()
-        # 路径频率统计，类型为{path : frequency}
-        self.path_frequency = {}
+    def __init__(self, namespace: str = "default") -> None:
+        super().__init__(namespace)
+        # 路径频率统计，类型为{path_id : frequency}，路径 id 为 64 位整数
+        self.path_frequency: Dict[int, int] = {}
 
-        # 种子路径映射图，类型为{seed_id : path}
-        self.seed_path_map = {}
+        # 种子路径映射图，类型为{seed_id : path_id}，只记录种子集合中的种子
+        self.seed_path_map: Dict[int, int] = {}
+
+        # 反向索引 {path_id : {seed_id}}，路径频率变化时只更新对应种子的能量
+        self.path_seeds: Dict[int, Set[int]] = {}
 
     def assign_energy(self, population: Union[Sequence[Seed], Seed]) -> None:
         """
@@ -30,26 +33,59 @@ class PathPowerSchedule(PowerSchedule):
         else:
             seeds = population
         
-        for seed in seeds:
-            path = self.seed_path_map.get(seed.id, None)
-            freq = self.path_frequency.get(path, 1)
-            seed.energy = max(1, int(10 / freq))
+        super().assign_energy(seeds)
 
+    def energy(self, seed: Seed) -> float:
+        path = self.seed_path_map.get(seed.id, None)
+        return self._path_energy(self.path_frequency.get(path, 1))
 
-    def choose(self, population: List[Seed]):
-        """基于能量地加权随机选择"""
-        self.assign_energy(population)
-        return super().choose(population)
+    @staticmethod
+    def _path_energy(freq: int) -> int:
+        return max(1, int(10 / freq))
 
-    def update_path_info(self, seed_id, path):
+    def update_path_info(self, seed_id: Optional[int], path: Hashable) -> None:
         """
         更新 seed 与路径的映射关系，并统计路径频率。
-        :param seed_id: 种子的唯一标识
-        :param path: 本次执行触发的路径(可用字符串或hash表示)
+        :param seed_id: 种子的唯一标识；为 None 或不在种子集合中时只统计路径频率
+        :param path: 本次执行触发的路径 id（runner 给出的 64 位哈希）
         """
+        # 若是新路径初始化频率为0，否则频率加1
+        freq = self.path_frequency.get(path, 0) + 1
+        self.path_frequency[path] = freq
 
-        # 记录该 seed 触发的路径
-        self.seed_path_map[seed_id] = path
+        # 只记录种子集合中的种子，普通输入不占用内存
+        tracked = seed_id is not None and (
+            self.population is None or self.population.by_id(seed_id) is not None)
+        old_path = None
+        if tracked:
+            old_path = self.seed_path_map.get(seed_id)
+            if old_path != path:
+                self.seed_path_map[seed_id] = path
+                if old_path in self.path_seeds:
+                    self._unindex(seed_id, old_path)
+                self.path_seeds.setdefault(path, set()).add(seed_id)
 
-        # 若是新路径初始化频率为0，否则频率加1
-        self.path_frequency[path] = self.path_frequency.get(path, 0) + 1
+        if self.population is None:
+            return
+        if self._path_energy(freq) != self._path_energy(max(freq - 1, 1)):
+            # 路径能量变化：更新走这条路径的所有种子（频率超过 10 后能量不再变化）
+            for sid in self.path_seeds.get(path, ()):
+                seed = self.population.by_id(sid)
+                if seed is not None:
+                    self.update_seed(seed)
+        elif tracked and old_path != path:
+            self.update_seed(self.population.by_id(seed_id))
+
+    def _unindex(self, seed_id: int, path: Hashable) -> None:
+        seeds = self.path_seeds[path]
+        seeds.discard(seed_id)
+        if not seeds:
+            del self.path_seeds[path]
+
+    def _forget(self, seeds: List[Seed]) -> None:
+        """删除离开种子集合的种子的路径映射，映射大小不超过种子集合"""
+        super()._forget(seeds)
+        for seed in seeds:
+            path = self.seed_path_map.pop(seed.id, None)
+            if path in self.path_seeds:
+                self._unindex(seed.id, path)
@@ -1,74 +1,140 @@
-import os
+import heapq
 import random
-from typing import List
+from typing import Dict, List, Tuple
 
+from utils.Population import Population
+from utils.Sampler import WeightedSampler
 from utils.Seed import Seed
-from utils.ObjectUtils import load_object, dump_object
+from utils.SeedStore import SeedStore
 
 MAX_SEEDS = 500  # 最大种子数量限制
+EVICT_BATCH = 50  # 超出上限时一次淘汰到 MAX_SEEDS - EVICT_BATCH，避免每次选择都触发淘汰
+HANG_PENALTY = 0.1  # 产生过 hang 的种子的选择权重系数
 
 
 class PowerSchedule:
     """
     能量调度基类，定义了能量分配和种子选择的基本方法。
     """
-    def __init__(self):
-        self.seed_registry: dict[int, str] = self._load_registry()
+    def __init__(self, namespace: str = "default"):
+        """`namespace` - name of the fuzzing target; evicted seeds of different
+        targets are kept in separate stores"""
+        # 被淘汰种子的持久化存储（只追加日志 + 定长索引）
+        self.store = SeedStore(namespace)
         self.memory_cache: dict[int, Seed] = {}  # 内存缓存
+        self.hang_seeds: set[int] = set()  # 产生过 hang 的种子 id
+        # 按 population 槽位维护的采样权重，只在种子能量变化时增量更新
+        self.sampler = WeightedSampler()
+        self.population: Population = None
+        # 按能量排序的淘汰堆 [(energy, tiebreak, seed_id)]，过期条目在弹出时跳过
+        self._evict_heap: List[Tuple[float, float, int]] = []
+        # {seed_id: 堆中有效条目的能量}
+        self._heap_energy: Dict[int, float] = {}
 
-    def _load_registry(self) -> dict[int, str]:
-        """加载种子注册表"""
-        try:
-            return load_object("corpus/seed_registry.pkl")
-        except FileNotFoundError:
-            return {}
+    def persist_seeds(self, seeds: List[Seed]):
+        """持久化一批种子：追加到种子存储，由后台线程一次性写盘"""
+        if not seeds:
+            return
+        for seed in seeds:
+            # 只保存核心数据与能量
+            self.store.put(seed.id, seed.data, seed.energy)
 
-    def _save_registry(self):
-        """保存种子注册表"""
-        dump_object("corpus/seed_registry.pkl", self.seed_registry)
+            # 从内存缓存移除
+            if seed.id in self.memory_cache:
+                del self.memory_cache[seed.id]
+        self.store.flush()
 
     def persist_seed(self, seed: Seed):
         """持久化种子到磁盘"""
-        os.makedirs("corpus", exist_ok=True)
-        file_path = f"corpus/seed_{seed.id}.pkl"
-        
-        # 保存种子数据
-        dump_object(file_path, seed.data)  # 只保存核心数据
-        
-        # 更新注册表
-        self.seed_registry[seed.id] = {
-            "path": file_path,
-            "energy": seed.energy,
-            "coverage": seed.coverage
-        }
-        self._save_registry()
-
-        # 从内存缓存移除
-        if seed.id in self.memory_cache:
-            del self.memory_cache[seed.id]
+        self.persist_seeds([seed])
 
     def load_seed(self, seed_id: int) -> Seed:
         """按需加载种子到内存"""
         if seed_id in self.memory_cache:
             return self.memory_cache[seed_id]
         
-        # 从磁盘加载
-        if seed_id in self.seed_registry:
-            data = load_object(self.seed_registry[seed_id]["path"])
-            metadata = self.seed_registry[seed_id]
-            seed = Seed(data, metadata["coverage"])
-            seed.energy = metadata["energy"]
-            self.memory_cache[seed_id] = seed
-            return seed
-        return None
+        # 从种子存储加载（覆盖信息不持久化，重新执行后会再次得到）
+        data = self.store.load(seed_id)
+        if data is None:
+            return None
+        seed = Seed(data, set())
+        seed.energy = self.store.energy(seed_id)
+        self.memory_cache[seed_id] = seed
+        return seed
+
+    def top_seeds(self, count: int) -> List[Seed]:
+        """存储中能量最高的 `count` 个种子"""
+        return [self.load_seed(seed_id) for seed_id in self.store.top(count)]
+
+    def mark_hang(self, seed: Seed) -> None:
+        """记录 seed（或其变异结果）超出了执行预算，之后降低其被选中的概率"""
+        if self.population is not None and seed not in self.population:
+            return  # 不在种子集合中的输入不会被选中，无需记录
+        self.hang_seeds.add(seed.id)
+        self.update_seed(seed)
+
+    def energy(self, seed: Seed) -> float:
+        """
+        计算单个种子的能量，默认所有种子能量相同。子类重写该方法实现不同的调度策略。
+        """
+        return 1
 
     def assign_energy(self, population: List[Seed]) -> None:
         """
-        为每个种子分配相同的能量，默认实现。
+        为每个种子分配能量。
         :param population: 当前所有种子列表
         """
         for seed in population:
-            seed.energy = 1
+            seed.energy = self.energy(seed)
+
+    def _weight(self, seed: Seed) -> float:
+        if seed.id in self.hang_seeds:
+            return seed.energy * HANG_PENALTY
+        return seed.energy
+
+    def update_seed(self, seed: Seed) -> None:
+        """种子的调度信息发生变化后，重新计算它的能量并更新采样权重"""
+        if self.population is None or seed not in self.population:
+            return
+        # seed 可能是与集合中数据相同的另一个对象（如由 hang 输入临时构造）
+        seed = self.population.by_id(seed.id)
+        seed.energy = self.energy(seed)
+        self.sampler.update(self.population.slot(seed), self._weight(seed))
+        if self._heap_energy.get(seed.id) != seed.energy:
+            self._heap_energy[seed.id] = seed.energy
+            heapq.heappush(self._evict_heap, (seed.energy, random.random(), seed.id))
+            if len(self._evict_heap) > 4 * len(self.population) + 64:
+                self._rebuild_heap()
+
+    def _rebuild_heap(self) -> None:
+        """丢弃过期条目，按当前能量重建淘汰堆"""
+        self._heap_energy = {seed.id: seed.energy for seed in self.population}
+        self._evict_heap = [(seed.energy, random.random(), seed.id) for seed in self.population]
+        heapq.heapify(self._evict_heap)
+
+    def refresh(self) -> None:
+        """重新计算所有种子的能量并重建采样树"""
+        population = self.population
+        weights = [0.0] * population.capacity()
+        for seed in population:
+            seed.energy = self.energy(seed)
+            weights[population.slot(seed)] = self._weight(seed)
+        self.sampler.weights = weights
+        self.sampler.rebuild()
+        self._rebuild_heap()
+
+    def _sync(self, population: Population) -> None:
+        """同步上次选择以来 population 的增删"""
+        if population is not self.population:
+            self.population = population
+            population.drain()
+            self.refresh()
+            return
+        added, removed_slots = population.drain()
+        for slot in removed_slots:
+            self.sampler.update(slot, 0)
+        for seed in added:
+            self.update_seed(seed)
 
     def normalized_energy(self, population: List[Seed]) -> List[float]:
         """
@@ -77,6 +143,11 @@ class PowerSchedule:
         :return: 归一化后的能量列表
         """
         energy = list(map(lambda seed: seed.energy, population))
+        if self.hang_seeds:
+            energy = [
+                nrg * HANG_PENALTY if seed.id in self.hang_seeds else nrg
+                for seed, nrg in zip(population, energy)
+            ]
 
         # 所有能量求和，并防止除零错误
         sum_energy = sum(energy)
@@ -86,19 +157,54 @@ class PowerSchedule:
         norm_energy = list(map(lambda nrg: nrg / sum_energy, energy))
         return norm_energy
 
-    def choose(self, population: List[Seed]) -> Seed:
+    def choose(self, population: Population) -> Seed:
         """优化后的选择逻辑"""
+        self._sync(population)
+
         # 内存控制
-        while len(population) > MAX_SEEDS:
-            # 移除能量最低的种子
-            min_energy = min(s.energy for s in population)
-            candidates = [s for s in population if s.energy == min_energy]
-            seed_to_remove = random.choice(candidates)
-            self.persist_seed(seed_to_remove)
-            population.remove(seed_to_remove)
-
-        # 按能量选择（自动处理内存/磁盘种子）
-        self.assign_energy(population)
-        norm_energy = self.normalized_energy(population)
-        selected = random.choices(population, weights=norm_energy, k=1)
-        return selected[0]  # 返回根据能量权重选择的种子
+        if len(population) > MAX_SEEDS:
+            self.evict(population, MAX_SEEDS - EVICT_BATCH)
+
+        # 按能量加权选择，O(log N)
+        return population.at_slot(self.sampler.sample())
+
+    def evict(self, population: Population, target: int) -> List[Seed]:
+        """淘汰能量最低的种子直到数量不超过 `target`，整批交给写缓冲持久化"""
+        heap = self._evict_heap
+        evicted = []
+        while len(population) > target and heap:
+            energy, _, seed_id = heapq.heappop(heap)
+            seed = population.by_id(seed_id)
+            # 惰性失效：种子已被移除或能量已改变的条目直接跳过
+            if seed is None or self._heap_energy.get(seed_id) != energy:
+                continue
+            del self._heap_energy[seed_id]
+            self.sampler.update(population.slot(seed), 0)
+            population.remove(seed)
+            evicted.append(seed)
+        population.drain()
+        self.persist_seeds(evicted)
+        self._forget(evicted)
+        return evicted
+
+    def remove(self, population: Population, seeds: List[Seed]) -> None:
+        """从种子集合中移除种子且不持久化，例如语料库最小化后冗余的种子"""
+        self._sync(population)
+        removed = []
+        for seed in seeds:
+            seed = population.by_id(seed.id)
+            if seed is None:
+                continue
+            self._heap_energy.pop(seed.id, None)
+            self.sampler.update(population.slot(seed), 0)
+            population.remove(seed)
+            self.memory_cache.pop(seed.id, None)
+            removed.append(seed)
+        population.drain()
+        self._forget(removed)
+
+    def _forget(self, seeds: List[Seed]) -> None:
+        """种子离开种子集合（被淘汰或移除）后清理其调度信息；子类重写时需调用此方法"""
+        for seed in seeds:
+            self.hang_seeds.discard(seed.id)
+
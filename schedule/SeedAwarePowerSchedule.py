@@ -1,10 +1,12 @@
-from typing import Dict, List, Sequence, Tuple
-import random
+from typing import Dict, List, Tuple
 import time
 
 from schedule.PowerSchedule import PowerSchedule
+from utils.Population import Population
 from utils.Seed import Seed
 
+AGE_REFRESH_INTERVAL = 60  # 按年龄重新计算所有种子能量的间隔（秒）
+
 
 class SeedAwarePowerSchedule(PowerSchedule):
     """基于种子年龄和覆盖增长率的调度策略：
@@ -12,35 +14,51 @@ class SeedAwarePowerSchedule(PowerSchedule):
     2. 对覆盖率增长贡献大的种子分配更多能量
     """
 
-    def __init__(self) -> None:
-        super().__init__()
+    def __init__(self, namespace: str = "default") -> None:
+        super().__init__(namespace)
         # 记录种子的元信息：{seed.id: (创建时间戳, 覆盖增长率)}
         self.seed_metadata: Dict[str, Tuple[float, float]] = {}
+        self.last_refresh = time.time()
 
-    def assign_energy(self, population: Sequence[Seed]) -> None:
+    def energy(self, seed: Seed) -> float:
         """动态计算能量分配"""
         current_time = time.time()
 
-        for seed in population:
-            # 获取种子元信息
-            default_meta: Tuple[float, float] = (current_time, 0.0)
-            create_time, coverage_gain = self.seed_metadata.get(seed.id, default_meta)
+        # 获取种子元信息
+        default_meta: Tuple[float, float] = (current_time, 0.0)
+        create_time, coverage_gain = self.seed_metadata.get(seed.id, default_meta)
 
-            # 计算年龄因子（单位：小时）
-            age = max(1.0, (current_time - create_time) / 3600)  # 防止除零
+        # 计算年龄因子（单位：小时）
+        age = max(1.0, (current_time - create_time) / 3600)  # 防止除零
 
-            # 能量计算 = 基础能量 * 覆盖增长率 / 年龄
-            base_energy = 10.0
-            seed.energy = max(1, int(base_energy * (coverage_gain + 0.1) / age))
+        # 能量计算 = 基础能量 * 覆盖增长率 / 年龄
+        base_energy = 10.0
+        return max(1, int(base_energy * (coverage_gain + 0.1) / age))
 
-    def choose(self, population: List[Seed]) -> Seed:
+    def choose(self, population: Population) -> Seed:
         """基于能量地加权随机选择"""
-        self.assign_energy(population)
+        # 年龄因子随时间缓慢变化，定期整体刷新一次即可
+        if population is self.population and time.time() - self.last_refresh > AGE_REFRESH_INTERVAL:
+            self.refresh()
         return super().choose(population)
 
+    def refresh(self) -> None:
+        self.last_refresh = time.time()
+        super().refresh()
+
+    def _forget(self, seeds: List[Seed]) -> None:
+        """删除离开种子集合的种子的元信息，元信息大小不超过种子集合"""
+        super()._forget(seeds)
+        for seed in seeds:
+            self.seed_metadata.pop(seed.id, None)
+
     def update_seed_metadata(self, seed_id: str, coverage_gain: float):
         """更新种子覆盖增长率和时间戳"""
         current_time = time.time()
         # 保留旧创建时间，只更新覆盖增长率
         old_create_time, _ = self.seed_metadata.get(seed_id, (current_time, 0.0))
         self.seed_metadata[seed_id] = (old_create_time, coverage_gain)
+        if self.population is not None:
+            seed = self.population.by_id(seed_id)
+            if seed is not None:
+                self.update_seed(seed)
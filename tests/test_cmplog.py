@@ -0,0 +1,41 @@
+import sys
+
+import pytest
+from utils.Seed import Seed
+from samples.Samples import sample3
+from runner.FunctionCoverageRunner import FunctionCoverageRunner
+from utils.CmpLog import CmpLog, InputToStateStage, MonitoringCmpLog, cmplog_backend
+from utils.Coverage import MONITORING_AVAILABLE
+
+
+def test_input_to_state_stage():
+    runner = FunctionCoverageRunner(sample3, cmplog=True)
+    comparisons = runner.trace_comparisons("FDUQBLx")
+    assert ("cmp", "x", "A") in comparisons, "应记录 s[index + 1] == 'A' 的两个操作数"
+    assert runner.coverage_map.count() == 0, "比较追踪不应影响覆盖率状态"
+    assert ("token", "FDUQBx", "L") in runner.trace_comparisons("FDUQBx"), "应记录 index 查找失败的子串"
+    assert ("startswith", "", "B") in runner.trace_comparisons("FDUQBLA")
+
+    stage = InputToStateStage(Seed("FDUQBLx", set()), comparisons)
+    assert "FDUQBLA" in [candidate for candidate, _ in stage.candidates], "应把输入中的 'x' 替换为 'A'"
+    stage = InputToStateStage(Seed("FDUQBLA", set()), [("startswith", "", "B")])
+    assert [candidate for candidate, _ in stage.candidates] == ["FDUQBLAB"], "空的被比较串应在末尾追加"
+    assert stage.tokens == ["B"]
+
+
+@pytest.mark.parametrize("backend", [
+    pytest.param(CmpLog, marks=pytest.mark.skipif(
+        sys.version_info >= (3, 12), reason="3.12+ 的 settrace 不保证产生 opcode 事件")),
+    pytest.param(MonitoringCmpLog, marks=pytest.mark.skipif(
+        not MONITORING_AVAILABLE, reason="sys.monitoring requires Python 3.12+")),
+])
+def test_cmplog_backends(backend):
+    assert cmplog_backend() is (MonitoringCmpLog if MONITORING_AVAILABLE else CmpLog)
+    for _ in range(2):
+        with backend() as cmplog, pytest.raises(AssertionError):
+            sample3("FDUQBLx")
+        assert ("cmp", "x", "A") in cmplog.comparisons, "重复追踪同一个 code object 也应记录比较"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,238 @@
+import threading
+import time
+
+import pytest
+from runner.FunctionCoverageRunner import FunctionCoverageRunner
+from runner.Runner import Runner
+from samples.Samples import sample1, sample3, sample4
+from utils.Coverage import MONITORING_AVAILABLE, Coverage, coverage_backend, population_coverage
+from utils.CorpusCoverage import CorpusCoverage
+from utils.CorpusMinimizer import CorpusMinimizer
+from utils.CoverageMap import COUNT_CLASS, NEW_BUCKET, NEW_COVERAGE, CoverageMap, VirginMap
+from utils.CoverageReport import CoverageReport
+from utils.ObjectUtils import dump_object, load_object
+from utils.Population import Population
+from utils.Seed import Seed
+from schedule.PathPowerSchedule import PathPowerSchedule
+from utils.Scope import InstrumentationScope
+
+
+def test_coverage_backend_fallback():
+    backend = coverage_backend("monitoring")
+    if not MONITORING_AVAILABLE:
+        assert backend is Coverage, "不支持 sys.monitoring 时应回退到 settrace"
+    with pytest.raises(ValueError):
+        coverage_backend("unknown")
+
+
+@pytest.mark.parametrize("backend", ["settrace", "monitoring"])
+def test_backends_agree(backend):
+    runner = FunctionCoverageRunner(sample3, backend=backend)
+    _, outcome = runner.run("FDU")
+    assert outcome == Runner.FAIL
+    lines = {lineno for (name, lineno) in runner.coverage() if name == "sample3"}
+    reference = FunctionCoverageRunner(sample3)
+    reference.run("FDU")
+    expected = {lineno for (name, lineno) in reference.coverage() if name == "sample3"}
+    assert lines == expected, "不同后端记录的行覆盖应一致"
+
+
+@pytest.mark.parametrize("backend", ["settrace", "monitoring"])
+def test_other_threads_not_recorded(backend):
+    stop = threading.Event()
+
+    def background():
+        while not stop.is_set():
+            sample1("0.5")
+
+    def target(s):
+        time.sleep(0.01)  # 目标执行中让出 GIL，后台线程在追踪期间运行
+        return sample3(s)
+
+    reference = FunctionCoverageRunner(target, backend=backend)
+    reference.run("FDU")
+    thread = threading.Thread(target=background)
+    thread.start()
+    try:
+        runner = FunctionCoverageRunner(target, backend=backend)
+        for _ in range(5):
+            runner.run("FDU")
+    finally:
+        stop.set()
+        thread.join()
+    assert runner.all_coverage == reference.all_coverage, "其他线程执行的代码不应计入覆盖率"
+
+
+def test_coverage_map_merge():
+    all_map, cur = CoverageMap(), CoverageMap()
+    runner = FunctionCoverageRunner(sample3)
+    runner.run("FDU")
+    cur.bits[:] = runner.coverage_map.bits
+    assert all_map.has_new(cur)
+    new_ids = all_map.merge(cur)
+    assert len(new_ids) == cur.count() == len(runner.coverage())
+    assert not all_map.has_new(cur), "合并后不应再有新覆盖"
+    assert all_map.merge(cur) == []
+
+
+def test_edge_buckets():
+    assert [COUNT_CLASS[n] for n in (0, 1, 2, 3, 4, 7, 8, 15, 16, 200)] == [0, 1, 2, 4, 8, 8, 16, 16, 32, 128]
+    runner = FunctionCoverageRunner(sample4, edges=True)
+    runner.run("<a>")
+    assert runner.new_edges
+    runner.run("<a>")
+    assert not runner.new_edges, "相同输入不应产生新的边覆盖"
+    runner.run("<a>" * 6)
+    assert not runner.new_coverage and runner.new_edges, "循环次数变化应体现为新的命中次数分桶"
+
+
+def test_virgin_map_novelty():
+    virgin = VirginMap(8)
+    assert virgin.update(bytes([0, 1, 0, 2, 0, 0, 0, 0])) == ([1, 3], [])
+    assert virgin.update(bytes([0, 1, 0, 2, 0, 0, 0, 0])) == ([], []), "见过的分桶不再是新覆盖"
+    assert virgin.update(bytes([0, 1, 0, 4, 8, 0, 0, 0])) == ([4], [3])
+    assert virgin.count() == 3
+
+    runner = FunctionCoverageRunner(sample4, edges=True)
+    runner.run("<a>")
+    assert runner.novelty == NEW_COVERAGE and runner.new_locations
+    runner.run("<a>")
+    assert runner.novelty == 0 and runner.new_locations == []
+    runner.run("<a>" * 40)
+    if not runner.new_coverage:
+        assert runner.novelty in (NEW_BUCKET, NEW_COVERAGE)
+
+
+def test_failing_runs_use_separate_virgin_map():
+    runner = FunctionCoverageRunner(sample3)
+    assert runner.run("FDUQBLx")[1] == Runner.FAIL
+    assert runner.novelty == 0 and runner.new_locations, "失败的执行仍应报告新覆盖的行"
+    assert runner.virgin_lines.count() == 0, "失败的执行不应更新通过执行的 virgin map"
+    assert runner.virgin_fail.count() == len(runner.new_locations)
+
+    runner.run("FDUQBLAB")
+    assert runner.novelty == NEW_COVERAGE, "只被失败执行覆盖过的位置仍应让通过的执行成为种子"
+    assert runner.new_locations == [(sample3.__code__.co_filename, 43)], "已报告过的行不应再次出现在增量中"
+    runner.run("FDUQBLAB")
+    assert runner.novelty == 0 and runner.new_locations == []
+
+
+def test_run_batch_matches_single_runs():
+    inputs = ["F", "FD", "FDUPA", "FDU", "x"]
+    batch = FunctionCoverageRunner(sample3)
+    results = batch.run_batch(inputs)
+    single = FunctionCoverageRunner(sample3)
+    expected = [single.run(inp) for inp in inputs]
+    assert [(result, outcome) for result, outcome, _ in results] == expected
+    assert batch.all_coverage == single.all_coverage, "批量执行的累计覆盖应与逐个执行一致"
+    assert results[-1][2] == [], "没有新覆盖的输入增量应为空"
+
+
+def test_scope_filters_code_objects():
+    scope = InstrumentationScope(include=["samples.Samples", "html"])
+    runner = FunctionCoverageRunner(sample4, scope=scope)
+    runner.run("<a href='x'>&amp;</a>")
+    files = {code.co_filename for code, in_scope in scope.cache.items() if in_scope}
+    assert all("samples" in f or "html" in f for f in files)
+    assert ("sample4", 49) in runner.coverage()
+    assert not any(name == "__and__" for name, _ in runner.coverage()), "范围外的代码不应被追踪"
+
+    only_target = FunctionCoverageRunner(sample4, scope=InstrumentationScope(include=[sample4]))
+    only_target.run("<a>")
+    assert {name for name, _ in only_target.coverage()} == {"sample4"}
+
+
+def test_coverage_report(tmp_path):
+    runner = FunctionCoverageRunner(sample3)
+    runner.run("FDx")
+    report = CoverageReport.from_map(runner.all_coverage_map)
+    file_cov = report.files[sample3.__code__.co_filename]
+    assert file_cov.covered == {36, 37, 38}
+    assert {39, 44, 48} <= file_cov.executable - file_cov.covered, "未执行的函数体应计为未覆盖"
+    assert 35 not in file_cov.executable, "def 行不是可执行行"
+    stats = {name: (total, hit) for name, _, total, hit in file_cov.function_stats()}
+    assert stats["sample3"] == (9, 3)
+    assert "sample3:35" in report.text()
+
+    index = report.write_html(str(tmp_path))
+    assert "Coverage:" in open(index, encoding="utf-8").read()
+    assert len(list(tmp_path.iterdir())) == len(report.files) + 1
+
+
+def test_corpus_coverage_cache(tmp_path):
+    population = ["F", "FD", "FDx", "F", "x"]
+    all_coverage, cumulative = population_coverage(population, sample3)
+    assert cumulative == [2, 3, 3, 3, 3]
+    assert all_coverage == {("sample3", 36), ("sample3", 37), ("sample3", 38)}
+
+    analysis = CorpusCoverage(sample3, cache_dir=str(tmp_path), workers=2, chunk_size=1)
+    assert analysis.analyze(population) == (all_coverage, cumulative)
+    assert analysis.executed == 4, "相同内容的输入只执行一次"
+
+    again = CorpusCoverage(sample3, cache_dir=str(tmp_path), workers=2)
+    _, cumulative = again.analyze(population + ["FDUPA"])
+    assert again.executed == 1, "只应执行缓存中没有的输入"
+    assert cumulative[-1] == 4
+
+
+def _same_named_modules():
+    # 两个模块中同名、同行号的 reset（如 html.parser 与 _markupbase）
+    namespaces = [{}, {}]
+    for filename, body, namespace in zip(["first.py", "second.py"], ["len(s)", "s.upper()"], namespaces):
+        exec(compile(f"def reset(s):\n    return {body}\n", filename, "exec"), namespace)
+    return namespaces[0]["reset"], namespaces[1]["reset"]
+
+
+_RESETS = _same_named_modules()
+
+
+def _call_reset(s):
+    return _RESETS[s.startswith("b")](s)
+
+
+def test_corpus_coverage_distinguishes_modules():
+    _, cumulative = CorpusCoverage(_call_reset, workers=1).analyze(["a", "b"])
+    assert cumulative[1] == cumulative[0] + 1, "不同模块中同名函数的同一行应是不同的位置"
+
+    runner = FunctionCoverageRunner(_call_reset)
+    runner.run("a")
+    runner.run("b")
+    assert {filename for filename, _ in runner.all_coverage} >= {"first.py", "second.py"}
+    assert len(runner.all_coverage) == cumulative[1], "覆盖的行按 (filename, lineno) 统计"
+
+
+
+def test_corpus_minimizer(tmp_path):
+    minimizer = CorpusMinimizer(sample3, workers=2, chunk_size=1)
+    assert minimizer.minimize(["x", "F", "FDx", "FD", "FD"]) == ["FD"], "应只保留覆盖全部位置的最短输入"
+    assert minimizer.minimize(["x", "F", "FDUQBx"]) == ["FDUQBx"]
+
+    def loop(s):
+        for _ in s:
+            pass
+
+    # 启用边时，只带来新的命中次数分桶的输入同样保留
+    assert CorpusMinimizer(loop, workers=1).minimize(["aaaa", "a"]) == ["a"]
+    assert CorpusMinimizer(loop, workers=1, edges=True).minimize(["aaaa", "a"]) == ["aaaa", "a"]
+    assert CorpusMinimizer(_call_reset, workers=1).minimize(["a", "b"]) == ["a", "b"], \
+        "不同模块中同名函数的位置是不同的特征"
+
+    path = str(tmp_path / "corpus")
+    dump_object(path, ["F", "FD", "FDx"])
+    minimizer.minimize_file(path)
+    assert load_object(path) == ["FD"], "结果应以 load_object 的格式写回"
+
+    schedule = PathPowerSchedule(namespace="test_cmin")
+    population = Population(Seed(data, set()) for data in ["F", "FD", "FDx"])
+    schedule.choose(population)
+    for seed in population:
+        schedule.update_path_info(seed.id, hash(seed.data))
+    removed = minimizer.minimize_population(population, schedule)
+    assert sorted(seed.data for seed in removed) == ["F", "FDx"]
+    assert [seed.data for seed in population] == ["FD"]
+    assert set(schedule.seed_path_map) == {population[0].id}, "被移除的种子不应保留路径映射"
+    assert schedule.choose(population).data == "FD"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
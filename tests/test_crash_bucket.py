@@ -0,0 +1,69 @@
+import pytest
+from runner.FunctionCoverageRunner import FunctionCoverageRunner
+from runner.Runner import Runner
+from samples.Samples import sample1, sample3
+from utils.Budget import BudgetExceeded, ExecutionBudget
+from utils.Coverage import Coverage
+from utils.CrashMinimizer import HANG, CrashMinimizer
+
+
+def test_crash_buckets():
+    runner = FunctionCoverageRunner(sample3)
+    sig1, outcome = runner.run("FDUPA")  # ZeroDivisionError
+    assert outcome == Runner.FAIL
+    sig2, _ = runner.run("FDUPA!")
+    assert sig1 == sig2, "同一位置的同类异常应落入同一个桶"
+    sig3, _ = runner.run("FDUBQLX")  # AssertionError
+    assert sig3 != sig1
+    assert runner.crashes.counts[sig1] == 2
+    assert "ZeroDivisionError" in runner.crashes.traces[sig1], "每个桶保留第一个 crash 的完整 traceback"
+
+
+def test_budget_reports_hang():
+    runner = FunctionCoverageRunner(sample1, budget=ExecutionBudget(max_lines=100))
+    _, outcome = runner.run("0.5")
+    assert outcome == Runner.PASS
+    sig, outcome = runner.run("1")  # 近不动点，无限递归
+    assert outcome == Runner.HANG, "超出行数预算应返回 HANG 而不是 RecursionError"
+    assert sig in runner.hangs.counts and sig not in runner.crashes.counts
+
+
+def test_hang_signature_has_only_target_frames():
+    budget = ExecutionBudget(max_lines=100)
+    runner = FunctionCoverageRunner(sample1, budget=budget)
+    try:
+        with Coverage(budget=budget):
+            sample1("1")
+    except BudgetExceeded as exc:
+        frames = runner.hangs.frames(exc)
+    assert frames and all(code.co_filename == sample1.__code__.co_filename for code, _ in frames), \
+        "hang 签名不应包含追踪函数与预算检查的栈帧"
+    assert len(frames) == runner.hangs.depth
+
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_crash_minimizer(workers):
+    runner = FunctionCoverageRunner(sample3)
+    signature, outcome = runner.run("FDUQBLxyzzzzzzzzz")  # AssertionError
+    assert outcome == Runner.FAIL
+
+    minimizer = CrashMinimizer(sample3, workers=workers)
+    minimized = minimizer.minimize_all({"FDUQBLxyzzzzzzzzz": signature, "FDUPxxxxxx": runner.run("FDUPxxxxxx")[0]})
+    assert minimized[signature] == "FDULx", "应删除所有不影响 crash 的字符"
+    assert runner.run("FDULx")[0] == signature, "最小化的输入应保持相同的 crash 签名"
+    assert len(minimized) == 2
+
+    execs = minimizer.execs
+    assert minimizer.minimize("FDUQBLxyzzzzzzzzz") == "FDULx"
+    assert minimizer.execs == execs, "重复的候选输入应命中缓存"
+    assert minimizer.minimize("FDUQBLAB") == "FDUQBLAB", "不触发 crash 的输入原样返回"
+    assert minimizer.minimize("FDULx", signature="other") == "FDULx", "签名不一致时原样返回"
+
+    # 超出预算的输入结果为 HANG，不作为 crash 最小化
+    hanging = CrashMinimizer(sample1, workers=1, budget=ExecutionBudget(max_lines=100))
+    assert hanging.outcome("1") == HANG and hanging.minimize("1") == "1"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,55 @@
+import itertools
+import json
+
+import pytest
+from fuzzer.GreyBoxFuzzer import GreyBoxFuzzer
+from runner.FunctionCoverageRunner import FunctionCoverageRunner
+from samples.Samples import sample3
+from schedule.PowerSchedule import PowerSchedule
+from utils.Mutator import Mutator
+from utils.OutcomeStats import OutcomeStats
+from utils.Telemetry import Telemetry
+
+
+def test_streaming_runs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    fuzzer = GreyBoxFuzzer(seeds=["FD"], schedule=PowerSchedule(), is_print=False)
+    fuzzer.outcomes = OutcomeStats(recent=10)
+    seen = []
+    res = fuzzer.runs(FunctionCoverageRunner(sample3), run_time=0.5,
+                      callback=lambda result, outcome: seen.append(outcome), collect=False)
+    assert len(res) <= 10, "collect=False 时只返回环形缓冲区中的最近结果"
+    assert len(seen) == fuzzer.total_execs == fuzzer.outcomes.total
+    assert sum(fuzzer.outcomes.counts.values()) == fuzzer.total_execs
+
+    stream = GreyBoxFuzzer(seeds=["FD"], schedule=PowerSchedule(), is_print=False)
+    first = list(itertools.islice(stream.stream(FunctionCoverageRunner(sample3), run_time=60), 5))
+    assert len(first) == 5 and stream.total_execs == 5, "生成器应按需执行"
+
+
+def test_telemetry_outputs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    fuzzer = GreyBoxFuzzer(seeds=["FD"], schedule=PowerSchedule(), is_print=False,
+                           mutator=Mutator(adaptive=True))
+    fuzzer.telemetry = Telemetry(fuzzer, interval=0.1, print_table=False,
+                                 jsonl_path=str(tmp_path / "out" / "t.jsonl"),
+                                 prometheus_path=str(tmp_path / "out" / "t.prom"),
+                                 labels={"target": "sample3"})
+    fuzzer.runs(FunctionCoverageRunner(sample3), run_time=0.5, collect=False)
+
+    lines = (tmp_path / "out" / "t.jsonl").read_text().splitlines()
+    assert len(lines) >= 2, "每个间隔输出一行，结束时再输出一行"
+    records = [json.loads(line) for line in lines]
+    assert records[-1]["execs"] == fuzzer.total_execs, "最后一次报告应包含全部执行次数"
+    assert records[-1]["unique_crashes"] == len(fuzzer.crash_signatures)
+    assert all(a["timestamp"] <= b["timestamp"] for a, b in zip(records, records[1:]))
+
+    prom = (tmp_path / "out" / "t.prom").read_text()
+    assert f'fuzzer_execs_total{{target="sample3"}} {fuzzer.total_execs}' in prom
+    assert "# TYPE fuzzer_covered_lines gauge" in prom
+    assert records[-1]["operators"]["flip_bits"]["uses"] > 0, "应输出各变异算子的收益"
+    assert 'fuzzer_operator_uses{operator="flip_bits",target="sample3"}' in prom
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -1,5 +1,12 @@
+import random
+
 import pytest
-from utils.Mutator import delete_random_bytes
+from utils.Seed import Seed
+from samples.Samples import sample3
+from utils.Deterministic import DeterministicStage
+from utils.Dictionary import Dictionary
+from utils.Mutator import Mutator, delete_random_bytes, from_bytearray, insert_token, overwrite_token, to_bytearray
+
 
 def test_delete_random_bytes():
     # 测试正常删除
@@ -11,5 +18,62 @@ def test_delete_random_bytes():
     assert delete_random_bytes("") == "", "空输入应返回空"
     assert delete_random_bytes("a") == "a", "单字节输入无法删除"
 
+
+def test_stacked_mutation_keeps_bytes():
+    raw = bytes(range(256))
+    text = from_bytearray(bytearray(raw), "")
+    assert bytes(to_bytearray(text)) == raw, "无法解码的字节不应被丢弃"
+
+    random.seed(0)
+    mutator = Mutator()
+    for _ in range(200):
+        assert isinstance(mutator.stack("1.5", 10), str)
+        assert isinstance(mutator.stack(b"1.5", 10), bytes), "bytes 输入应得到 bytes"
+    assert mutator.stack("1.5", 0) == "1.5"
+
+    buf = bytearray(b"abcd")
+    mutator.mutators = [lambda b: b.append(0x41)]
+    assert mutator.stack(buf, 3) == b"abcdAAA" and buf == b"abcd", "变异不应修改传入的种子"
+
+
+def test_deterministic_stage_effector_map():
+    seed = Seed("Fd", set())
+    stage = DeterministicStage(seed, path="base")
+    seen = []
+    for candidate, tag in stage.candidates:
+        if tag is not None:
+            # 只有第一个字节影响路径
+            stage.feedback(tag, "changed" if tag == 0 else "base")
+        seen.append(candidate)
+    assert "FD" in seen and "Hd" in seen and "\x7fd" in seen, "应包含 bitflip、算术与 interesting 变异"
+    assert seen.count("Gd") == 1, "bitflip 已经产生过的算术结果应跳过"
+    # walking bitflip 1/1、2/1、4/1 与 bitflip 8/8 之后，单字节变异不再修改第二个字节
+    bitflips = 16 + 15 + 13 + 2
+    assert not any(c[0] == "F" and c[1] != "d" for c in seen[bitflips:]), "effector map 为 0 的字节应跳过"
+
+
+def test_dictionary_tokens(tmp_path):
+    dictionary = Dictionary.from_target(sample3)
+    assert {b"F", b"D", b"U", b"L", b"A", b"B"} <= set(dictionary.tokens), "应从 co_consts 中提取比较的常量"
+
+    path = tmp_path / "user.dict"
+    path.write_text('# comment\nmagic="\\x7fELF"\n"FDU"\n"F"\n', encoding="utf-8")
+    assert dictionary.load(str(path)) == 2, "已有的 token 不应重复添加"
+    assert b"\x7fELF" in dictionary.tokens
+
+    buf = bytearray(b"xy")
+    insert_token(buf, [b"LA"])
+    assert buf in (b"LAxy", b"xLAy", b"xyLA")
+    buf = bytearray(b"xyz")
+    overwrite_token(buf, [b"LA"])
+    assert buf in (b"LAz", b"xLA")
+    buf = bytearray(b"x")
+    overwrite_token(buf, [b"LA"])
+    assert buf == b"LA", "token 比输入长时应覆盖整个输入"
+
+    mutator = Mutator(dictionary)
+    assert len(mutator.mutators) == len(Mutator().mutators) + 2
+
+
 if __name__ == "__main__":
-    pytest.main([__file__])
\ No newline at end of file
+    pytest.main([__file__])
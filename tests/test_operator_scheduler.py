@@ -0,0 +1,29 @@
+import random
+
+import pytest
+from utils.Mutator import Mutator
+from utils.OperatorScheduler import EXPLORE, OperatorScheduler
+
+
+def test_operator_scheduler():
+    scheduler = OperatorScheduler(["a", "b", "c", "d"], period=100)
+    random.seed(0)
+    for _ in range(200):
+        applied = [scheduler.choose() for _ in range(4)]
+        scheduler.update(applied, found=0 in applied, crashed=False)
+    weights = scheduler.weights
+    assert weights[0] == max(weights), "带来新覆盖的算子权重应最高"
+    assert min(weights) >= EXPLORE / 4, "每个算子至少保留均匀探索的概率"
+    assert abs(sum(weights) - 1) < 1e-9
+
+    stats = scheduler.stats()
+    assert stats["operators"]["a"]["finds"] == stats["operators"]["a"]["uses"], "a 的每次使用都带来了新覆盖"
+    assert stats["depths"] == {"4-7": {"uses": 200, "finds": stats["operators"]["a"]["finds"], "crashes": 0}}
+
+    mutator = Mutator(adaptive=True)
+    assert isinstance(mutator.stack("FDUQBLx", 5), str)
+    assert len(mutator.applied) == 5, "adaptive 时应记录栈中依次应用的算子"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,25 @@
+import pytest
+from fuzzer.ParallelFuzzer import ParallelFuzzer
+from runner.FunctionCoverageRunner import FunctionCoverageRunner
+from samples.Samples import sample1, sample3
+from utils.Budget import ExecutionBudget
+
+
+def test_parallel_fuzzer_merges_workers():
+    fuzzer = ParallelFuzzer(seeds=["FD"], workers=2, is_print=False, sync_interval=0.1)
+    fuzzer.runs(FunctionCoverageRunner(sample3), run_time=2)
+    assert fuzzer.total_execs > 0, "协调者应汇总各 worker 的执行次数"
+    assert (sample3.__code__.co_filename, 36) in fuzzer.covered_line
+    assert len(fuzzer.population) >= 1
+    assert fuzzer.outcomes.total == fuzzer.total_execs, "按 outcome 的计数应覆盖所有 worker 的全部执行"
+
+
+def test_parallel_fuzzer_reports_hangs():
+    fuzzer = ParallelFuzzer(seeds=["1"], workers=2, is_print=False, sync_interval=0.1)
+    fuzzer.runs(FunctionCoverageRunner(sample1, budget=ExecutionBudget(max_lines=100)), run_time=2)
+    assert fuzzer.hang_map and set(fuzzer.hang_map.values()) == fuzzer.hang_signatures, "worker 的新 hang 桶应转发给协调者"
+    assert fuzzer.stats()["unique_hangs"] == len(fuzzer.hang_signatures)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,144 @@
+import random
+
+import pytest
+from runner.FunctionCoverageRunner import FunctionCoverageRunner
+from samples.Samples import sample3
+from schedule.PathPowerSchedule import PathPowerSchedule
+from schedule.PowerSchedule import EVICT_BATCH, MAX_SEEDS, PowerSchedule
+from schedule.SeedAwarePowerSchedule import SeedAwarePowerSchedule
+from utils.Population import Population
+from utils.Sampler import WeightedSampler
+from utils.Seed import Seed
+
+
+def test_population_indexes():
+    seeds = [Seed(f"s{i}", set()) for i in range(5)]
+    population = Population(seeds)
+    assert len(population) == 5
+    assert not population.add(Seed("s0", set())), "相同数据的种子不应重复添加"
+    assert population.get("s3") is seeds[3]
+    assert population.by_id(seeds[2].id) is seeds[2]
+    assert "s1" in population and seeds[1] in population
+
+    slot = population.slot(seeds[4])
+    population.remove(seeds[1])
+    assert "s1" not in population and population.get("s1") is None
+    assert population.slot(seeds[4]) == slot, "删除其他种子后槽位不应改变"
+    assert sorted(s.data for s in population) == ["s0", "s2", "s3", "s4"]
+
+    population.add(Seed("new", set()))
+    assert population.slot(population.get("new")) == 1, "应复用被删除种子的槽位"
+    assert population.capacity() == 5
+
+
+def test_schedule_choose_population():
+    population = Population(Seed(f"s{i}", set()) for i in range(10))
+    chosen = PowerSchedule().choose(population)
+    assert chosen in population
+    assert random.choices(population, k=3)[0] in population
+
+
+def test_weighted_sampler():
+    sampler = WeightedSampler()
+    for slot, weight in enumerate([1, 0, 3, 0, 6]):
+        sampler.update(slot, weight)
+    assert sampler.total == 10
+    rng = random.Random(0)
+    counts = [0] * 5
+    for _ in range(10000):
+        counts[sampler.sample(rng.random)] += 1
+    assert counts[1] == counts[3] == 0, "权重为 0 的槽位不应被选中"
+    assert 500 < counts[0] < 1500 and 2500 < counts[2] < 3500 and 5500 < counts[4] < 6500
+    sampler.update(4, 0)
+    assert sampler.total == 4
+    assert {sampler.sample(rng.random) for _ in range(100)} == {0, 2}
+
+
+def test_path_schedule_pushes_energy_updates():
+    schedule = PathPowerSchedule()
+    population = Population(Seed(f"s{i}", set()) for i in range(3))
+    schedule.choose(population)
+    seed = population.get("s0")
+    schedule.update_path_info(seed.id, "p")
+    assert seed.energy == 10
+    for _ in range(4):
+        schedule.update_path_info("not a seed", "p")
+    assert seed.energy == 2, "路径频率变化后应立即更新对应种子的能量"
+    assert schedule.sampler.weights[population.slot(seed)] == 2
+
+    population.add(Seed("new", set()))
+    population.remove(population.get("s1"))
+    schedule.choose(population)
+    weights = schedule.sampler.weights
+    assert weights[population.slot(population.get("new"))] == 10
+    assert sum(weights) == 2 + 10 + 10, "被删除种子的槽位权重应清零"
+
+
+def test_path_ids_only_track_seeds():
+    runner = FunctionCoverageRunner(sample3)
+    runner.run("FD")
+    first = runner.path()
+    runner.run("FD")
+    assert runner.path() == first and 0 <= first < 1 << 64, "相同覆盖应得到相同的 64 位路径 id"
+    runner.run("X")
+    assert runner.path() != first
+
+    schedule = PathPowerSchedule()
+    population = Population([Seed("FD", set())])
+    schedule.choose(population)
+    schedule.update_path_info(population.get("FD").id, first)
+    for _ in range(100):
+        schedule.update_path_info(None, runner.path())
+    assert schedule.path_frequency == {first: 1, runner.path(): 100}
+    assert list(schedule.seed_path_map) == [population.get("FD").id], "普通输入不应记录在种子路径映射中"
+
+
+def test_batched_eviction(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    schedule = PathPowerSchedule()
+    population = Population(Seed(f"s{i}", set()) for i in range(MAX_SEEDS))
+    schedule.choose(population)
+    # 前 100 个种子走同一条高频路径，能量最低
+    for i in range(100):
+        schedule.update_path_info(population.get(f"s{i}").id, "hot")
+    population.add(Seed("extra", set()))
+    schedule.choose(population)
+    assert len(population) == MAX_SEEDS - EVICT_BATCH, "超出上限时应一次淘汰一整批"
+    evicted = [f"s{i}" for i in range(100) if f"s{i}" not in population]
+    assert len(evicted) == EVICT_BATCH + 1, "应优先淘汰能量最低的种子"
+    assert len(schedule.seed_path_map) == 100 - len(evicted), "被淘汰种子的路径映射应一并删除"
+
+    seed_id = Seed(evicted[0], set()).id
+    assert schedule.load_seed(seed_id).data == evicted[0], "写盘前也应能读回被淘汰的种子"
+    schedule.store.close()
+    assert (tmp_path / "corpus/store/default.data").exists()
+
+    reopened = PathPowerSchedule()
+    assert len(reopened.store) == EVICT_BATCH + 1
+    assert reopened.load_seed(seed_id).data == evicted[0]
+    assert {seed.data for seed in reopened.top_seeds(5)} <= set(evicted)
+
+
+def test_seed_aware_schedule_forgets_evicted(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    schedule = SeedAwarePowerSchedule()
+    population = Population(Seed(f"s{i}", set()) for i in range(MAX_SEEDS))
+    schedule.choose(population)
+    for seed in population:
+        schedule.update_seed_metadata(seed.id, 1.0)
+        schedule.mark_hang(seed)
+    population.add(Seed("extra", set()))
+    schedule.choose(population)
+    assert len(population) == MAX_SEEDS - EVICT_BATCH
+    assert all(population.by_id(seed_id) is not None for seed_id in schedule.seed_metadata), \
+        "被淘汰种子的元信息应一并删除"
+    assert len(schedule.hang_seeds) < MAX_SEEDS
+    assert all(population.by_id(seed_id) is not None for seed_id in schedule.hang_seeds), \
+        "被淘汰种子的 hang 标记应一并删除"
+    schedule.mark_hang(Seed("not a seed", set()))
+    assert Seed("not a seed", set()).id not in schedule.hang_seeds, "不在种子集合中的输入不记录 hang"
+    schedule.store.close()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,54 @@
+import pytest
+from utils.SeedStore import INDEX_RECORD, SeedStore
+
+
+def test_seed_store_roundtrip(tmp_path):
+    store = SeedStore("sample1", str(tmp_path))
+    store.put(1, "héllo", 3.0)
+    store.put(2, b"\x00\xff", 7.0)
+    store.put(3, ["not", "text"], 1.0)
+    assert store.load(1) == "héllo", "写盘前应从内存读取"
+    store.flush()
+    store.close()
+
+    reopened = SeedStore("sample1", str(tmp_path))
+    assert reopened.load(1) == "héllo"
+    assert reopened.load(2) == b"\x00\xff"
+    assert reopened.load(3) == ["not", "text"]
+    assert isinstance(reopened.view(2), memoryview)
+    assert reopened.top(2) == [2, 1]
+    assert len(SeedStore("sample2", str(tmp_path))) == 0, "不同目标的存储应互相隔离"
+
+
+def test_seed_store_ignores_torn_writes(tmp_path):
+    store = SeedStore("t", str(tmp_path))
+    store.put(1, "abc", 1.0)
+    store.close()
+    with open(store.index_path, "ab") as f:
+        # 指向数据日志之外的记录与不完整的记录
+        f.write(INDEX_RECORD.pack(2, 3, 10, 1, 1.0) + b"\x01\x02")
+    reopened = SeedStore("t", str(tmp_path))
+    assert 2 not in reopened and reopened.load(1) == "abc"
+    reopened.put(4, "d", 1.0)
+    reopened.close()
+    assert SeedStore("t", str(tmp_path)).load(4) == "d", "截断不完整记录后追加的索引应保持对齐"
+
+
+
+def test_seed_store_uses_absolute_paths(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    store = SeedStore("rel", "store")
+    (tmp_path / "elsewhere").mkdir()
+    monkeypatch.chdir(tmp_path / "elsewhere")
+    store.put(1, "abc", 1.0)
+    store.flush()
+    store.close()
+    assert (tmp_path / "store" / "rel.data").exists(), "工作目录改变后仍应写入创建时的目录"
+    store.put(2, "d", 1.0)
+    store.flush()
+    assert list(store._pending) == [3], "后台线程写完的记录不再保留内存副本"
+    store.close()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
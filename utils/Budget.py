@@ -0,0 +1,40 @@
+import time
+from typing import Optional
+
+
+class BudgetExceeded(BaseException):
+    """执行超出预算时由覆盖率追踪函数抛出。
+
+    继承自 BaseException，避免被目标程序中的 `except Exception` 吞掉。
+    """
+
+
+class ExecutionBudget:
+    """单次执行的预算：行事件数上限和/或墙钟时间上限（秒）"""
+
+    def __init__(self, max_lines: Optional[int] = None, timeout: Optional[float] = None,
+                 check_interval: int = 1024) -> None:
+        """Constructor.
+        `max_lines` - maximum number of traced line events per exec
+        `timeout` - wall-clock deadline per exec, in seconds
+        `check_interval` - line events between two wall-clock checks
+        """
+        self.max_lines = max_lines
+        self.timeout = timeout
+        self.check_interval = check_interval
+        self.lines = 0
+        self.deadline: Optional[float] = None
+
+    def start(self) -> None:
+        """开始一次新的执行"""
+        self.lines = 0
+        self.deadline = time.perf_counter() + self.timeout if self.timeout is not None else None
+
+    def tick(self) -> None:
+        """每个行事件调用一次，超出预算时抛出 BudgetExceeded"""
+        self.lines += 1
+        if self.max_lines is not None and self.lines > self.max_lines:
+            raise BudgetExceeded(f"line budget of {self.max_lines} exceeded")
+        if (self.deadline is not None and self.lines % self.check_interval == 0
+                and time.perf_counter() > self.deadline):
+            raise BudgetExceeded(f"timeout of {self.timeout}s exceeded")
@@ -0,0 +1,529 @@
+import dis
+import operator
+import sys
+from types import CodeType, FrameType, TracebackType
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple, Type
+
+from utils.Budget import ExecutionBudget
+from utils.Coverage import MONITORING_AVAILABLE
+from utils.Scope import InstrumentationScope
+
+MAX_COMPARISONS = 256          # 每次追踪最多记录的（去重后）比较数
+MAX_OPCODE_EVENTS = 1 << 20    # 每次追踪最多处理的 opcode 事件数，超出后停止记录
+MAX_WINDOW = 32                # 回溯求值操作数时最多回看的指令数
+MAX_OCCURRENCES = 16           # 每个操作数在输入中最多替换的出现位置数
+MAX_CANDIDATES = 1024          # 每个种子的替换阶段最多产生的候选输入数
+MAX_STAGE_BYTES = 1 << 18      # 替换阶段候选输入的总长度上限，长种子相应地只尝试少量候选
+
+# 一条比较记录：(种类, 被比较的值, 期望的值)
+#   "cmp"        - `==`、`<` 等比较与 `in` 容器元素，两个方向都可以替换
+#   "startswith" - 期望值应出现在被比较字符串的开头
+#   "endswith"   - 期望值应出现在被比较字符串的末尾
+#   "token"      - `in`、find、index、count 查找的子串，期望值应出现在被比较字符串中
+Comparison = Tuple[str, Any, Any]
+
+_SCALARS = (str, bytes, int, float)
+_PREFIX_METHODS = {"startswith", "endswith"}
+_TOKEN_METHODS = {"find", "rfind", "index", "rindex", "count"}
+_CALL_TARGETS = _PREFIX_METHODS | _TOKEN_METHODS
+# 回溯求值时允许调用的无副作用函数与 str/bytes 方法
+_PURE_BUILTINS = {len, ord, chr, int, str, float, abs, bool, min, max}
+_PURE_METHODS = {
+    "lower", "upper", "casefold", "strip", "lstrip", "rstrip", "split", "rsplit",
+    "startswith", "endswith", "find", "rfind", "index", "rindex", "count",
+    "isdigit", "isalpha", "isalnum", "isspace", "isupper", "islower",
+}
+_PURE_TYPES = (str, bytes, int, float, bool, tuple, slice, type(None))
+_CONTAINERS = (str, bytes, bytearray, list, tuple, dict)
+_BINARY_OPS: Dict[str, Callable[[Any, Any], Any]] = {
+    "+": operator.add, "-": operator.sub, "*": operator.mul, "/": operator.truediv,
+    "//": operator.floordiv, "%": operator.mod, "&": operator.and_, "|": operator.or_,
+    "^": operator.xor, "<<": operator.lshift, ">>": operator.rshift,
+}
+_NUMBERS = (int, float, bool)
+_STRINGS = (str, bytes)
+
+
+class _Unsupported(Exception):
+    """操作数无法在不产生副作用的前提下重新求值"""
+
+
+class _Method(NamedTuple):
+    """LOAD_METHOD / LOAD_ATTR(method) 压入的待调用方法"""
+    receiver: Any
+    name: str
+
+
+_NULL = object()  # 调用约定中的 NULL 占位
+
+
+class _Site(NamedTuple):
+    """一条需要记录操作数的指令：种类、所需的栈上值的数量与指令下标"""
+    kind: str
+    needed: int
+    index: int
+
+
+def _effect(instr: dis.Instruction) -> int:
+    """指令的栈效应。CALL 按求值器的语义一次弹出全部参数，PRECALL（3.11）不改变栈"""
+    if instr.opname == "PRECALL":
+        return 0
+    if instr.opname == "CALL":
+        return -(instr.arg + 1)
+    return dis.stack_effect(instr.opcode, instr.arg if instr.opcode >= dis.HAVE_ARGUMENT else None,
+                            jump=False)
+
+
+def _pure(value: Any) -> bool:
+    return type(value) in _PURE_TYPES
+
+
+def _call(func: Any, args: List[Any]) -> Any:
+    if not all(_pure(arg) for arg in args):
+        raise _Unsupported
+    if isinstance(func, _Method):
+        if type(func.receiver) not in _STRINGS or func.name not in _PURE_METHODS:
+            raise _Unsupported
+        return getattr(func.receiver, func.name)(*args)
+    if func in _PURE_BUILTINS:
+        return func(*args)
+    raise _Unsupported
+
+
+def _binary(op: str, left: Any, right: Any) -> Any:
+    if op == "[]":
+        return _subscript(left, right)
+    func = _BINARY_OPS.get(op)
+    if func is None:
+        raise _Unsupported
+    numbers = type(left) in _NUMBERS and type(right) in _NUMBERS
+    if not numbers and not (op in "+*" and type(left) in _STRINGS + _NUMBERS
+                            and type(right) in _STRINGS + _NUMBERS):
+        raise _Unsupported
+    return func(left, right)
+
+
+def _subscript(container: Any, key: Any) -> Any:
+    if type(container) not in _CONTAINERS or not _pure(key):
+        raise _Unsupported
+    return container[key]
+
+
+def _attribute(obj: Any, name: str) -> Any:
+    """只读取实例字典中的普通属性，不触发 property 等描述符"""
+    try:
+        namespace = object.__getattribute__(obj, "__dict__")
+    except AttributeError:
+        raise _Unsupported from None
+    if name not in namespace or hasattr(type(obj), name):
+        raise _Unsupported
+    return namespace[name]
+
+
+def _pop_n(stack: List[Any], n: int) -> List[Any]:
+    if len(stack) < n:
+        raise _Unsupported
+    items = stack[len(stack) - n:]
+    del stack[len(stack) - n:]
+    return items
+
+
+def _evaluate(window: List[dis.Instruction], frame: FrameType) -> List[Any]:
+    """在空栈上重新执行一段无副作用的指令，返回其压入的值。
+    Python 的值栈对追踪函数不可见，操作数只能由产生它们的指令重新求值得到"""
+    try:
+        return _run(window, frame)
+    except IndexError:
+        # 弹出了窗口之外的值：窗口太短
+        raise _Unsupported from None
+
+
+def _run(window: List[dis.Instruction], frame: FrameType) -> List[Any]:
+    stack: List[Any] = []
+    pop = stack.pop
+    local_names: Optional[Dict[str, Any]] = None
+    for instr in window:
+        name = instr.opname
+        if name in ("RESUME", "NOP", "PRECALL", "CACHE", "EXTENDED_ARG", "NOT_TAKEN"):
+            continue
+        if name.startswith("LOAD_FAST") and name != "LOAD_FAST_AND_CLEAR" or name == "LOAD_DEREF":
+            if local_names is None:
+                local_names = frame.f_locals
+            names = instr.argval if isinstance(instr.argval, tuple) else (instr.argval,)
+            for local in names:
+                if local not in local_names:
+                    raise _Unsupported
+                stack.append(local_names[local])
+        elif name in ("LOAD_CONST", "LOAD_SMALL_INT"):
+            stack.append(instr.argval)
+        elif name == "LOAD_GLOBAL":
+            if instr.arg & 1:
+                stack.append(_NULL)
+            namespace = frame.f_globals
+            if instr.argval in namespace:
+                stack.append(namespace[instr.argval])
+            elif instr.argval in frame.f_builtins:
+                stack.append(frame.f_builtins[instr.argval])
+            else:
+                raise _Unsupported
+        elif name == "PUSH_NULL":
+            stack.append(_NULL)
+        elif name == "LOAD_METHOD" or name == "LOAD_ATTR" and instr.arg & 1 and sys.version_info >= (3, 12):
+            receiver = pop()
+            stack += [_Method(receiver, instr.argval), receiver]
+        elif name == "LOAD_ATTR":
+            stack.append(_attribute(pop(), instr.argval))
+        elif name == "BINARY_SUBSCR":
+            key = pop()
+            stack.append(_subscript(pop(), key))
+        elif name == "BINARY_SLICE":
+            end, start = pop(), pop()
+            stack.append(_subscript(pop(), slice(start, end)))
+        elif name in ("BUILD_SLICE", "BUILD_TUPLE"):
+            items = _pop_n(stack, instr.arg)
+            stack.append(slice(*items) if name == "BUILD_SLICE" else tuple(items))
+        elif name == "BINARY_OP":
+            right = pop()
+            stack.append(_binary(instr.argrepr, pop(), right))
+        elif name == "UNARY_NEGATIVE":
+            value = pop()
+            if type(value) not in _NUMBERS:
+                raise _Unsupported
+            stack.append(-value)
+        elif name == "CALL":
+            args = _pop_n(stack, instr.arg)
+            first, second = pop(), pop()
+            func = next((item for item in (first, second) if isinstance(item, _Method)), None)
+            if func is None:
+                func = second if first is _NULL else first
+            stack.append(_call(func, args))
+        else:
+            raise _Unsupported
+    return stack
+
+
+def _operands(instrs: List[dis.Instruction], site: _Site, frame: FrameType) -> Optional[List[Any]]:
+    """求值 `site` 指令执行前栈顶的 `site.needed` 个值，无法求值时返回 None。
+    从指令向前回看，净栈效应恰好为所需数量的每个起点都尝试一次"""
+    depth = 0
+    index = site.index
+    start_limit = max(site.index - MAX_WINDOW, 0)
+    while index > start_limit:
+        index -= 1
+        instr = instrs[index]
+        if instr.opcode in dis.hasjrel or instr.opcode in dis.hasjabs:
+            return None
+        depth += _effect(instr)
+        if depth == site.needed:
+            try:
+                values = _evaluate(instrs[index:site.index], frame)
+            except _Unsupported:
+                values = None
+            except Exception:
+                return None
+            if values is not None and len(values) == site.needed:
+                return values
+        if instr.is_jump_target:
+            # 跳转目标之前的指令不一定在本次执行中先于 site 执行
+            return None
+    return None
+
+
+def _sites(code: CodeType) -> Tuple[List[dis.Instruction], Dict[int, _Site]]:
+    """code 的指令列表，以及需要记录操作数的指令 {字节偏移: _Site}"""
+    instrs = list(dis.get_instructions(code))
+    sites: Dict[int, _Site] = {}
+    for index, instr in enumerate(instrs):
+        if instr.opname == "COMPARE_OP":
+            sites[instr.offset] = _Site("cmp", 2, index)
+        elif instr.opname == "CONTAINS_OP":
+            sites[instr.offset] = _Site("in", 2, index)
+        elif instr.opname == "CALL" and any(
+                prev.opname in ("LOAD_METHOD", "LOAD_ATTR") and prev.argval in _CALL_TARGETS
+                for prev in instrs[max(index - MAX_WINDOW, 0):index]):
+            sites[instr.offset] = _Site("call", instr.arg + 2, index)
+    return instrs, sites
+
+
+class CmpLog:
+    """CmpLog 风格的比较追踪（settrace 实现，3.12+ 请使用 `cmplog_backend()`）。
+
+    通过 `frame.f_trace_opcodes` 在插桩范围内的栈帧中接收 opcode 事件，
+    在 COMPARE_OP、CONTAINS_OP 以及 str/bytes 的 startswith、endswith、find、index、count
+    调用处重新求值两个操作数并记录下来。追踪开销远大于覆盖率追踪，
+    只对新种子执行一次，用于输入到状态（input-to-state）的替换阶段。
+    """
+
+    def __init__(self, scope: Optional[InstrumentationScope] = None,
+                 budget: Optional[ExecutionBudget] = None) -> None:
+        """Constructor.
+        `scope` - only frames of in-scope code objects are traced
+        `budget` - per-exec budget, ticked on every line event
+        """
+        self.scope = scope
+        self.budget = budget
+        # 按记录顺序去重的比较
+        self.comparisons: Dict[Comparison, None] = {}
+        self.events = 0
+        self._sites: Dict[CodeType, Tuple[List[dis.Instruction], Dict[int, _Site]]] = {}
+
+    def __enter__(self) -> "CmpLog":
+        if self.budget is not None:
+            self.budget.start()
+        self.original_trace_function = sys.gettrace()
+        sys.settrace(self.traceit)
+        return self
+
+    def __exit__(self, exc_type: Type, exc_value: BaseException,
+                 tb: TracebackType) -> Optional[bool]:
+        sys.settrace(self.original_trace_function)
+        return None
+
+    def _full(self) -> bool:
+        return self.events > MAX_OPCODE_EVENTS or len(self.comparisons) >= MAX_COMPARISONS
+
+    def traceit(self, frame: FrameType, event: str, arg: Any) -> Optional[Callable]:
+        if event == "opcode":
+            self.events += 1
+            if self._full():
+                frame.f_trace_opcodes = False
+                return None
+            code = frame.f_code
+            instrs, sites = self._sites[code]
+            site = sites.get(frame.f_lasti)
+            if site is not None:
+                values = _operands(instrs, site, frame)
+                if values is not None:
+                    try:
+                        self._record(site.kind, values)
+                    except Exception:
+                        pass  # 操作数类型不匹配，实际的比较会自行报错
+        elif event == "line":
+            if self.budget is not None:
+                self.budget.tick()
+            # 3.12+ 在 call 事件中开启时，code 第一次执行的栈帧收不到 opcode 事件
+            frame.f_trace_opcodes = True
+        elif event == "call":
+            code = frame.f_code
+            if code in _UNTRACED or self._full():
+                return None
+            if self.scope is not None and code not in self.scope:
+                return None
+            if code not in self._sites:
+                self._sites[code] = _sites(code)
+            frame.f_trace_opcodes = True
+        return self.traceit
+
+    def _add(self, kind: str, value: Any, wanted: Any) -> None:
+        if type(value) in _SCALARS and type(wanted) in _SCALARS and value != wanted:
+            self.comparisons[(kind, value, wanted)] = None
+
+    def _record(self, kind: str, values: List[Any]) -> None:
+        if kind == "cmp":
+            self._add("cmp", values[0], values[1])
+        elif kind == "in":
+            needle, haystack = values
+            if type(haystack) in _STRINGS:
+                if needle not in haystack:
+                    self._add("token", haystack, needle)
+            elif type(haystack) in (tuple, list, set, frozenset, dict) and len(haystack) <= MAX_OCCURRENCES:
+                for item in haystack:
+                    self._add("cmp", needle, item)
+        else:
+            func, args = values[0], values[2:]
+            if not isinstance(func, _Method):
+                func = values[1]
+            if not isinstance(func, _Method) or type(func.receiver) not in _STRINGS or not args:
+                return
+            receiver, wanted = func.receiver, args[0]
+            if func.name in _PREFIX_METHODS:
+                for item in wanted if type(wanted) is tuple else (wanted,):
+                    if not getattr(receiver, func.name)(item):
+                        self._add(func.name, receiver, item)
+            elif func.name in _TOKEN_METHODS and type(wanted) is type(receiver) and wanted not in receiver:
+                self._add("token", receiver, wanted)
+
+
+class MonitoringCmpLog(CmpLog):
+    """基于 sys.monitoring (PEP 669) 的比较追踪，Python 3.12+。
+
+    3.12 起 settrace 的 opcode 事件不可靠（3.12.1 中完全收不到），改为对插桩范围内的
+    code object 开启局部 INSTRUCTION 事件：不需要记录的指令第一次命中后返回 DISABLE，
+    之后只有比较与查找调用处会产生回调。
+    """
+
+    TOOL_ID = 4  # 未被预留给调试器、覆盖率与性能分析工具的 id
+
+    def __init__(self, scope: Optional[InstrumentationScope] = None,
+                 budget: Optional[ExecutionBudget] = None) -> None:
+        super().__init__(scope, budget)
+        if not MONITORING_AVAILABLE:
+            raise RuntimeError("sys.monitoring requires Python 3.12+")
+        # 本次追踪中开启了局部事件的 code object
+        self._local: List[CodeType] = []
+
+    def __enter__(self) -> "MonitoringCmpLog":
+        if self.budget is not None:
+            self.budget.start()
+        monitoring = sys.monitoring
+        events = monitoring.events
+        monitoring.use_tool_id(self.TOOL_ID, "fuzzer-cmplog")
+        monitoring.register_callback(self.TOOL_ID, events.PY_START, self._on_start)
+        monitoring.register_callback(self.TOOL_ID, events.INSTRUCTION, self._on_instruction)
+        monitoring.register_callback(self.TOOL_ID, events.LINE, self._on_line)
+        monitoring.set_events(self.TOOL_ID, events.PY_START)
+        return self
+
+    def __exit__(self, exc_type: Type, exc_value: BaseException,
+                 tb: TracebackType) -> Optional[bool]:
+        monitoring = sys.monitoring
+        events = monitoring.events
+        monitoring.set_events(self.TOOL_ID, 0)
+        for code in self._local:
+            monitoring.set_local_events(self.TOOL_ID, code, 0)
+        for event in (events.PY_START, events.INSTRUCTION, events.LINE):
+            monitoring.register_callback(self.TOOL_ID, event, None)
+        monitoring.free_tool_id(self.TOOL_ID)
+        return None
+
+    def _on_start(self, code: CodeType, offset: int) -> Any:
+        if code in self._sites or code in _UNTRACED or self._full():
+            return None
+        if self.scope is not None and code not in self.scope:
+            return None
+        self._sites[code] = _sites(code)
+        self._local.append(code)
+        events = sys.monitoring.events
+        local_events = events.INSTRUCTION | (events.LINE if self.budget is not None else 0)
+        sys.monitoring.set_local_events(self.TOOL_ID, code, local_events)
+        return None
+
+    def _on_instruction(self, code: CodeType, offset: int) -> Any:
+        instrs, sites = self._sites[code]
+        site = sites.get(offset)
+        if site is None:
+            return sys.monitoring.DISABLE
+        self.events += 1
+        if self._full():
+            return None
+        values = _operands(instrs, site, sys._getframe(1))
+        if values is not None:
+            try:
+                self._record(site.kind, values)
+            except Exception:
+                pass  # 操作数类型不匹配，实际的比较会自行报错
+        return None
+
+    def _on_line(self, code: CodeType, lineno: int) -> Any:
+        self.budget.tick()
+        return None
+
+
+def cmplog_backend() -> Type[CmpLog]:
+    """比较追踪的实现：sys.monitoring 可用时使用 MonitoringCmpLog，否则使用 settrace"""
+    return MonitoringCmpLog if MONITORING_AVAILABLE else CmpLog
+
+
+_UNTRACED = frozenset(
+    method.__code__
+    for cls in (CmpLog, MonitoringCmpLog)
+    for method in (cls.__enter__, cls.__exit__)
+)
+
+
+def _as_input(value: Any, like: Any) -> Optional[Any]:
+    """把操作数转换为与输入相同的类型（str 或 bytes），数字使用其文本形式"""
+    if type(value) in (int, float):
+        value = repr(value)
+    if isinstance(like, str):
+        if isinstance(value, bytes):
+            return value.decode("utf-8", "surrogateescape")
+        return value
+    if isinstance(value, str):
+        return value.encode("utf-8", "surrogateescape")
+    return value
+
+
+def _occurrences(data: Any, part: Any) -> Iterator[int]:
+    """`part` 在 `data` 中的前 MAX_OCCURRENCES 个出现位置"""
+    pos = data.find(part)
+    for _ in range(MAX_OCCURRENCES):
+        if pos < 0:
+            return
+        yield pos
+        pos = data.find(part, pos + 1)
+
+
+class InputToStateStage:
+    """输入到状态（input-to-state）替换阶段，与 DeterministicStage 使用相同的接口。
+
+    对种子执行一次比较追踪，被比较的值若原样出现在种子中，就把它替换为期望的值，
+    例如 sample3 的 `s[index + 1] == 'A'` 记录为 ('x', 'A') 时把输入中的 'x' 替换为 'A'；
+    startswith/endswith 在被比较的子串首尾写入期望的前缀/后缀，查找失败的子串则插入进去。
+    数值比较的两端以文本形式替换，并同时尝试期望值 ±1。
+    """
+
+    def __init__(self, seed: Any, comparisons: List[Comparison]) -> None:
+        """`seed` - the Seed to mutate
+        `comparisons` - comparisons recorded while running the seed
+        """
+        self.seed = seed
+        self.comparisons = comparisons
+        self.candidates: Iterator[Tuple[Any, Optional[int]]] = self._generate()
+
+    @property
+    def tokens(self) -> List[Any]:
+        """比较中出现的期望子串（startswith/endswith/查找的参数），可加入变异字典"""
+        return [wanted for kind, _, wanted in self.comparisons
+                if kind != "cmp" and type(wanted) in _STRINGS]
+
+    def feedback(self, tag: Optional[int], path: Any) -> None:
+        """替换阶段不需要执行反馈"""
+
+    def _generate(self) -> Iterator[Tuple[Any, Optional[int]]]:
+        data = self.seed.data
+        limit = max(min(MAX_CANDIDATES, MAX_STAGE_BYTES // max(len(data), 1)), 8)
+        seen = {data}
+        for candidate in self._replacements(data):
+            if candidate not in seen:
+                seen.add(candidate)
+                yield candidate, None
+                if len(seen) > limit:
+                    return
+
+    def _replacements(self, data: Any) -> Iterator[Any]:
+        # 字符串比较优先，数值比较（多为下标、长度）的文本形式在输入中常有偶然的出现
+        comparisons = sorted(self.comparisons, key=lambda c: type(c[1]) not in _STRINGS)
+        for kind, value, wanted in comparisons:
+            if kind == "cmp":
+                pairs = [(value, wanted), (wanted, value)]
+                for number in (value, wanted):
+                    if type(number) is int:
+                        other = wanted if number is value else value
+                        pairs += [(other, number - 1), (other, number + 1)]
+                for old, new in pairs:
+                    old, new = _as_input(old, data), _as_input(new, data)
+                    if not old:
+                        continue
+                    for pos in _occurrences(data, old):
+                        yield data[:pos] + new + data[pos + len(old):]
+                continue
+
+            receiver, wanted = _as_input(value, data), _as_input(wanted, data)
+            if not receiver:
+                # 被比较的是空串（通常是输入末尾的切片），在输入末尾追加
+                yield data + wanted
+                continue
+            for pos in _occurrences(data, receiver):
+                end = pos + len(receiver)
+                if kind == "startswith":
+                    yield data[:pos] + wanted + data[pos + min(len(wanted), len(receiver)):]
+                    yield data[:pos] + wanted + data[pos:]
+                elif kind == "endswith":
+                    yield data[:end - min(len(wanted), len(receiver))] + wanted + data[end:]
+                    yield data[:end] + wanted + data[end:]
+                else:
+                    step = max(len(receiver) // MAX_OCCURRENCES, 1)
+                    for at in range(pos, end + 1, step):
+                        yield data[:at] + wanted + data[at:]
+                    break
@@ -0,0 +1,145 @@
+import hashlib
+import inspect
+import multiprocessing
+import os
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from utils.Budget import ExecutionBudget
+from utils.Coverage import Coverage, Location
+from utils.CoverageMap import CoverageMap, StableLocation
+from utils.ObjectUtils import dump_object, get_md5_of_object, load_object
+from utils.Scope import InstrumentationScope
+
+CACHE_VERSION = 2  # 缓存内容的格式版本，格式改变后旧缓存自动失效
+
+# worker 进程内复用的覆盖率对象，由 _init_worker 创建
+_worker_function: Optional[Callable] = None
+_worker_coverage: Optional[Coverage] = None
+
+
+def _init_worker(function: Callable, scope: Optional[InstrumentationScope],
+                 budget: Optional[ExecutionBudget]) -> None:
+    global _worker_function, _worker_coverage
+    _worker_function = function
+    _worker_coverage = Coverage(coverage_map=CoverageMap(), budget=budget, scope=scope)
+
+
+def _input_coverage(inp: Any) -> frozenset:
+    """在当前进程中执行一个输入，返回其覆盖的位置（StableLocation）。
+    位图的 id 只在本进程内有效，因此转换为与进程无关、且区分同名函数的位置标识"""
+    cov = _worker_coverage
+    cov._map.clear()
+    with cov:
+        try:
+            _worker_function(inp)
+        except BaseException:
+            # 包括 BudgetExceeded：超时的输入同样只记录已执行到的覆盖
+            pass
+    return cov._map.stable_locations()
+
+
+def _chunk_coverage(chunk: List[Tuple[int, Any]]) -> List[Tuple[int, frozenset]]:
+    return [(index, _input_coverage(inp)) for index, inp in chunk]
+
+
+class CorpusCoverage:
+    """语料库覆盖率分析。
+
+    输入按块分发到进程池中执行，每个 worker 复用同一个位图覆盖率对象；
+    每个输入的覆盖按内容哈希缓存在磁盘上，再次分析时只执行新的或改变过的输入。
+    累计覆盖曲线按输入顺序，用位置位掩码的按位或增量计算。
+    """
+
+    def __init__(self, function: Callable, cache_dir: Optional[str] = None,
+                 workers: int = 0, scope: Optional[InstrumentationScope] = None,
+                 budget: Optional[ExecutionBudget] = None, chunk_size: int = 16) -> None:
+        """Constructor.
+        `function` - the function under test
+        `cache_dir` - directory of the on-disk cache; None disables caching
+        `workers` - number of worker processes, defaults to the number of cores
+        `scope` / `budget` - instrumentation scope and per-input budget
+        `chunk_size` - inputs sent to a worker at a time
+        """
+        self.function = function
+        self.workers = workers or os.cpu_count() or 1
+        self.scope = scope
+        self.budget = budget
+        self.chunk_size = chunk_size
+        self.cache_path = None
+        if cache_dir is not None:
+            # 缓存按目标函数及其源文件内容隔离，目标代码修改后旧缓存自动失效
+            self.cache_path = os.path.join(cache_dir, f"{self._target_key()}-v{CACHE_VERSION}.pkl")
+        # {输入的内容哈希: 覆盖的位置}
+        self.cache: Dict[str, frozenset] = {}
+        if self.cache_path is not None and os.path.exists(self.cache_path):
+            self.cache = load_object(self.cache_path)
+        self.executed = 0  # 上一次 analyze 实际执行的输入数
+
+    def _target_key(self) -> str:
+        name = f"{self.function.__module__}.{self.function.__qualname__}"
+        try:
+            with open(inspect.getsourcefile(self.function), "rb") as f:
+                digest = hashlib.md5(f.read()).hexdigest()[:8]
+        except (OSError, TypeError):
+            digest = "nosource"
+        return f"{name}-{digest}"
+
+    def _execute(self, pending: List[Tuple[int, Any]]) -> List[Tuple[int, frozenset]]:
+        if self.workers <= 1 or len(pending) <= self.chunk_size:
+            # 输入较少时进程池的启动开销得不偿失，直接在本进程中执行
+            _init_worker(self.function, self.scope, self.budget)
+            return _chunk_coverage(pending)
+        chunks = [pending[i:i + self.chunk_size] for i in range(0, len(pending), self.chunk_size)]
+        with multiprocessing.Pool(self.workers, initializer=_init_worker,
+                                  initargs=(self.function, self.scope, self.budget)) as pool:
+            results: List[Tuple[int, frozenset]] = []
+            for chunk_result in pool.imap_unordered(_chunk_coverage, chunks):
+                results.extend(chunk_result)
+        return results
+
+    def analyze(self, population: List[Any]) -> Tuple[Set[Location], List[int]]:
+        """Return the coverage of `population` and the cumulative coverage curve
+        (number of covered locations after each input, in input order).
+        Locations are merged by (filename, firstlineno, function_name, lineno); the
+        returned set is in the (function_name, lineno) form of `population_coverage`."""
+        keys = [get_md5_of_object(inp) for inp in population]
+        per_input: List[Optional[frozenset]] = [self.cache.get(key) for key in keys]
+        # 相同内容的输入只执行一次
+        pending: Dict[str, Tuple[int, Any]] = {}
+        for index, (key, inp) in enumerate(zip(keys, population)):
+            if per_input[index] is None and key not in pending:
+                pending[key] = (index, inp)
+
+        self.executed = len(pending)
+        if pending:
+            for index, locations in self._execute(list(pending.values())):
+                self.cache[keys[index]] = locations
+            per_input = [self.cache[key] for key in keys]
+            if self.cache_path is not None:
+                dump_object(self.cache_path, self.cache)
+
+        # 每个位置分配一位，累计覆盖即位掩码的按位或
+        bits: Dict[StableLocation, int] = {}
+        masks: Dict[frozenset, int] = {}
+        cumulative_coverage: List[int] = []
+        covered = 0
+        for locations in per_input:
+            mask = masks.get(locations)
+            if mask is None:
+                mask = 0
+                for location in locations:
+                    bit = bits.get(location)
+                    if bit is None:
+                        bit = bits[location] = len(bits)
+                    mask |= 1 << bit
+                masks[locations] = mask
+            covered |= mask
+            cumulative_coverage.append(bin(covered).count("1"))
+        return {(name, lineno) for _, _, name, lineno in bits}, cumulative_coverage
+
+
+def corpus_coverage(population: List[Any], function: Callable, cache_dir: Optional[str] = None,
+                    workers: int = 0, scope: Optional[InstrumentationScope] = None,
+                    budget: Optional[ExecutionBudget] = None) -> Tuple[Set[Location], List[int]]:
+    """Parallel, cached counterpart of `population_coverage`."""
+    return CorpusCoverage(function, cache_dir, workers, scope, budget).analyze(population)
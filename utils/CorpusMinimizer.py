@@ -0,0 +1,193 @@
+import heapq
+import multiprocessing
+import os
+from collections import Counter
+from types import CodeType
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.Budget import ExecutionBudget
+from utils.Coverage import Coverage
+from utils.CoverageMap import COUNT_CLASS, StableLocation
+from utils.ObjectUtils import dump_object, load_object
+from utils.Population import Population
+from utils.Scope import InstrumentationScope
+from utils.Seed import Seed
+
+# worker 进程内的目标函数与配置，由 _init_worker 设置
+_worker_function: Optional[Callable] = None
+_worker_scope: Optional[InstrumentationScope] = None
+_worker_budget: Optional[ExecutionBudget] = None
+_worker_edges = False
+
+
+def _init_worker(function: Callable, scope: Optional[InstrumentationScope],
+                 budget: Optional[ExecutionBudget], edges: bool) -> None:
+    global _worker_function, _worker_scope, _worker_budget, _worker_edges
+    _worker_function, _worker_scope, _worker_budget, _worker_edges = function, scope, budget, edges
+
+
+class _StableTrace(Coverage):
+    """按执行顺序记录 (code object, lineno) 的覆盖率追踪，用于计算与进程无关的位置"""
+
+    def _record(self, code: CodeType, lineno: int) -> None:
+        if self._budget is not None:
+            self._budget.tick()
+        self._trace.append((code, lineno))
+
+
+def _input_features(inp: Any) -> Tuple[frozenset, int]:
+    """在当前进程中执行一个输入，返回 (覆盖特征, 行事件数)。
+    特征为覆盖的位置 (filename, firstlineno, function_name, lineno)，启用边时另加
+    (前一位置, 位置, 命中次数分桶)；两者都与进程无关，且不会混淆不同模块中的同名函数，
+    可以在多个 worker 之间比较"""
+    cov = _StableTrace(budget=_worker_budget, scope=_worker_scope)
+    with cov:
+        try:
+            _worker_function(inp)
+        except BaseException:
+            # 包括 BudgetExceeded：失败或超时的输入同样只记录已执行到的覆盖
+            pass
+    prefixes: Dict[CodeType, Tuple[str, int, str]] = {}
+    trace: List[StableLocation] = []
+    for code, lineno in cov.trace():
+        prefix = prefixes.get(code)
+        if prefix is None:
+            prefix = prefixes[code] = (code.co_filename, code.co_firstlineno, code.co_name)
+        trace.append((*prefix, lineno))
+    features = set(trace)
+    if _worker_edges:
+        for (prev, cur), count in Counter(zip(trace, trace[1:])).items():
+            features.add((prev, cur, COUNT_CLASS[min(count, 255)]))
+    return frozenset(features), len(trace)
+
+
+def _chunk_features(chunk: List[Tuple[int, Any]]) -> List[Tuple[int, frozenset, int]]:
+    return [(index, *_input_features(inp)) for index, inp in chunk]
+
+
+def _size(inp: Any) -> int:
+    return len(inp) if isinstance(inp, (str, bytes, bytearray)) else len(repr(inp))
+
+
+class CorpusMinimizer:
+    """语料库最小化（AFL 的 cmin）。
+
+    每个输入在进程池中执行一次，得到其覆盖的位置（以及可选的边）；
+    再用贪心集合覆盖选出覆盖全部特征的一个小子集：每一步选择
+    新增特征数 / 代价 最大的输入，代价为 输入长度 × 执行的行事件数，
+    因此在覆盖相同的情况下优先保留短而快的输入；最后删除被其余输入完全覆盖的输入。
+    代价不使用墙钟时间，代价相同时按 (输入长度, 下标) 选择，结果是确定的。
+    """
+
+    def __init__(self, function: Callable, workers: int = 0,
+                 scope: Optional[InstrumentationScope] = None,
+                 budget: Optional[ExecutionBudget] = None, edges: bool = False,
+                 chunk_size: int = 16) -> None:
+        """Constructor.
+        `function` - the function under test
+        `workers` - number of worker processes, defaults to the number of cores
+        `scope` / `budget` - instrumentation scope and per-input budget
+        `edges` - also keep inputs that only add new edges or hit-count buckets
+        `chunk_size` - inputs sent to a worker at a time
+        """
+        self.function = function
+        self.workers = workers or os.cpu_count() or 1
+        self.scope = scope
+        self.budget = budget
+        self.edges = edges
+        self.chunk_size = chunk_size
+        # 上一次 minimize 中各输入的特征数与行事件数，按输入顺序
+        self.features: List[int] = []
+        self.events: List[int] = []
+
+    def _execute(self, pending: List[Tuple[int, Any]]) -> List[Tuple[int, frozenset, int]]:
+        initargs = (self.function, self.scope, self.budget, self.edges)
+        if self.workers <= 1 or len(pending) <= self.chunk_size:
+            # 输入较少时进程池的启动开销得不偿失，直接在本进程中执行
+            _init_worker(*initargs)
+            return _chunk_features(pending)
+        chunks = [pending[i:i + self.chunk_size] for i in range(0, len(pending), self.chunk_size)]
+        with multiprocessing.Pool(self.workers, initializer=_init_worker, initargs=initargs) as pool:
+            results: List[Tuple[int, frozenset, int]] = []
+            for chunk_result in pool.imap_unordered(_chunk_features, chunks):
+                results.extend(chunk_result)
+        return results
+
+    def select(self, inputs: List[Any]) -> List[int]:
+        """返回覆盖 `inputs` 全部特征的输入下标（升序），内容相同的输入只执行与保留一次"""
+        first: Dict[Any, int] = {}
+        for index, inp in enumerate(inputs):
+            first.setdefault(inp, index)
+        results = self._execute([(index, inputs[index]) for index in first.values()])
+
+        self.features = [0] * len(inputs)
+        self.events = [0] * len(inputs)
+        # 每个特征分配一位，输入的特征集合即位掩码
+        bits: Dict[Any, int] = {}
+        masks: Dict[int, int] = {}
+        costs: Dict[int, int] = {}
+        sizes: Dict[int, int] = {}
+        for index, features, events in results:
+            mask = 0
+            for feature in features:
+                bit = bits.get(feature)
+                if bit is None:
+                    bit = bits[feature] = len(bits)
+                mask |= 1 << bit
+            masks[index] = mask
+            sizes[index] = _size(inputs[index])
+            costs[index] = (sizes[index] + 1) * max(events, 1)
+            self.features[index] = len(features)
+            self.events[index] = events
+
+        # 惰性贪心：新增特征数只会随已覆盖集合增大而减少，堆顶的旧估计重新计算后仍最大即可选择
+        # 分数相同时按 (输入长度, 下标) 选择
+        heap = [(-bin(mask).count("1") / costs[index], sizes[index], index)
+                for index, mask in masks.items() if mask]
+        heapq.heapify(heap)
+        covered = 0
+        selected: List[int] = []
+        while heap:
+            _, _, index = heapq.heappop(heap)
+            gain = bin(masks[index] & ~covered).count("1")
+            if not gain:
+                continue
+            score = -gain / costs[index]
+            if heap and (score, sizes[index], index) > heap[0]:
+                heapq.heappush(heap, (score, sizes[index], index))
+                continue
+            covered |= masks[index]
+            selected.append(index)
+
+        # 先选中的便宜输入可能被之后选中的输入完全覆盖：从代价最大的开始删除冗余的输入
+        for index in sorted(selected, key=lambda i: (-costs[i], -sizes[i], -i)):
+            others = 0
+            for other in selected:
+                if other != index:
+                    others |= masks[other]
+            if not masks[index] & ~others:
+                selected.remove(index)
+        return sorted(selected)
+
+    def minimize(self, inputs: List[Any]) -> List[Any]:
+        """返回 `inputs` 的最小化子集，保持原有顺序"""
+        return [inputs[index] for index in self.select(inputs)]
+
+    def minimize_file(self, path: str, out_path: Optional[str] = None) -> List[Any]:
+        """最小化 `load_object` 格式的语料库文件，结果以相同格式写入 `out_path`（默认覆盖原文件）"""
+        corpus = self.minimize(list(load_object(path)))
+        dump_object(out_path or path, corpus)
+        return corpus
+
+    def minimize_population(self, population: Population, schedule: Any = None) -> List[Seed]:
+        """在两个阶段之间最小化正在使用的种子集合，返回被移除的种子。
+        提供 `schedule` 时由调度器移除种子并清理其调度信息"""
+        seeds = list(population)
+        keep = set(self.select([seed.data for seed in seeds]))
+        removed = [seed for index, seed in enumerate(seeds) if index not in keep]
+        if schedule is not None:
+            schedule.remove(population, removed)
+        else:
+            for seed in removed:
+                population.remove(seed)
+        return removed
@@ -4,9 +4,22 @@ from types import FrameType, TracebackType
 
 import sys
 import inspect
+import threading
+
+from utils.Budget import ExecutionBudget
+from utils.CoverageMap import REGISTRY, CoverageMap, EdgeMap
+from utils.CoverageReport import CoverageReport
+from utils.Scope import InstrumentationScope
+
+# 热路径上直接查表，省去一次方法调用
+_BASES = REGISTRY._bases
+_get_ident = threading.get_ident
 
 Location = Tuple[str, int]
 
+# sys.monitoring (PEP 669) 仅在 Python 3.12+ 可用，低版本自动回退到 settrace
+MONITORING_AVAILABLE = hasattr(sys, "monitoring")
+
 
 def import_all_functions_from_module(module_name):
     module = importlib.import_module(module_name)
@@ -19,9 +32,38 @@ import_all_functions_from_module("samples.Samples")
 
 class Coverage:
 
-    def __init__(self) -> None:
-        """Constructor"""
+    def __init__(self, coverage_map: Optional[CoverageMap] = None,
+                 edge_map: Optional[EdgeMap] = None,
+                 budget: Optional[ExecutionBudget] = None,
+                 scope: Optional[InstrumentationScope] = None) -> None:
+        """Constructor.
+        `coverage_map` - 若提供，执行的位置以整数 id 记录进该位图，而不是追加到 trace 列表
+        `edge_map` - 若提供，同时记录相邻位置之间的跳转及其命中次数
+        `budget` - 若提供，每个行事件计入预算，超出时抛出 BudgetExceeded 中止执行
+        `scope` - 若提供，只追踪范围内的 code object，范围外的栈帧不安装局部追踪函数
+        """
         self._trace: List[Location] = []
+        self._map = coverage_map
+        self._edges = edge_map
+        self._budget = budget
+        self._scope = scope
+        self._scope_cache = scope.cache if scope is not None else None
+        # 只记录行覆盖时，热路径直接写位图
+        self._fast = None
+        if coverage_map is not None and edge_map is None and budget is None:
+            self._fast = coverage_map.bits
+
+    def _record(self, code: Any, lineno: int) -> None:
+        if self._budget is not None:
+            self._budget.tick()
+        if self._map is None and self._edges is None:
+            self._trace.append((code.co_name, lineno))
+            return
+        idx = REGISTRY.base(code) + lineno
+        if self._map is not None:
+            self._map.hit(idx)
+        if self._edges is not None:
+            self._edges.hit(idx)
 
     # Trace function
     def traceit(self, frame: FrameType, event: str, arg: Any) -> Optional[Callable]:
@@ -30,17 +72,36 @@ class Coverage:
             self.original_trace_function(frame, event, arg)
 
         if event == "line":
-            function_name = frame.f_code.co_name
-            lineno = frame.f_lineno
-            if function_name != '__exit__':  # avoid tracing ourselves:
-                self._trace.append((function_name, lineno))
+            code = frame.f_code
+            base = _BASES.get(code)
+            if base is None or self._fast is None:
+                self._record(code, frame.f_lineno)
+            else:
+                try:
+                    self._fast[base + frame.f_lineno] = 1
+                except IndexError:
+                    self._record(code, frame.f_lineno)
+        elif event == "call":
+            code = frame.f_code
+            if code in _UNTRACED:
+                return None  # avoid tracing ourselves
+            if self._scope_cache is not None:
+                in_scope = self._scope_cache.get(code)
+                if in_scope is None:
+                    in_scope = code in self._scope
+                if not in_scope:
+                    return None  # 范围外的代码全速运行
 
-        return self.traceit
+        return self._tracer
 
     def __enter__(self) -> Any:
         """Start of `with` block. Turn on tracing."""
+        if self._budget is not None:
+            self._budget.start()
         self.original_trace_function = sys.gettrace()
-        sys.settrace(self.traceit)
+        # 绑定一次，批量执行时反复安装同一个追踪函数
+        self._tracer = self.traceit
+        sys.settrace(self._tracer)
         return self
 
     def __exit__(self, exc_type: Type, exc_value: BaseException,
@@ -49,8 +110,20 @@ class Coverage:
         sys.settrace(self.original_trace_function)
         return None  # default: pass all exceptions
 
+    def resume(self) -> None:
+        """Resume tracing for the next input of a batch"""
+        if self._budget is not None:
+            self._budget.start()
+        sys.settrace(self._tracer)
+
+    def pause(self) -> None:
+        """Pause tracing between two inputs of a batch"""
+        sys.settrace(self.original_trace_function)
+
     def trace(self) -> List[Location]:
         """The list of executed lines, as (function_name, line_number) pairs"""
+        if self._map is not None:
+            return [REGISTRY.location(idx) for idx in self._map.ids()]
         return self._trace
 
     def coverage(self) -> Set[Location]:
@@ -64,7 +137,13 @@ class Coverage:
     def __repr__(self) -> str:
         """Return a string representation of this object.
            Show covered (and uncovered) program code"""
+        if self._map is not None:
+            # 位图记录了 code object，可以直接按文件生成报告
+            report = CoverageReport.from_map(self._map)
+            return "".join(file_cov.annotate() for file_cov in report.files.values())
+
         t = ""
+        trace = set(self.trace())
         for function_name in self.function_names():
             # Similar code as in the example above
             try:
@@ -75,7 +154,7 @@ class Coverage:
 
             source_lines, start_line_number = inspect.getsourcelines(fun)
             for lineno in range(start_line_number, start_line_number + len(source_lines)):
-                if (function_name, lineno) not in self.trace():
+                if (function_name, lineno) not in trace:
                     t += "# "
                 else:
                     t += "  "
@@ -85,18 +164,115 @@ class Coverage:
         return t
 
 
-def population_coverage(population: List[str], function: Callable) \
-        -> Tuple[Set[Location], List[int]]:
-    cumulative_coverage: List[int] = []
-    all_coverage: Set[Location] = set()
+class MonitoringCoverage(Coverage):
+    """基于 sys.monitoring (PEP 669) 的覆盖率后端。
 
-    for s in population:
-        with Coverage() as cov:
-            try:
-                function(s)
-            except:
-                pass
-        all_coverage |= cov.coverage()
-        cumulative_coverage.append(len(all_coverage))
+    LINE 事件在某个位置第一次命中后返回 DISABLE，该位置随后不再产生回调，
+    热循环只在第一次迭代时付出追踪开销（记录边覆盖或设置执行预算时 LINE 事件不会被禁用）。
+    边覆盖与 settrace 后端一样由相邻的行事件得到，不注册 BRANCH 事件。
+    sys.monitoring 的回调对整个进程生效，只记录进入 `with` 的线程（例如不记录遥测线程）。
+    `sticky` 为 False 时（默认）在 `__exit__` 中调用 restart_events，每次执行的覆盖率完整；
+    为 True 时已知位置在整个进程内保持禁用，coverage() 只包含本次执行新发现的位置。
+    """
+
+    TOOL_ID = sys.monitoring.COVERAGE_ID if MONITORING_AVAILABLE else 1
 
-    return all_coverage, cumulative_coverage
+    def __init__(self, coverage_map: Optional[CoverageMap] = None,
+                 edge_map: Optional[EdgeMap] = None,
+                 budget: Optional[ExecutionBudget] = None,
+                 scope: Optional[InstrumentationScope] = None, sticky: bool = False) -> None:
+        super().__init__(coverage_map, edge_map, budget, scope)
+        if not MONITORING_AVAILABLE:
+            raise RuntimeError("sys.monitoring requires Python 3.12+")
+        self.sticky = sticky
+
+    def _on_line(self, code, lineno: int) -> Any:
+        # 与 settrace 保持一致：不记录自身、进入 `with` 的调用者帧以及暂停期间的代码
+        if self._thread != _get_ident():
+            # 其他线程执行的代码：不记录，也不禁用（该位置之后仍可能由本线程执行）
+            return None
+        if not self.active or code is self._caller_code or code in _UNTRACED:
+            return sys.monitoring.DISABLE
+        if self._scope is not None and code not in self._scope:
+            return sys.monitoring.DISABLE
+        self._record(code, lineno)
+        # 边覆盖与执行预算需要每一次行事件，不能禁用
+        if self._edges is None and self._budget is None:
+            return sys.monitoring.DISABLE
+        return None
+
+    def __enter__(self) -> Any:
+        """Start of `with` block. Register monitoring callbacks."""
+        if self._budget is not None:
+            self._budget.start()
+        self._caller_code = sys._getframe(1).f_code
+        self._thread = _get_ident()
+        self.active = True
+        monitoring = sys.monitoring
+        events = monitoring.events
+        monitoring.use_tool_id(self.TOOL_ID, "fuzzer-coverage")
+        monitoring.register_callback(self.TOOL_ID, events.LINE, self._on_line)
+        monitoring.set_events(self.TOOL_ID, events.LINE)
+        return self
+
+    def __exit__(self, exc_type: Type, exc_value: BaseException,
+                 tb: TracebackType) -> Optional[bool]:
+        """End of `with` block. Unregister callbacks."""
+        monitoring = sys.monitoring
+        events = monitoring.events
+        monitoring.set_events(self.TOOL_ID, 0)
+        monitoring.register_callback(self.TOOL_ID, events.LINE, None)
+        monitoring.free_tool_id(self.TOOL_ID)
+        if not self.sticky:
+            monitoring.restart_events()
+        return None
+
+    def resume(self) -> None:
+        """Resume recording for the next input of a batch"""
+        if self._budget is not None:
+            self._budget.start()
+        if not self.sticky:
+            # 重新启用上一个输入中被 DISABLE 的位置，保证每个输入的覆盖率完整
+            sys.monitoring.restart_events()
+        self.active = True
+
+    def pause(self) -> None:
+        """Pause recording between two inputs of a batch"""
+        self.active = False
+
+
+# 覆盖率工具自身的代码，不追踪
+_UNTRACED = frozenset(
+    method.__code__
+    for cls in (Coverage, MonitoringCoverage)
+    for method in (cls.__enter__, cls.__exit__, cls.pause)
+)
+
+# 执行预算检查所在的追踪与预算代码：BudgetExceeded 从这些栈帧中抛出，crash 分桶时跳过
+TRACER_CODES = frozenset([
+    Coverage.traceit.__code__,
+    Coverage._record.__code__,
+    MonitoringCoverage._on_line.__code__,
+    ExecutionBudget.tick.__code__,
+])
+
+COVERAGE_BACKENDS = {
+    "settrace": Coverage,
+    "monitoring": MonitoringCoverage,
+}
+
+
+def coverage_backend(name: str) -> Type[Coverage]:
+    """按名称返回覆盖率后端类；sys.monitoring 不可用时回退到 settrace"""
+    if name not in COVERAGE_BACKENDS:
+        raise ValueError(f"Unknown coverage backend: {name}")
+    if name == "monitoring" and not MONITORING_AVAILABLE:
+        name = "settrace"
+    return COVERAGE_BACKENDS[name]
+
+
+def population_coverage(population: List[str], function: Callable) \
+        -> Tuple[Set[Location], List[int]]:
+    # 串行、不缓存；大语料请使用 utils.CorpusCoverage 中的并行、增量版本
+    from utils.CorpusCoverage import corpus_coverage
+    return corpus_coverage(population, function, workers=1)
@@ -0,0 +1,292 @@
+import bisect
+import hashlib
+import re
+import zlib
+from types import CodeType
+from typing import Dict, Iterator, List, Optional, Tuple
+
+MAP_SIZE = 1 << 16  # 覆盖率位图的初始大小
+
+# (filename, firstlineno, function_name, lineno)：可在进程之间比较的位置标识
+StableLocation = Tuple[str, int, str, int]
+# (filename, lineno)：源文件中的一行，用于统计与报告覆盖的行数
+Line = Tuple[str, int]
+
+_NONZERO = re.compile(b"[^\x00]")
+
+
+def _hash64(data: bytes) -> int:
+    """与进程无关的 64 位哈希（在 C 层完成，不复制数据）"""
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+
+class LocationRegistry:
+    """将 (code object, lineno) 映射为连续的小整数 id。
+
+    每个 code object 在第一次出现时分配一段连续的 id（覆盖其全部行号），
+    之后任意位置的 id 都可以通过 `base(code) + lineno` 得到，无需构造元组。
+    """
+
+    def __init__(self) -> None:
+        self.size = 0
+        self._bases: Dict[CodeType, int] = {}
+        # 按分配顺序记录每段的起始 id，用于反向查找
+        self._starts: List[int] = []
+        self._blocks: List[Tuple[CodeType, int]] = []
+
+    def base(self, code: CodeType) -> int:
+        """返回 code 的基址，位置 id = base + lineno"""
+        base = self._bases.get(code)
+        if base is None:
+            base = self._register(code)
+        return base
+
+    def _register(self, code: CodeType) -> int:
+        lines = [line for _, _, line in code.co_lines() if line is not None]
+        first = min(lines, default=code.co_firstlineno)
+        first = min(first, code.co_firstlineno)
+        last = max(lines, default=first)
+
+        start = self.size
+        self.size += last - first + 1
+        base = start - first
+        self._bases[code] = base
+        self._starts.append(start)
+        self._blocks.append((code, first))
+        return base
+
+    def blocks(self) -> Iterator[Tuple[int, int, CodeType, int]]:
+        """遍历已分配的 id 段：(起始 id, 结束 id, code object, 起始行号)"""
+        ends = self._starts[1:] + [self.size]
+        for start, end, (code, first) in zip(self._starts, ends, self._blocks):
+            yield start, end, code, first
+
+    def code_location(self, idx: int) -> Tuple[CodeType, int]:
+        """id -> (code object, lineno)"""
+        block = bisect.bisect_right(self._starts, idx) - 1
+        code, first = self._blocks[block]
+        return code, first + idx - self._starts[block]
+
+    def location(self, idx: int) -> Tuple[str, int]:
+        """id -> (function_name, lineno)"""
+        code, lineno = self.code_location(idx)
+        return code.co_name, lineno
+
+    def line(self, idx: int) -> Line:
+        """id -> (filename, lineno)，不同模块中的同名函数不会合并"""
+        code, lineno = self.code_location(idx)
+        return code.co_filename, lineno
+
+    def stable_location(self, idx: int) -> StableLocation:
+        """id -> (filename, firstlineno, function_name, lineno)。
+        与进程无关，且不同模块中同名函数的位置不会混淆"""
+        code, lineno = self.code_location(idx)
+        return code.co_filename, code.co_firstlineno, code.co_name, lineno
+
+    def stable_hash(self, idx: int) -> int:
+        """与进程无关的 32 位位置哈希，用于在多个进程之间共享覆盖率位图"""
+        key = ":".join(map(str, self.stable_location(idx)))
+        return zlib.crc32(key.encode())
+
+
+# 进程内共享的全局注册表，保证所有位图中的 id 含义一致
+REGISTRY = LocationRegistry()
+
+
+class CoverageMap:
+    """预分配的覆盖率位图，每个位置占一个字节。
+
+    计数、合并与新颖性检查都通过 bytes/int 的内建操作在 C 层完成，
+    且只处理注册表中已分配的前缀部分。
+    """
+
+    def __init__(self, size: int = MAP_SIZE) -> None:
+        self.bits = bytearray(size)
+        self._zero = memoryview(bytes(size))
+
+    def __len__(self) -> int:
+        return len(self.bits)
+
+    def _used(self) -> int:
+        return min(len(self.bits), REGISTRY.size)
+
+    def ensure(self, size: int) -> None:
+        """保证位图至少能容纳 `size` 个位置（按 2 倍扩容）"""
+        if size <= len(self.bits):
+            return
+        new_size = len(self.bits)
+        while new_size < size:
+            new_size *= 2
+        self.bits.extend(bytes(new_size - len(self.bits)))
+        self._zero = memoryview(bytes(new_size))
+
+    def hit(self, idx: int) -> None:
+        """记录位置 idx 被执行"""
+        try:
+            self.bits[idx] = 1
+        except IndexError:
+            self.ensure(idx + 1)
+            self.bits[idx] = 1
+
+    def clear(self) -> None:
+        n = self._used()
+        self.bits[:n] = self._zero[:n]
+
+    def count(self) -> int:
+        """已覆盖的位置数量"""
+        n = self._used()
+        return n - self.bits.count(0, 0, n)
+
+    def ids(self, start: int = 0, end: Optional[int] = None) -> List[int]:
+        """已覆盖位置的 id 列表，可限定在 [start, end) 范围内"""
+        used = self._used()
+        end = used if end is None else min(end, used)
+        return [m.start() for m in _NONZERO.finditer(self.bits, start, end)]
+
+    def _as_int(self, n: int) -> int:
+        return int.from_bytes(memoryview(self.bits)[:n], "little")
+
+    def has_new(self, other: "CoverageMap") -> bool:
+        """other 中是否存在本位图尚未覆盖的位置"""
+        n = other._used()
+        return other._as_int(n) & ~self._as_int(n) != 0
+
+    def merge(self, other: "CoverageMap") -> List[int]:
+        """将 other 合并进本位图，返回新增位置的 id 列表"""
+        n = other._used()
+        self.ensure(n)
+        mine = self._as_int(n)
+        new = other._as_int(n) & ~mine
+        if not new:
+            return []
+        self.bits[:n] = (mine | new).to_bytes(n, "little")
+        diff = new.to_bytes(n, "little")
+        return [m.start() for m in _NONZERO.finditer(diff)]
+
+    def path_id(self) -> int:
+        """本次执行的 64 位路径 id：已覆盖位置集合的哈希。
+        忽略末尾的空槽位，注册表扩容前后相同的覆盖得到相同的 id"""
+        end = self.bits.rfind(1, 0, self._used()) + 1
+        return _hash64(memoryview(self.bits)[:end])
+
+    def locations(self) -> set:
+        """转换为 (function_name, lineno) 集合，兼容旧接口"""
+        return set(REGISTRY.location(idx) for idx in self.ids())
+
+    def stable_locations(self) -> frozenset:
+        """转换为 StableLocation 集合，用于合并其他进程的覆盖率"""
+        return frozenset(REGISTRY.stable_location(idx) for idx in self.ids())
+
+
+EDGE_MAP_SIZE = 1 << 14  # 边覆盖图的槽位数（必须为 2 的幂）
+
+
+def _bucket(count: int) -> int:
+    """AFL 风格的命中次数分桶：1, 2, 3, 4-7, 8-15, 16-31, 32-127, 128+"""
+    if count <= 3:
+        return (0, 1, 2, 4)[count]
+    if count <= 7:
+        return 8
+    if count <= 15:
+        return 16
+    if count <= 31:
+        return 32
+    if count <= 127:
+        return 64
+    return 128
+
+
+# bytes.translate 使用的分桶查找表
+COUNT_CLASS = bytes(_bucket(count) for count in range(256))
+
+
+class EdgeMap:
+    """固定大小的边覆盖图。
+
+    记录相邻两个位置之间的跳转 (prev_location, cur_location)，
+    槽位由两者的 id 哈希得到，槽位中保存饱和到 255 的命中次数。
+    """
+
+    def __init__(self, size: int = EDGE_MAP_SIZE) -> None:
+        assert size & (size - 1) == 0, "EdgeMap size must be a power of two"
+        self.hits = bytearray(size)
+        self.mask = size - 1
+        self.prev = 0
+        self._zero = bytes(size)
+
+    def __len__(self) -> int:
+        return len(self.hits)
+
+    def hit(self, idx: int) -> None:
+        """记录从上一个位置跳转到位置 idx"""
+        edge = ((self.prev * 0x9E3779B1) ^ idx) & self.mask
+        hits = self.hits
+        if hits[edge] < 255:
+            hits[edge] += 1
+        self.prev = idx
+
+    def clear(self) -> None:
+        self.hits[:] = self._zero
+        self.prev = 0
+
+    def classify(self) -> bytearray:
+        """将命中次数转换为分桶后的位掩码"""
+        return self.hits.translate(COUNT_CLASS)
+
+    def count(self) -> int:
+        """被覆盖的边数量"""
+        return len(self.hits) - self.hits.count(0)
+
+    def path_id(self) -> int:
+        """本次执行的 64 位路径 id：分桶后边覆盖图的哈希"""
+        return _hash64(self.classify())
+
+
+# VirginMap.update 的新颖性等级，与 AFL has_new_bits 的返回值一致
+NEW_BUCKET = 1    # 已见过的位置/边出现了新的命中次数分桶
+NEW_COVERAGE = 2  # 从未见过的位置/边
+
+
+class VirginMap:
+    """尚未见过的覆盖（AFL 的 virgin map）。
+
+    每个槽位初始为 0xFF，其中仍为 1 的位表示尚未见过的分桶；槽位仍为 0xFF
+    说明该位置/边从未被覆盖。`update` 只检查本次执行命中的槽位，
+    Python 层的工作量与本次执行的覆盖大小成正比，而与累计覆盖无关。
+    """
+
+    def __init__(self, size: int = MAP_SIZE) -> None:
+        self.virgin = bytearray(b"\xff") * size
+
+    def __len__(self) -> int:
+        return len(self.virgin)
+
+    def ensure(self, size: int) -> None:
+        if size > len(self.virgin):
+            self.virgin.extend(b"\xff" * (size - len(self.virgin)))
+
+    def count(self) -> int:
+        """见过的槽位数量"""
+        return len(self.virgin) - self.virgin.count(0xFF)
+
+    def update(self, trace: bytes, end: Optional[int] = None) -> Tuple[List[int], List[int]]:
+        """将一次执行的（分桶后的）覆盖并入 virgin map。
+        `trace` - the exec's map, one byte of bucket bits per slot
+        `end` - only slots below `end` are inspected
+        Returns (new slots, slots that only reached a new hit-count bucket).
+        """
+        end = len(trace) if end is None else end
+        self.ensure(end)
+        virgin = self.virgin
+        new_slots: List[int] = []
+        new_buckets: List[int] = []
+        for m in _NONZERO.finditer(trace, 0, end):
+            idx = m.start()
+            bits = trace[idx] & virgin[idx]
+            if bits:
+                if virgin[idx] == 0xFF:
+                    new_slots.append(idx)
+                else:
+                    new_buckets.append(idx)
+                virgin[idx] &= ~bits & 0xFF
+        return new_slots, new_buckets
@@ -0,0 +1,206 @@
+import html
+import inspect
+import os
+from types import CodeType
+from typing import Dict, Iterable, List, Set, Tuple
+
+from utils.CoverageMap import REGISTRY, CoverageMap
+
+# {filename: {(co_firstlineno, co_name): 可执行行集合}}，每个文件只编译一次
+_executable_cache: Dict[str, Dict[Tuple[int, str], Set[int]]] = {}
+
+
+def _function_codes(code: CodeType) -> Iterable[CodeType]:
+    """递归遍历 code 内部定义的所有函数（不含模块与类体，它们在导入时执行）"""
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            if const.co_flags & inspect.CO_OPTIMIZED:
+                yield const
+            yield from _function_codes(const)
+
+
+def _code_lines(code: CodeType) -> Set[int]:
+    """code 自身（不含嵌套函数）的可执行行"""
+    lines = {line for _, _, line in code.co_lines() if line is not None}
+    # def 行（或装饰器行）只对应函数入口指令，不会产生 line 事件
+    if len(lines) > 1:
+        lines.discard(code.co_firstlineno)
+    return lines
+
+
+def executable_lines(filename: str) -> Dict[Tuple[int, str], Set[int]]:
+    """文件中每个函数的可执行行，键为 (co_firstlineno, co_name)"""
+    functions = _executable_cache.get(filename)
+    if functions is None:
+        functions = {}
+        try:
+            with open(filename, encoding="utf-8") as f:
+                module = compile(f.read(), filename, "exec")
+        except (OSError, SyntaxError, ValueError):
+            module = None
+        if module is not None:
+            for code in _function_codes(module):
+                functions[(code.co_firstlineno, code.co_name)] = _code_lines(code)
+        _executable_cache[filename] = functions
+    return functions
+
+
+class FileCoverage:
+    """单个源文件的覆盖率"""
+
+    def __init__(self, filename: str, covered: Set[int]) -> None:
+        self.filename = filename
+        self.covered = covered
+        self.functions = executable_lines(filename)
+        self.executable: Set[int] = set()
+        for lines in self.functions.values():
+            self.executable |= lines
+        # 运行时执行到但编译结果中没有的行（如动态生成的代码）同样计入
+        self.executable |= covered
+
+    @property
+    def percent(self) -> float:
+        return 100.0 * len(self.covered) / len(self.executable) if self.executable else 100.0
+
+    def function_stats(self) -> List[Tuple[str, int, int, int]]:
+        """每个函数的 (函数名, 起始行, 可执行行数, 覆盖行数)，按起始行排序"""
+        stats = []
+        for (firstlineno, name), lines in sorted(self.functions.items()):
+            stats.append((name, firstlineno, len(lines), len(lines & self.covered)))
+        return stats
+
+    def annotate(self) -> str:
+        """带覆盖标记的源码：已覆盖行以两个空格开头，未覆盖的可执行行以 "# " 开头"""
+        try:
+            with open(self.filename, encoding="utf-8") as f:
+                source_lines = f.readlines()
+        except OSError:
+            return ""
+        t = ""
+        for lineno, line in enumerate(source_lines, start=1):
+            if lineno in self.covered or lineno not in self.executable:
+                t += "  "
+            else:
+                t += "# "
+            t += "%4d  " % lineno
+            t += line
+        return t
+
+
+class CoverageReport:
+    """以源文件为键的覆盖率报告。
+
+    位置通过 code object 映射到文件，每个文件的可执行行只计算一次，
+    覆盖判断均为集合查找，报告长时间运行后的累计覆盖率也只需毫秒级时间。
+    """
+
+    def __init__(self, covered: Dict[str, Set[int]]) -> None:
+        """`covered` - {filename: 已覆盖行号集合}"""
+        self.files: Dict[str, FileCoverage] = {
+            filename: FileCoverage(filename, lines) for filename, lines in sorted(covered.items())
+        }
+
+    @classmethod
+    def from_map(cls, coverage_map: CoverageMap) -> "CoverageReport":
+        """由覆盖率位图（如 runner.all_coverage_map）构建报告"""
+        covered: Dict[str, Set[int]] = {}
+        for start, end, code, first in REGISTRY.blocks():
+            ids = coverage_map.ids(start, end)
+            if ids:
+                lines = covered.setdefault(code.co_filename, set())
+                lines.update(first + idx - start for idx in ids)
+        return cls(covered)
+
+    def totals(self) -> Tuple[int, int]:
+        """(可执行行数, 覆盖行数)"""
+        executable = sum(len(f.executable) for f in self.files.values())
+        covered = sum(len(f.covered) for f in self.files.values())
+        return executable, covered
+
+    def text(self, functions: bool = True) -> str:
+        """终端报告：每个文件（及其函数）的行数、未覆盖数与覆盖率"""
+        width = max([len(name) for name in self._display_names().values()] + [20]) + 2
+        t = f"{'Name':<{width}}{'Lines':>8}{'Miss':>8}{'Cover':>8}\n"
+        t += "-" * (width + 24) + "\n"
+        for filename, display in self._display_names().items():
+            file_cov = self.files[filename]
+            total, hit = len(file_cov.executable), len(file_cov.covered)
+            t += f"{display:<{width}}{total:>8}{total - hit:>8}{file_cov.percent:>7.1f}%\n"
+            if functions:
+                for name, firstlineno, total, hit in file_cov.function_stats():
+                    if hit:
+                        label = f"  {name}:{firstlineno}"
+                        t += f"{label:<{width}}{total:>8}{total - hit:>8}{100.0 * hit / total if total else 100.0:>7.1f}%\n"
+        total, hit = self.totals()
+        t += "-" * (width + 24) + "\n"
+        t += f"{'TOTAL':<{width}}{total:>8}{total - hit:>8}{100.0 * hit / total if total else 100.0:>7.1f}%\n"
+        return t
+
+    def _display_names(self) -> Dict[str, str]:
+        cwd = os.getcwd()
+        names = {}
+        for filename in self.files:
+            if filename.startswith(cwd + os.sep):
+                names[filename] = os.path.relpath(filename, cwd)
+            else:
+                names[filename] = filename
+        return names
+
+    def write_html(self, directory: str) -> str:
+        """生成静态 HTML 报告，返回 index.html 的路径"""
+        os.makedirs(directory, exist_ok=True)
+        style = (
+            "<style>body{font-family:monospace}table{border-collapse:collapse}"
+            "td,th{padding:2px 8px;text-align:right}td.name{text-align:left}"
+            ".hit{background:#dfd}.miss{background:#fdd}pre{margin:0}</style>"
+        )
+        rows = []
+        for index, (filename, display) in enumerate(self._display_names().items()):
+            file_cov = self.files[filename]
+            page = f"file_{index}.html"
+            self._write_file_page(os.path.join(directory, page), display, file_cov, style)
+            total, hit = len(file_cov.executable), len(file_cov.covered)
+            rows.append(
+                f"<tr><td class='name'><a href='{page}'>{html.escape(display)}</a></td>"
+                f"<td>{total}</td><td>{total - hit}</td><td>{file_cov.percent:.1f}%</td></tr>"
+            )
+        total, hit = self.totals()
+        percent = 100.0 * hit / total if total else 100.0
+        index_path = os.path.join(directory, "index.html")
+        with open(index_path, "w", encoding="utf-8") as f:
+            f.write(
+                f"<html><head><meta charset='utf-8'><title>Coverage</title>{style}</head><body>"
+                f"<h1>Coverage: {percent:.1f}% ({hit}/{total})</h1><table>"
+                "<tr><th>File</th><th>Lines</th><th>Miss</th><th>Cover</th></tr>"
+                + "".join(rows)
+                + "</table></body></html>"
+            )
+        return index_path
+
+    @staticmethod
+    def _write_file_page(path: str, display: str, file_cov: FileCoverage, style: str) -> None:
+        try:
+            with open(file_cov.filename, encoding="utf-8") as f:
+                source_lines = f.readlines()
+        except OSError:
+            source_lines = []
+        body = []
+        for lineno, line in enumerate(source_lines, start=1):
+            css = ""
+            if lineno in file_cov.covered:
+                css = "hit"
+            elif lineno in file_cov.executable:
+                css = "miss"
+            body.append(f"<pre class='{css}'>{lineno:5d}  {html.escape(line.rstrip())}</pre>")
+        functions = "".join(
+            f"<tr><td class='name'>{html.escape(name)}:{firstlineno}</td><td>{total}</td>"
+            f"<td>{total - hit}</td><td>{100.0 * hit / total if total else 100.0:.1f}%</td></tr>"
+            for name, firstlineno, total, hit in file_cov.function_stats()
+        )
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(
+                f"<html><head><meta charset='utf-8'><title>{html.escape(display)}</title>{style}</head>"
+                f"<body><h1>{html.escape(display)}: {file_cov.percent:.1f}%</h1><table>"
+                "<tr><th>Function</th><th>Lines</th><th>Miss</th><th>Cover</th></tr>"
+                f"{functions}</table><hr>{''.join(body)}</body></html>"
+            )
@@ -0,0 +1,71 @@
+import hashlib
+import traceback
+from types import CodeType
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+
+CRASH_DEPTH = 5  # 默认参与签名计算的栈帧数
+
+
+class CrashBucketer:
+    """轻量的 crash 分桶。
+
+    直接遍历 `exc.__traceback__`，用最内层 `depth` 个栈帧的 (code object, lineno)
+    与异常类型计算签名，不读取源码、不格式化字符串。
+    只有每个桶的第一个 crash 会保存完整的格式化 traceback。
+    """
+
+    def __init__(self, depth: int = CRASH_DEPTH, ignore: Iterable[CodeType] = ()) -> None:
+        """Constructor.
+        `depth` - number of innermost frames that make up a signature
+        `ignore` - harness code objects skipped at the outer end of the traceback,
+                   and tracer code objects skipped at the inner end (see `Coverage.TRACER_CODES`)
+        """
+        self.depth = depth
+        self.ignore: FrozenSet[CodeType] = frozenset(ignore)
+        # {signature: 完整 traceback}，仅第一个 crash
+        self.traces: Dict[str, str] = {}
+        # {signature: 命中次数}
+        self.counts: Dict[str, int] = {}
+        # code object -> 与进程无关的标识，避免每次重复格式化
+        self._code_keys: Dict[CodeType, str] = {}
+
+    def _code_key(self, code: CodeType) -> str:
+        key = self._code_keys.get(code)
+        if key is None:
+            key = f"{code.co_filename}:{code.co_firstlineno}:{code.co_name}"
+            self._code_keys[code] = key
+        return key
+
+    def frames(self, exc: BaseException) -> List[Tuple[CodeType, int]]:
+        """最内层 `depth` 个栈帧的 (code object, lineno)"""
+        frames = []
+        tb = exc.__traceback__
+        # 跳过捕获异常的测试框架栈帧，使签名与调用方式无关
+        while tb is not None and tb.tb_frame.f_code in self.ignore:
+            tb = tb.tb_next
+        while tb is not None:
+            frames.append((tb.tb_frame.f_code, tb.tb_lineno))
+            tb = tb.tb_next
+        # 预算超出时 BudgetExceeded 由追踪函数抛出，最内层是追踪与预算代码的栈帧，
+        # 先去掉它们，签名只由目标程序的栈帧组成
+        while frames and frames[-1][0] in self.ignore:
+            frames.pop()
+        return frames[-self.depth:]
+
+    def signature(self, exc: BaseException) -> str:
+        """计算异常的签名"""
+        key = [type(exc).__qualname__]
+        for code, lineno in self.frames(exc):
+            key.append(f"{self._code_key(code)}:{lineno}")
+        return hashlib.md5("|".join(key).encode()).hexdigest()
+
+    def record(self, exc: BaseException) -> str:
+        """记录一次 crash 并返回其签名；新桶会保存完整的 traceback"""
+        sig = self.signature(exc)
+        count = self.counts.get(sig)
+        if count is None:
+            self.counts[sig] = 1
+            self.traces[sig] = "".join(traceback.format_exception(type(exc), exc, exc.__traceback__))
+        else:
+            self.counts[sig] = count + 1
+        return sig
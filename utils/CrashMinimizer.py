@@ -0,0 +1,179 @@
+import multiprocessing
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from utils.Budget import BudgetExceeded, ExecutionBudget
+from utils.Coverage import TRACER_CODES, Coverage
+from utils.CrashBucket import CRASH_DEPTH, CrashBucketer
+from utils.ObjectUtils import get_md5_of_object
+from utils.Scope import InstrumentationScope
+
+HANG = "hang"  # 超出执行预算的候选输入的结果
+
+# worker 进程内的目标函数与配置，由 _init_worker 设置
+_worker_function: Optional[Callable] = None
+_worker_budget: Optional[ExecutionBudget] = None
+_worker_scope: Optional[InstrumentationScope] = None
+_worker_crashes: Optional[CrashBucketer] = None
+
+
+def _init_worker(function: Callable, scope: Optional[InstrumentationScope],
+                 budget: Optional[ExecutionBudget], crash_depth: int) -> None:
+    global _worker_function, _worker_scope, _worker_budget, _worker_crashes
+    _worker_function, _worker_scope, _worker_budget = function, scope, budget
+    # 与 FunctionCoverageRunner 一样跳过执行框架与追踪函数的栈帧，得到相同的签名
+    _worker_crashes = CrashBucketer(crash_depth, [_run_input.__code__, *TRACER_CODES])
+
+
+def _run_input(inp: Any) -> Optional[str]:
+    """执行一个输入，返回 crash 签名；通过时返回 None，超出预算时返回 HANG。
+    有预算时在追踪下执行，以便中止死循环的候选输入"""
+    try:
+        if _worker_budget is None:
+            _worker_function(inp)
+        else:
+            with Coverage(budget=_worker_budget, scope=_worker_scope):
+                _worker_function(inp)
+    except BudgetExceeded:
+        return HANG
+    except Exception as exc:
+        return _worker_crashes.signature(exc)
+    return None
+
+
+def _chunks(data: Any, n: int) -> List[Any]:
+    """把 data 切成 n 段长度尽量相等的连续片段"""
+    size, extra = divmod(len(data), n)
+    chunks, start = [], 0
+    for i in range(n):
+        end = start + size + (i < extra)
+        chunks.append(data[start:end])
+        start = end
+    return chunks
+
+
+class CrashMinimizer:
+    """crash 输入的最小化（AFL 的 tmin），使用 delta debugging（ddmin）。
+
+    每一轮把输入切成 n 段，依次尝试只保留一段、去掉一段，
+    第一个仍得到相同 crash 签名的候选成为新的输入；都不行时把 n 加倍，
+    直到 n 等于输入长度（此时删除任意一个字符都不再保持该 crash）。
+    执行结果按输入的哈希缓存；有多个 worker 时，每轮的候选输入分批在进程池中并行执行。
+    """
+
+    def __init__(self, function: Callable, workers: int = 0,
+                 scope: Optional[InstrumentationScope] = None,
+                 budget: Optional[ExecutionBudget] = None,
+                 crash_depth: int = CRASH_DEPTH, timeout: Optional[float] = None) -> None:
+        """Constructor.
+        `function` - the function under test
+        `workers` - number of worker processes, defaults to the number of cores
+        `scope` / `budget` - instrumentation scope and per-exec budget of each candidate
+        `crash_depth` - frames per signature, must match the fuzzing runner
+        `timeout` - seconds per crash, after which the smallest input so far is returned
+        """
+        self.function = function
+        self.workers = workers or os.cpu_count() or 1
+        self.scope = scope
+        self.budget = budget
+        self.crash_depth = crash_depth
+        self.timeout = timeout
+        # {输入的内容哈希: 执行结果}
+        self.cache: Dict[str, Optional[str]] = {}
+        self.execs = 0  # 实际执行的候选输入数（不含缓存命中）
+        self._pool: Optional[Any] = None
+
+    def __enter__(self) -> "CrashMinimizer":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def _run(self, inputs: Sequence[Any]) -> List[Optional[str]]:
+        initargs = (self.function, self.scope, self.budget, self.crash_depth)
+        self.execs += len(inputs)
+        if self.workers <= 1 or len(inputs) <= 1:
+            if _worker_function is not self.function or _worker_budget is not self.budget:
+                _init_worker(*initargs)
+            return [_run_input(inp) for inp in inputs]
+        if self._pool is None:
+            self._pool = multiprocessing.Pool(self.workers, initializer=_init_worker, initargs=initargs)
+        return self._pool.map(_run_input, inputs)
+
+    def outcome(self, inp: Any) -> Optional[str]:
+        """inp 的执行结果（crash 签名、HANG 或 None），命中缓存时不再执行"""
+        key = get_md5_of_object(inp)
+        if key not in self.cache:
+            self.cache[key] = self._run([inp])[0]
+        return self.cache[key]
+
+    def _first(self, candidates: List[Any], accept: Callable[[Optional[str]], bool]) -> Optional[Any]:
+        """按顺序返回第一个结果满足 `accept` 的候选输入。
+        每批执行 `workers` 个未缓存的候选，批内找到即停止"""
+        keys = [get_md5_of_object(candidate) for candidate in candidates]
+        batch = max(self.workers, 1)
+        start = 0
+        while start < len(candidates):
+            window = range(start, min(start + batch, len(candidates)))
+            pending = [i for i in window if keys[i] not in self.cache]
+            if self.workers <= 1:
+                # 单进程时逐个执行，找到即停止
+                pending = pending[:1]
+            for i, result in zip(pending, self._run([candidates[i] for i in pending])):
+                self.cache[keys[i]] = result
+            for i in window:
+                if keys[i] not in self.cache:
+                    break
+                if accept(self.cache[keys[i]]):
+                    return candidates[i]
+                start = i + 1
+        return None
+
+    def minimize(self, inp: Any, signature: Optional[str] = None) -> Any:
+        """返回与 inp 具有相同 crash 签名的最小化输入。
+        `signature` 默认为 inp 自身的执行结果；inp 不再触发该签名时原样返回"""
+        expected = self.outcome(inp)
+        if signature is not None and expected != signature:
+            return inp
+        if expected is None or expected == HANG:
+            return inp
+        deadline = time.perf_counter() + self.timeout if self.timeout is not None else None
+
+        def same(result: Optional[str]) -> bool:
+            return result == expected
+
+        n = 2
+        while len(inp) >= 2:
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+            n = min(n, len(inp))
+            chunks = _chunks(inp, n)
+            empty = inp[:0]
+            subsets = chunks if n > 2 else []
+            complements = [empty.join(chunks[:i] + chunks[i + 1:]) for i in range(n)]
+            found = self._first(subsets, same) if subsets else None
+            if found is not None:
+                inp, n = found, 2
+                continue
+            found = self._first(complements, same)
+            if found is not None:
+                inp, n = found, max(n - 1, 2)
+                continue
+            if n == len(inp):
+                break
+            n = min(2 * n, len(inp))
+        return inp
+
+    def minimize_all(self, crashes: Dict[Any, str]) -> Dict[str, Any]:
+        """最小化每个 crash 桶的输入：{输入: 签名} -> {签名: 最小化的输入}"""
+        try:
+            return {signature: self.minimize(inp, signature) for inp, signature in crashes.items()}
+        finally:
+            self.close()
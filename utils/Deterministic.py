@@ -0,0 +1,105 @@
+from typing import Any, Hashable, Iterator, Optional, Tuple
+
+from utils.Mutator import INTERESTING_8, INTERESTING_16, INTERESTING_32, from_bytearray, to_bytearray
+
+ARITH_MAX = 35  # 算术变异的最大增减量
+DETERMINISTIC_MAX_LEN = 256  # 超过该长度（字节）的种子跳过确定性阶段，直接进入 havoc
+
+
+def _could_be_bitflip(xor: int) -> bool:
+    """单字节的改变 `xor` 是否已由 bitflip 阶段产生过（1/2/4 位翻转或整字节翻转）"""
+    if not xor:
+        return True
+    shift = 0
+    while not xor & 1:
+        xor >>= 1
+        shift += 1
+    return xor in (1, 3, 15) or (xor == 0xFF and shift == 0)
+
+
+class DeterministicStage:
+    """AFL 风格的确定性变异阶段，每个新种子在进入 havoc 之前执行一次。
+
+    `candidates` 是惰性的生成器，逐个产生 (候选输入, 标签)：
+    walking bitflip 1/1、2/1、4/1，bitflip 8/8，16/8、32/8，
+    逐字节的算术增减 ±35，以及 8/16/32 位 interesting values。
+    bitflip 8/8 的候选带有字节位置作为标签，fuzzer 执行后通过 `feedback`
+    报告其路径；翻转后路径不变的字节记入 effector map，后续阶段跳过这些位置。
+    尚未收到反馈的位置视为有效。
+    """
+
+    def __init__(self, seed: Any, path: Hashable) -> None:
+        """`seed` - the Seed to mutate
+        `path` - path id of the seed's own execution, compared against in `feedback`
+        """
+        self.seed = seed
+        self.path = path
+        self.buf = to_bytearray(seed.data)
+        # effector map：1 表示修改该字节会改变执行路径
+        self.effector = bytearray(b"\x01") * len(self.buf)
+        self.candidates: Iterator[Tuple[Any, Optional[int]]] = self._generate()
+
+    def feedback(self, tag: Optional[int], path: Hashable) -> None:
+        """报告带标签的候选输入的执行路径"""
+        if tag is not None and path == self.path:
+            self.effector[tag] = 0
+
+    def _effective(self, pos: int, width: int) -> bool:
+        return any(self.effector[pos:pos + width])
+
+    def _generate(self) -> Iterator[Tuple[Any, Optional[int]]]:
+        buf, data = self.buf, self.seed.data
+        n = len(buf)
+
+        # walking bitflip：1、2、4 个相邻位
+        for width in (1, 2, 4):
+            for start in range(n * 8 - width + 1):
+                for bit in range(start, start + width):
+                    buf[bit >> 3] ^= 0x80 >> (bit & 7)
+                yield from_bytearray(buf, data), None
+                for bit in range(start, start + width):
+                    buf[bit >> 3] ^= 0x80 >> (bit & 7)
+
+        # bitflip 8/8，同时建立 effector map
+        for pos in range(n):
+            buf[pos] ^= 0xFF
+            yield from_bytearray(buf, data), pos
+            buf[pos] ^= 0xFF
+
+        # bitflip 16/8、32/8
+        for width in (2, 4):
+            for pos in range(n - width + 1):
+                if not self._effective(pos, width):
+                    continue
+                original = buf[pos:pos + width]
+                buf[pos:pos + width] = bytes(b ^ 0xFF for b in original)
+                yield from_bytearray(buf, data), None
+                buf[pos:pos + width] = original
+
+        # 算术增减 8 位，跳过 bitflip 已经产生过的值
+        for pos in range(n):
+            if not self.effector[pos]:
+                continue
+            original = buf[pos]
+            for delta in range(1, ARITH_MAX + 1):
+                for value in ((original + delta) & 0xFF, (original - delta) & 0xFF):
+                    if _could_be_bitflip(original ^ value):
+                        continue
+                    buf[pos] = value
+                    yield from_bytearray(buf, data), None
+            buf[pos] = original
+
+        # interesting values 8/16/32 位，多字节的值同时尝试两种字节序
+        for width, values in ((1, INTERESTING_8), (2, INTERESTING_16), (4, INTERESTING_32)):
+            if width > 1:
+                values = values + [value[::-1] for value in values if value[::-1] != value]
+            for pos in range(n - width + 1):
+                if not self._effective(pos, width):
+                    continue
+                original = buf[pos:pos + width]
+                for value in values:
+                    if value == original:
+                        continue
+                    buf[pos:pos + width] = value
+                    yield from_bytearray(buf, data), None
+                buf[pos:pos + width] = original
@@ -0,0 +1,135 @@
+import ast
+import sys
+from types import CodeType, ModuleType
+from typing import Any, Iterable, Iterator, List, Optional, Set
+
+from utils.Scope import InstrumentationScope
+
+MAX_TOKEN_LEN = 32  # 自动提取的 token 的最大长度（字节），与 AFL 的自动字典一致
+
+
+def _constants(code: CodeType, doc: Optional[str] = None) -> Iterator[Any]:
+    """code 及其嵌套 code object 中的常量，tuple/frozenset 常量（如 `x in ("a", "b")`）会被展开"""
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            yield from _constants(const)
+        elif isinstance(const, (tuple, frozenset)):
+            yield from const
+        elif const is not doc:
+            yield const
+
+
+def _is_token(value: Any) -> bool:
+    """适合作为字典 token 的常量：非空、不太长的 str/bytes，不是报错信息之类的句子"""
+    if not isinstance(value, (str, bytes)) or not value or len(value) > MAX_TOKEN_LEN:
+        return False
+    text = value if isinstance(value, str) else value.decode("latin-1")
+    return not (len(text.split()) > 1 and len(text) > 8)
+
+
+def _functions(obj: Any) -> Iterator[Any]:
+    """模块或类中定义的函数（包括方法、staticmethod、classmethod 与 property）"""
+    for value in vars(obj).values():
+        if isinstance(value, (staticmethod, classmethod)):
+            value = value.__func__
+        if isinstance(value, property):
+            yield from (f for f in (value.fget, value.fset, value.fdel) if f is not None)
+        elif hasattr(value, "__code__"):
+            yield value
+
+
+class Dictionary:
+    """变异使用的 token 字典。
+
+    token 自动从插桩范围内的 code object 的 `co_consts`（以及模块、类的字符串属性）中提取，
+    例如 sample3 比较的 'F'、'D'、'U'，html.parser 识别的 '<!--'、'<![' 等；
+    还可以在其上加载 AFL 格式的字典文件。token 以 bytes 保存并去重。
+    """
+
+    def __init__(self, tokens: Iterable[Any] = ()) -> None:
+        self.tokens: List[bytes] = []
+        self._seen: Set[bytes] = set()
+        for token in tokens:
+            self.add(token)
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def __iter__(self) -> Iterator[bytes]:
+        return iter(self.tokens)
+
+    def add(self, token: Any) -> bool:
+        """添加一个 token，返回是否为新 token"""
+        if isinstance(token, str):
+            token = token.encode("utf-8", "surrogateescape")
+        token = bytes(token)
+        if not token or token in self._seen:
+            return False
+        self._seen.add(token)
+        self.tokens.append(token)
+        return True
+
+    def add_code(self, code: CodeType, doc: Optional[str] = None) -> None:
+        """提取 code 中的常量（`doc` 为函数的文档字符串，不作为 token）"""
+        for const in _constants(code, doc):
+            if _is_token(const):
+                self.add(const)
+
+    def add_function(self, function: Any) -> None:
+        self.add_code(function.__code__, function.__doc__)
+
+    def add_namespace(self, obj: Any, scope: Optional[InstrumentationScope] = None) -> None:
+        """提取模块或类中的函数常量与字符串属性，`scope` 不为空时只提取范围内的函数"""
+        for function in _functions(obj):
+            if scope is None or function.__code__ in scope:
+                self.add_function(function)
+        for name, value in vars(obj).items():
+            if name.startswith("__"):
+                continue
+            if isinstance(value, type) and value.__module__ == getattr(obj, "__name__", None):
+                self.add_namespace(value, scope)
+                continue
+            values = value if isinstance(value, (tuple, frozenset, list)) else (value,)
+            for item in values:
+                if _is_token(item):
+                    self.add(item)
+
+    @classmethod
+    def from_target(cls, function: Any, scope: Optional[InstrumentationScope] = None) -> "Dictionary":
+        """目标函数及插桩范围内已加载模块的自动字典。
+        未指定范围（或范围包含所有代码）时只提取目标函数所在模块"""
+        dictionary = cls()
+        dictionary.add_function(function)
+        modules: List[ModuleType] = []
+        if scope is None or scope.include_all:
+            modules.append(sys.modules[function.__module__])
+        else:
+            for code in scope.include_codes:
+                dictionary.add_code(code)
+            for module in list(sys.modules.values()):
+                filename = getattr(module, "__file__", None)
+                if filename and filename.startswith(scope.include_files) \
+                        and not filename.startswith(scope.exclude_files):
+                    modules.append(module)
+        for module in modules:
+            dictionary.add_namespace(module, scope)
+        return dictionary
+
+    def load(self, path: str) -> int:
+        """加载 AFL 格式的字典文件，每行为 `name="value"` 或 `"value"`，`#` 开头为注释。
+        value 支持 `\\xNN`、`\\\\` 与 `\\"` 转义。返回新增 token 的数量"""
+        added = 0
+        with open(path, "r", encoding="utf-8") as f:
+            for lineno, line in enumerate(f, 1):
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                start, end = line.find('"'), line.rfind('"')
+                if start < 0 or end <= start:
+                    raise ValueError(f"{path}:{lineno}: expected a quoted token")
+                try:
+                    value = ast.literal_eval("b" + line[start:end + 1])
+                except (SyntaxError, ValueError) as exc:
+                    raise ValueError(f"{path}:{lineno}: invalid token: {exc}") from None
+                added += self.add(value)
+        return added
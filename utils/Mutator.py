@@ -1,220 +1,249 @@
-import math
+import functools
 import random
 import struct
-from typing import Any
+from typing import Any, Callable, List, Optional, Sequence
 
+from utils.Dictionary import Dictionary
+from utils.OperatorScheduler import OperatorScheduler
 
-def insert_random_character(s: str) -> str:
+# 变异函数直接修改传入的 bytearray，整个变异栈只做一次编码与解码
+ByteMutation = Callable[[bytearray], None]
+
+_random = random.random
+
+
+def _below(n: int) -> int:
+    """[0, n) 内的随机整数，比 random.randint 快数倍"""
+    return int(_random() * n)
+
+
+# 预先打包好的 interesting values
+INTERESTING_8 = [bytes([value]) for value in (0x00, 0xFF, 0x7F, 0x80)]
+INTERESTING_16 = [struct.pack(">H", value) for value in (0x0000, 0xFFFF, 0x7FFF, 0x8000)]
+INTERESTING_32 = [struct.pack(">I", value) for value in (0x00000000, 0xFFFFFFFF, 0x7FFFFFFF, 0x80000000)]
+_INTERESTING = {1: INTERESTING_8, 2: INTERESTING_16, 4: INTERESTING_32}
+
+
+def to_bytearray(inp: Any) -> bytearray:
+    """将输入转换为可原地修改的 bytearray。
+    字符串以 surrogateescape 编码，`from_bytearray` 可以无损还原任意字节"""
+    if isinstance(inp, (bytes, bytearray)):
+        return bytearray(inp)
+    try:
+        return bytearray(inp.encode("utf-8", "surrogateescape"))
+    except UnicodeEncodeError:
+        # 种子中含有孤立的代理字符
+        return bytearray(inp.encode("utf-8", "surrogatepass"))
+
+
+def from_bytearray(buf: bytearray, like: Any) -> Any:
+    """将变异结果转换回与 `like` 相同的类型：bytes 输入得到 bytes，否则得到 str。
+    无法解码的字节保留为代理字符，不会被丢弃"""
+    if isinstance(like, (bytes, bytearray)):
+        return bytes(buf)
+    return buf.decode("utf-8", "surrogateescape")
+
+
+def insert_random_byte(buf: bytearray) -> None:
     """
-    向 s 中下标为 pos 的位置插入一个随机 byte
-    pos 为随机生成，范围为 [0, len(s)]
+    向 buf 中下标为 pos 的位置插入一个随机 byte
+    pos 为随机生成，范围为 [0, len(buf)]
     插入的 byte 为随机生成，范围为 [32, 127]
     """
-    pos = random.randint(0, len(s))
-    random_char = chr(random.randint(32, 127))
-    return s[:pos] + random_char + s[pos:]
+    buf.insert(_below(len(buf) + 1), 32 + _below(96))
 
 
-def flip_random_bits(s: str) -> str:
+def flip_bits(buf: bytearray) -> None:
     """
     基于 AFL 变异算法策略中的 bitflip 与 random havoc 实现相邻 N 位翻转（N = 1, 2, 4），其中 N 为随机生成
-    从 s 中随机挑选一个 bit，将其与其后面 N - 1 位翻转（翻转即 0 -> 1; 1 -> 0）
-    注意：不要越界
+    从 buf 中随机挑选一个 bit，将其与其后面 N - 1 位翻转（翻转即 0 -> 1; 1 -> 0）
     """
-    if not s:
-        return s
-
-    # 将字符串转换为字节数组
-    bytes_arr = bytearray(s.encode())
-
-    # 随机选择翻转位数 (1, 2, or 4)
-    n_bits = random.choice([1, 2, 4])
-
-    # 随机选择起始位置
-    max_pos = len(bytes_arr) * 8 - n_bits
+    n_bits = (1, 2, 4)[_below(3)]
+    max_pos = len(buf) * 8 - n_bits
     if max_pos < 0:
-        return s
+        return
+    start_bit = _below(max_pos + 1)
+    for bit in range(start_bit, start_bit + n_bits):
+        buf[bit >> 3] ^= 0x80 >> (bit & 7)
 
-    start_bit = random.randint(0, max_pos)
-    byte_index = start_bit // 8
-    bit_offset = start_bit % 8
 
-    # 翻转连续的N位
-    for i in range(n_bits):
-        if byte_index >= len(bytes_arr):
-            break
-        # 创建掩码并翻转指定位
-        mask = 1 << (7 - ((bit_offset + i) % 8))
-        bytes_arr[byte_index] ^= mask
-        if (bit_offset + i + 1) % 8 == 0:
-            byte_index += 1
+def arithmetic_bytes(buf: bytearray) -> None:
+    """
+    基于 AFL 变异算法策略中的 arithmetic inc/dec 与 random havoc 实现相邻 N 字节随机增减（N = 1, 2, 4），其中 N 为随机生成
+    每个字节加上一个 [-35, 35] 的随机数，结果对 256 取模
+    """
+    if not buf:
+        return
+    n_bytes = min((1, 2, 4)[_below(3)], len(buf))
+    start_pos = _below(len(buf) - n_bytes + 1)
+    for pos in range(start_pos, start_pos + n_bytes):
+        buf[pos] = (buf[pos] + _below(71) - 35) & 0xFF
 
-    return bytes_arr.decode(errors="ignore")
 
+def interesting_bytes(buf: bytearray) -> None:
+    """
+    基于 AFL 变异算法策略中的 interesting values 与 random havoc 实现相邻 N 字节随机替换为 interesting_value（N = 1, 2, 4），其中 N 为随机生成
+    """
+    if not buf:
+        return
+    n_bytes = min((1, 2, 4)[_below(3)], len(buf))
+    if n_bytes == 3:
+        # 只有 3 个字节时使用 2 字节的值，保持长度不变
+        n_bytes = 2
+    start_pos = _below(len(buf) - n_bytes + 1)
+    values = _INTERESTING[n_bytes]
+    buf[start_pos:start_pos + n_bytes] = values[_below(len(values))]
+
+
+def havoc_insert(buf: bytearray) -> None:
+    """
+    基于 AFL 变异算法策略中的 random havoc 实现随机插入
+    随机选取一个位置，插入一段的内容，其中 75% 的概率是插入原文中的任意一段随机长度的内容，25% 的概率是插入一段随机长度的 bytes
+    """
+    if not buf:
+        return
+    insert_pos = _below(len(buf) + 1)
+    if _random() < 0.75:
+        length = 1 + _below(min(8, len(buf)))
+        start = _below(len(buf) - length + 1)
+        content = buf[start:start + length]
+    else:
+        content = random.randbytes(1 + _below(8))
+    buf[insert_pos:insert_pos] = content
 
-def arithmetic_random_bytes(s: str) -> str:
+
+def havoc_replace(buf: bytearray) -> None:
     """
-    基于 AFL 变异算法策略中的 arithmetic inc/dec 与 random havoc 实现相邻 N 字节随机增减（N = 1, 2, 4），其中 N 为随机生成
-    字节随机增减：
-        1. 取其中一个 byte，将其转换为数字 num1；
-        2. 将 num1 加上一个 [-35, 35] 的随机数，得到 num2；
-        3. 用 num2 所表示的 byte 替换该 byte
-    从 s 中随机挑选一个 byte，将其与其后面 N - 1 个 bytes 进行字节随机增减
-    注意：不要越界；如果出现单个字节在添加随机数之后，可以通过取模操作使该字节落在 [0, 255] 之间
+    基于 AFL 变异算法策略中的 random havoc 实现随机替换
+    随机选取一个位置，替换随后一段随机长度的内容，其中 75% 的概率是替换为原文中的任意一段随机长度的内容，25% 的概率是替换为一段随机长度的 bytes
     """
-    if not s:
-        return s
+    if len(buf) < 2:
+        return
+    replace_pos = _below(len(buf))
+    replace_length = 1 + _below(min(8, len(buf) - replace_pos))
+    if _random() < 0.75 and len(buf) > replace_length:
+        start = _below(len(buf) - replace_length + 1)
+        content = buf[start:start + replace_length]
+    else:
+        content = random.randbytes(replace_length)
+    buf[replace_pos:replace_pos + replace_length] = content
 
-    bytes_arr = bytearray(s.encode())
-    if not bytes_arr:
-        return s
 
-    # 随机选择操作字节数
-    n_bytes = random.choice([1, 2, 4])
-    if n_bytes > len(bytes_arr):
-        n_bytes = len(bytes_arr)
+def delete_bytes(buf: bytearray) -> None:
+    """删除相邻的 N 个字节（N = 1, 2, 4），且删除后不会清空"""
+    possible_n = [n for n in (1, 2, 4) if n < len(buf)]
+    if not possible_n:
+        return
+    n = possible_n[_below(len(possible_n))]
+    start_pos = _below(len(buf) - n + 1)
+    del buf[start_pos:start_pos + n]
 
-    # 随机选择起始位置
-    start_pos = random.randint(0, len(bytes_arr) - n_bytes)
 
-    # 对连续N个字节进行变异
-    for i in range(n_bytes):
-        delta = random.randint(-35, 35)
-        bytes_arr[start_pos + i] = (bytes_arr[start_pos + i] + delta) % 256
+def insert_token(buf: bytearray, tokens: Sequence[bytes]) -> None:
+    """在随机位置插入一个字典 token"""
+    if not tokens:
+        return
+    pos = _below(len(buf) + 1)
+    buf[pos:pos] = tokens[_below(len(tokens))]
 
-    return bytes_arr.decode(errors="ignore")
 
+def overwrite_token(buf: bytearray, tokens: Sequence[bytes]) -> None:
+    """用一个字典 token 覆盖随机位置的内容，token 超出末尾时 buf 随之变长"""
+    if not tokens:
+        return
+    token = tokens[_below(len(tokens))]
+    pos = _below(max(len(buf) - len(token), 0) + 1)
+    buf[pos:pos + len(token)] = token
 
-def interesting_random_bytes(s: str) -> str:
-    """
-    基于 AFL 变异算法策略中的 interesting values 与 random havoc 实现相邻 N 字节随机替换为 interesting_value（N = 1, 2, 4），其中 N 为随机生成
-    interesting_value 替换：
-        1. 构建分别针对于 1, 2, 4 bytes 的 interesting_value 数组；
-        2. 随机挑选 s 中相邻连续的 1, 2, 4 bytes，将其替换为相应 interesting_value 数组中的随机元素；
-    注意：不要越界
-    """
-    if not s:
-        return s
 
-    # 定义有趣的值
-    interesting_8 = [0x00, 0xFF, 0x7F, 0x80]
-    interesting_16 = [0x0000, 0xFFFF, 0x7FFF, 0x8000]
-    interesting_32 = [0x00000000, 0xFFFFFFFF, 0x7FFFFFFF, 0x80000000]
+def _mutate_str(mutation: ByteMutation, s: Any) -> Any:
+    buf = to_bytearray(s)
+    mutation(buf)
+    return from_bytearray(buf, s)
 
-    bytes_arr = bytearray(s.encode())
-    if not bytes_arr:
-        return s
 
-    # 随机选择替换字节数
-    n_bytes = random.choice([1, 2, 4])
-    if n_bytes > len(bytes_arr):
-        n_bytes = len(bytes_arr)
+# 字符串接口：每次调用做一次编码与解码，栈式变异请使用 Mutator.stack
 
-    start_pos = random.randint(0, len(bytes_arr) - n_bytes)
 
-    # 根据字节数选择相应的有趣值
-    if n_bytes == 1:
-        value = random.choice(interesting_8)
-        bytes_arr[start_pos] = value
-    elif n_bytes == 2:
-        value = random.choice(interesting_16)
-        bytes_arr[start_pos : start_pos + 2] = struct.pack(">H", value)
-    else:  # n_bytes == 4
-        value = random.choice(interesting_32)
-        bytes_arr[start_pos : start_pos + 4] = struct.pack(">I", value)
+def insert_random_character(s: str) -> str:
+    return _mutate_str(insert_random_byte, s)
 
-    return bytes_arr.decode(errors="ignore")
 
+def flip_random_bits(s: str) -> str:
+    return _mutate_str(flip_bits, s)
 
-def havoc_random_insert(s: str):
-    """
-    基于 AFL 变异算法策略中的 random havoc 实现随机插入
-    随机选取一个位置，插入一段的内容，其中 75% 的概率是插入原文中的任意一段随机长度的内容，25% 的概率是插入一段随机长度的 bytes
-    """
-    if not s:
-        return s
-
-    bytes_arr = bytearray(s.encode())
-    insert_pos = random.randint(0, len(bytes_arr))
-
-    # 75%概率插入原文内容，25%概率插入随机内容
-    if random.random() < 0.75 and len(bytes_arr) > 0:
-        # 从原文随机选择一段
-        length = random.randint(1, min(8, len(bytes_arr)))
-        start = random.randint(0, len(bytes_arr) - length)
-        content = bytes_arr[start : start + length]
-    else:
-        # 生成随机内容
-        length = random.randint(1, 8)
-        content = bytearray(random.randint(0, 255) for _ in range(length))
 
-    bytes_arr[insert_pos:insert_pos] = content
-    return bytes_arr.decode(errors="ignore")
+def arithmetic_random_bytes(s: str) -> str:
+    return _mutate_str(arithmetic_bytes, s)
 
 
-def havoc_random_replace(s: str):
-    """
-    基于 AFL 变异算法策略中的 random havoc 实现随机替换
-    随机选取一个位置，替换随后一段随机长度的内容，其中 75% 的概率是替换为原文中的任意一段随机长度的内容，25% 的概率是替换为一段随机长度的 bytes
-    """
-    if not s:
-        return s
-
-    bytes_arr = bytearray(s.encode())
-    if len(bytes_arr) < 2:
-        return s
-
-    # 选择替换位置和长度
-    replace_pos = random.randint(0, len(bytes_arr) - 1)
-    max_length = min(8, len(bytes_arr) - replace_pos)
-    replace_length = random.randint(1, max_length)
-
-    # 75%概率使用原文内容替换，25%概率使用随机内容
-    if random.random() < 0.75 and len(bytes_arr) > replace_length:
-        # 从原文随机选择一段
-        start = random.randint(0, len(bytes_arr) - replace_length)
-        content = bytes_arr[start : start + replace_length]
-    else:
-        # 生成随机内容
-        content = bytearray(random.randint(0, 255) for _ in range(replace_length))
+def interesting_random_bytes(s: str) -> str:
+    return _mutate_str(interesting_bytes, s)
+
+
+def havoc_random_insert(s: str) -> str:
+    return _mutate_str(havoc_insert, s)
+
 
-    bytes_arr[replace_pos : replace_pos + replace_length] = content
-    return bytes_arr.decode(errors="ignore")
+def havoc_random_replace(s: str) -> str:
+    return _mutate_str(havoc_replace, s)
 
 
 def delete_random_bytes(s: str) -> str:
-    if not s:
-        return s
-    bytes_arr = bytearray(s.encode())
-    if not bytes_arr:
-        return s
-    # 仅允许删除长度 <= 当前字节数的N，且确保删除后不全部清空
-    possible_n = [n for n in [1, 2, 4] if n < len(bytes_arr)]  # 修改条件为 n < len(bytes_arr)
-    if not possible_n:
-        return s
-    n = random.choice(possible_n)
-    start_pos = random.randint(0, len(bytes_arr) - n)
-    del bytes_arr[start_pos : start_pos + n]
-    try:
-        return bytes_arr.decode(errors="ignore")
-    except:
-        return s  # 解码失败时返回原输入
+    return _mutate_str(delete_bytes, s)
+
 
 class Mutator:
 
-    def __init__(self) -> None:
-        """Constructor"""
-        self.mutators = [
-            insert_random_character,
-            flip_random_bits,
-            arithmetic_random_bytes,
-            interesting_random_bytes,
-            havoc_random_insert,
-            havoc_random_replace,
-            delete_random_bytes,
+    def __init__(self, dictionary: Optional[Dictionary] = None, adaptive: bool = False) -> None:
+        """Constructor.
+        `dictionary` - tokens for the insert/overwrite-token mutators
+        `adaptive` - pick operators by their observed yield (OperatorScheduler) instead of uniformly
+        """
+        self.dictionary = dictionary
+        self.mutators: List[ByteMutation] = [
+            insert_random_byte,
+            flip_bits,
+            arithmetic_bytes,
+            interesting_bytes,
+            havoc_insert,
+            havoc_replace,
+            delete_bytes,
         ]
+        if dictionary is not None:
+            # 引用字典的 token 列表，之后加入字典的 token 同样会被使用
+            self.mutators += [
+                functools.partial(insert_token, tokens=dictionary.tokens),
+                functools.partial(overwrite_token, tokens=dictionary.tokens),
+            ]
+        self.scheduler: Optional[OperatorScheduler] = None
+        if adaptive:
+            self.scheduler = OperatorScheduler([getattr(m, "func", m).__name__ for m in self.mutators])
+        # 最近一次 stack 依次应用的算子下标（仅 adaptive 时记录），用于向调度器报告收益
+        self.applied: List[int] = []
+
+    def mutate_bytes(self, buf: bytearray) -> None:
+        """对 buf 原地应用一个随机变异"""
+        if self.scheduler is not None:
+            self.mutators[self.scheduler.choose()](buf)
+        else:
+            self.mutators[_below(len(self.mutators))](buf)
 
     def mutate(self, inp: Any) -> Any:
-        mutator = random.choice(self.mutators)
-        return mutator(inp)
-    
\ No newline at end of file
+        return self.stack(inp, 1)
+
+    def stack(self, inp: Any, count: int) -> Any:
+        """在同一个 bytearray 上依次应用 `count` 个随机变异，最后只解码一次。
+        返回值与 `inp` 类型相同（str 或 bytes）"""
+        buf = to_bytearray(inp)
+        mutators = self.mutators
+        if self.scheduler is not None:
+            choose = self.scheduler.choose
+            self.applied = [choose() for _ in range(count)]
+            for index in self.applied:
+                mutators[index](buf)
+        else:
+            n = len(mutators)
+            for _ in range(count):
+                mutators[_below(n)](buf)
+        return from_bytearray(buf, inp)
@@ -0,0 +1,121 @@
+import bisect
+import random
+from typing import Any, Dict, Iterable, List, Sequence
+
+PERIOD = 1000       # 每执行多少个 havoc 候选重新计算一次选择概率
+DECAY = 0.9         # 每个周期结束时历史计数的衰减系数，使权重跟随目标的当前阶段
+EXPLORE = 0.25      # 均匀分给所有算子的概率，收益为 0 的算子仍会被尝试
+CRASH_WEIGHT = 4.0  # 新 crash 桶相对于新覆盖的收益
+MAX_DEPTH_BUCKET = 16  # 栈深度按 2 的幂分桶：1、2-3、4-7 ... 32768+
+
+_random = random.random
+
+
+def _depth_bucket(depth: int) -> int:
+    return min(depth.bit_length(), MAX_DEPTH_BUCKET)
+
+
+def _depth_label(bucket: int) -> str:
+    low = 1 << (bucket - 1) if bucket else 0
+    if bucket == MAX_DEPTH_BUCKET:
+        return f"{low}+"
+    high = (1 << bucket) - 1
+    return str(low) if low == high else f"{low}-{high}"
+
+
+class _Yield:
+    """一个算子或一个栈深度分桶的累计执行数、新覆盖数与新 crash 数"""
+    __slots__ = ("uses", "finds", "crashes")
+
+    def __init__(self) -> None:
+        self.uses = 0
+        self.finds = 0
+        self.crashes = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return {"uses": self.uses, "finds": self.finds, "crashes": self.crashes}
+
+
+class OperatorScheduler:
+    """MOpt 风格的变异算子调度（以带衰减的多臂老虎机实现）。
+
+    每个 havoc 候选执行后，栈中用到的每个（不同的）算子都记一次使用，
+    候选带来新覆盖或新 crash 桶时同时记一次收益。每 PERIOD 次执行按
+    衰减后的 收益/使用 重新计算各算子的选择概率，并保留 EXPLORE 的均匀探索。
+    按栈深度分桶的收益只做统计，栈深度仍由种子能量决定。
+    """
+
+    def __init__(self, names: Sequence[str], period: int = PERIOD) -> None:
+        """`names` - operator names, in the mutator's operator order
+        `period` - havoc execs between two reweightings
+        """
+        self.names = list(names)
+        self.period = period
+        n = len(self.names)
+        # 当前周期之前（已衰减）与当前周期内的使用数、收益
+        self._uses = [0.0] * n
+        self._gains = [0.0] * n
+        self._pending = 0
+        self.weights = [1.0 / n] * n
+        self._cumulative = self._accumulate(self.weights)
+        self.operators = [_Yield() for _ in range(n)]
+        self.depths = [_Yield() for _ in range(MAX_DEPTH_BUCKET + 1)]
+
+    @staticmethod
+    def _accumulate(weights: Iterable[float]) -> List[float]:
+        cumulative, total = [], 0.0
+        for weight in weights:
+            total += weight
+            cumulative.append(total)
+        return cumulative
+
+    def choose(self) -> int:
+        """按当前权重选择一个算子的下标"""
+        cumulative = self._cumulative
+        index = bisect.bisect_right(cumulative, _random() * cumulative[-1])
+        return min(index, len(cumulative) - 1)
+
+    def update(self, applied: Sequence[int], found: bool, crashed: bool) -> None:
+        """报告一个 havoc 候选的执行结果。
+        `applied` - operator indices stacked on the candidate
+        `found` - the candidate became a new seed
+        `crashed` - the candidate opened a new crash bucket
+        """
+        gain = found + CRASH_WEIGHT * crashed
+        for index in set(applied):
+            self._uses[index] += 1
+            stats = self.operators[index]
+            stats.uses += 1
+            if gain:
+                self._gains[index] += gain
+                stats.finds += found
+                stats.crashes += crashed
+        depth = self.depths[_depth_bucket(len(applied))]
+        depth.uses += 1
+        depth.finds += found
+        depth.crashes += crashed
+        self._pending += 1
+        if self._pending >= self.period:
+            self._reweight()
+
+    def _reweight(self) -> None:
+        self._pending = 0
+        n = len(self.names)
+        # 加一平滑：未使用过的算子得到平均水平的估计
+        mean = (sum(self._gains) + 1) / (sum(self._uses) + n)
+        rates = [(gain + mean) / (uses + 1) for gain, uses in zip(self._gains, self._uses)]
+        total = sum(rates)
+        self.weights = [EXPLORE / n + (1 - EXPLORE) * rate / total for rate in rates]
+        self._cumulative = self._accumulate(self.weights)
+        self._uses = [uses * DECAY for uses in self._uses]
+        self._gains = [gain * DECAY for gain in self._gains]
+
+    def stats(self) -> Dict[str, Any]:
+        """{"operators": {算子名: 收益与当前权重}, "depths": {栈深度分桶: 收益}}，可在后台线程中调用"""
+        weights = self.weights
+        operators = {}
+        for name, stats, weight in zip(self.names, self.operators, weights):
+            operators[name] = dict(stats.as_dict(), weight=weight)
+        depths = {_depth_label(bucket): stats.as_dict()
+                  for bucket, stats in enumerate(self.depths) if stats.uses}
+        return {"operators": operators, "depths": depths}
@@ -0,0 +1,39 @@
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, Tuple
+
+RECENT_RESULTS = 1024  # 默认保留的最近结果数
+
+
+class OutcomeStats:
+    """执行结果的汇总：按 outcome 计数，并在环形缓冲区中保留最近的结果。
+
+    内存占用与运行时长无关。
+    """
+
+    def __init__(self, recent: int = RECENT_RESULTS) -> None:
+        """`recent` - number of most recent (result, outcome) pairs to keep"""
+        # {outcome: 次数}
+        self.counts: Dict[str, int] = {}
+        self.total = 0
+        self.recent: Deque[Tuple[Any, str]] = deque(maxlen=recent)
+
+    def record(self, result: Any, outcome: str) -> None:
+        self.counts[outcome] = self.counts.get(outcome, 0) + 1
+        self.total += 1
+        self.recent.append((result, outcome))
+
+    def remember(self, result: Any, outcome: str) -> None:
+        """只保留到最近的结果中，不计数；计数由 `merge` 汇总"""
+        self.recent.append((result, outcome))
+
+    def merge(self, counts: Iterable[Dict[str, int]]) -> None:
+        """用多个进程各自的 {outcome: 次数} 之和替换当前计数"""
+        total: Dict[str, int] = {}
+        for worker_counts in counts:
+            for outcome, count in worker_counts.items():
+                total[outcome] = total.get(outcome, 0) + count
+        self.counts = total
+        self.total = sum(total.values())
+
+    def __str__(self) -> str:
+        return ", ".join(f"{outcome}: {count}" for outcome, count in sorted(self.counts.items()))
@@ -0,0 +1,118 @@
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from utils.Seed import Seed
+
+
+class Population:
+    """种子集合，按种子数据与 `Seed.id` 建立哈希索引。
+
+    - 添加、删除、按数据或 id 查找均为 O(1)；删除时用最后一个种子填补空位
+    - 每个种子在集合中期间拥有固定的整数槽位（`slot`），删除后槽位被复用，
+      可用于以槽位为下标的数组结构
+    - 支持 `len`、迭代与下标访问，可直接传给 `random.choices`
+    - 第一次调用 `drain` 之后开始记录增删，供调度器增量维护按槽位的采样权重
+    """
+
+    def __init__(self, seeds: Iterable[Seed] = ()) -> None:
+        self._seeds: List[Seed] = []
+        # {seed.id: 在 _seeds 中的下标}
+        self._index: Dict[int, int] = {}
+        # {seed.data: seed.id}
+        self._by_data: Dict[Any, int] = {}
+        # {seed.id: 槽位}
+        self._slots: Dict[int, int] = {}
+        self._free_slots: List[int] = []
+        # 槽位 -> 种子，空槽位为 None
+        self._by_slot: List[Optional[Seed]] = []
+        # 上次 drain 之后新增的种子与释放的槽位
+        self._tracking = False
+        self._added: List[Seed] = []
+        self._removed_slots: List[int] = []
+        self.extend(seeds)
+
+    def __len__(self) -> int:
+        return len(self._seeds)
+
+    def __iter__(self) -> Iterator[Seed]:
+        return iter(self._seeds)
+
+    def __getitem__(self, index: int) -> Seed:
+        return self._seeds[index]
+
+    def __contains__(self, item: Union[Seed, Any]) -> bool:
+        """`item` 可以是 Seed（按 id）或种子数据"""
+        if isinstance(item, Seed):
+            return item.id in self._index
+        return item in self._by_data
+
+    def add(self, seed: Seed) -> bool:
+        """添加种子；已存在相同数据的种子时不重复添加，返回是否添加成功"""
+        if seed.id in self._index or seed.data in self._by_data:
+            return False
+        self._index[seed.id] = len(self._seeds)
+        self._seeds.append(seed)
+        self._by_data[seed.data] = seed.id
+        if self._free_slots:
+            slot = self._free_slots.pop()
+            self._by_slot[slot] = seed
+        else:
+            slot = len(self._by_slot)
+            self._by_slot.append(seed)
+        self._slots[seed.id] = slot
+        if self._tracking:
+            self._added.append(seed)
+        return True
+
+    # 兼容原先的 list 接口
+    append = add
+
+    def extend(self, seeds: Iterable[Seed]) -> None:
+        for seed in seeds:
+            self.add(seed)
+
+    def remove(self, seed: Seed) -> None:
+        """删除种子，不存在时抛出 KeyError"""
+        index = self._index.pop(seed.id)
+        last = self._seeds.pop()
+        if last is not seed:
+            self._seeds[index] = last
+            self._index[last.id] = index
+        del self._by_data[seed.data]
+        slot = self._slots.pop(seed.id)
+        self._by_slot[slot] = None
+        self._free_slots.append(slot)
+        if self._tracking:
+            self._removed_slots.append(slot)
+
+    def discard(self, seed: Seed) -> None:
+        if seed.id in self._index:
+            self.remove(seed)
+
+    def get(self, data: Any) -> Optional[Seed]:
+        """按种子数据查找"""
+        seed_id = self._by_data.get(data)
+        return None if seed_id is None else self._seeds[self._index[seed_id]]
+
+    def by_id(self, seed_id: int) -> Optional[Seed]:
+        """按 `Seed.id` 查找"""
+        index = self._index.get(seed_id)
+        return None if index is None else self._seeds[index]
+
+    def slot(self, seed: Seed) -> int:
+        """种子的固定槽位"""
+        return self._slots[seed.id]
+
+    def at_slot(self, slot: int) -> Optional[Seed]:
+        """槽位上的种子，空槽位返回 None"""
+        return self._by_slot[slot] if slot < len(self._by_slot) else None
+
+    def capacity(self) -> int:
+        """已分配的槽位数（槽位均小于该值）"""
+        return len(self._by_slot)
+
+    def drain(self) -> Tuple[List[Seed], List[int]]:
+        """返回并清空上次调用以来新增的种子与释放的槽位"""
+        self._tracking = True
+        added, removed = self._added, self._removed_slots
+        self._added, self._removed_slots = [], []
+        return added, removed
@@ -0,0 +1,106 @@
+import random
+from typing import Callable, List
+
+# 累计的增量更新次数超过该值后重建树，消除浮点累加误差
+REBUILD_UPDATES = 1 << 16
+
+
+class WeightedSampler:
+    """基于树状数组（Fenwick tree）的加权随机采样。
+
+    按整数槽位保存非负权重；修改单个权重与按权重采样均为 O(log N)，
+    从而避免每次选择都对整个种子集合重新计算能量。
+    """
+
+    def __init__(self, capacity: int = 0) -> None:
+        self.weights: List[float] = []
+        self._tree: List[float] = [0.0]  # 1-based
+        self._updates = 0
+        self.ensure(capacity)
+
+    def __len__(self) -> int:
+        return len(self.weights)
+
+    @property
+    def total(self) -> float:
+        """所有权重之和"""
+        return self._prefix(len(self.weights))
+
+    def ensure(self, size: int) -> None:
+        """保证至少能容纳 `size` 个槽位（按 2 倍扩容）"""
+        if size <= len(self.weights):
+            return
+        new_size = max(len(self.weights), 1)
+        while new_size < size:
+            new_size *= 2
+        self.weights.extend([0.0] * (new_size - len(self.weights)))
+        self.rebuild()
+
+    def rebuild(self) -> None:
+        """由 `weights` 在 O(N) 内重建整棵树"""
+        n = len(self.weights)
+        tree = [0.0] + self.weights
+        for i in range(1, n + 1):
+            parent = i + (i & -i)
+            if parent <= n:
+                tree[parent] += tree[i]
+        self._tree = tree
+        self._updates = 0
+
+    def clear(self) -> None:
+        self.weights = [0.0] * len(self.weights)
+        self._tree = [0.0] * (len(self.weights) + 1)
+        self._updates = 0
+
+    def _prefix(self, i: int) -> float:
+        tree = self._tree
+        total = 0.0
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def update(self, slot: int, weight: float) -> None:
+        """将槽位 `slot` 的权重设为 `weight`"""
+        if slot >= len(self.weights):
+            self.ensure(slot + 1)
+        delta = weight - self.weights[slot]
+        if not delta:
+            return
+        self.weights[slot] = weight
+        self._updates += 1
+        if self._updates > REBUILD_UPDATES:
+            self.rebuild()
+            return
+        tree = self._tree
+        n = len(self.weights)
+        i = slot + 1
+        while i <= n:
+            tree[i] += delta
+            i += i & -i
+
+    def sample(self, rand: Callable[[], float] = random.random) -> int:
+        """按权重随机返回一个槽位；所有权重为 0 时抛出 ValueError"""
+        total = self.total
+        if total <= 0:
+            raise ValueError("cannot sample from an empty sampler")
+        target = rand() * total
+        tree = self._tree
+        n = len(self.weights)
+        pos = 0
+        step = 1 << (n.bit_length() - 1)
+        # 二进制倍增：找到前缀和不超过 target 的最大位置
+        while step:
+            nxt = pos + step
+            if nxt <= n and tree[nxt] <= target:
+                pos = nxt
+                target -= tree[nxt]
+            step >>= 1
+        weights = self.weights
+        if pos >= n or weights[pos] <= 0:
+            # 浮点误差使 target 落在了权重为 0 的槽位上，改取相邻的正权重槽位
+            start = min(pos, n - 1)
+            pos = next((i for i in range(start, n) if weights[i] > 0), None)
+            if pos is None:
+                pos = next(i for i in range(start, -1, -1) if weights[i] > 0)
+        return pos
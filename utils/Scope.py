@@ -0,0 +1,75 @@
+import importlib.util
+import os
+from types import CodeType
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+
+class InstrumentationScope:
+    """插桩范围：决定哪些 code object 需要追踪。
+
+    `include` / `exclude` 的元素可以是：
+    - 模块或包名，如 "samples.Samples"、"html"（包含其所有子模块）
+    - 文件或目录路径前缀，如 "/usr/lib/python3.11/html/"
+    - 函数或 code object（包括其内部定义的嵌套函数）
+    `include` 为空时表示包含所有未被排除的代码；排除优先于包含。
+    每个 code object 的判断结果会被缓存，热路径上只需一次字典查找。
+    """
+
+    def __init__(self, include: Iterable[Any] = (), exclude: Iterable[Any] = ()) -> None:
+        self.include_files, self.include_codes = self._resolve(include)
+        self.exclude_files, self.exclude_codes = self._resolve(exclude)
+        self.include_all = not self.include_files and not self.include_codes
+        # {code object: 是否在范围内}
+        self.cache: Dict[CodeType, bool] = {}
+
+    @staticmethod
+    def _module_prefix(name: str) -> str:
+        spec = importlib.util.find_spec(name)
+        if spec is None:
+            raise ValueError(f"Cannot resolve module: {name}")
+        if spec.submodule_search_locations:
+            # 包：包含目录下的所有文件
+            return os.path.join(list(spec.submodule_search_locations)[0], "")
+        if spec.origin is None:
+            raise ValueError(f"Module has no source file: {name}")
+        return spec.origin
+
+    @staticmethod
+    def _codes(code: CodeType) -> Set[CodeType]:
+        """code 及其内部定义的所有嵌套 code object"""
+        codes = {code}
+        for const in code.co_consts:
+            if isinstance(const, CodeType):
+                codes |= InstrumentationScope._codes(const)
+        return codes
+
+    def _resolve(self, items: Iterable[Any]) -> Tuple[Tuple[str, ...], Set[CodeType]]:
+        files: List[str] = []
+        codes: Set[CodeType] = set()
+        for item in items:
+            if isinstance(item, CodeType):
+                codes |= self._codes(item)
+            elif hasattr(item, "__code__"):
+                codes |= self._codes(item.__code__)
+            elif isinstance(item, str) and (os.sep in item or item.endswith(".py")):
+                files.append(os.path.abspath(item) + (os.sep if item.endswith(os.sep) else ""))
+            elif isinstance(item, str):
+                files.append(self._module_prefix(item))
+            else:
+                raise TypeError(f"Unsupported scope entry: {item!r}")
+        return tuple(files), codes
+
+    def _decide(self, code: CodeType) -> bool:
+        filename = code.co_filename
+        if code in self.exclude_codes or filename.startswith(self.exclude_files):
+            return False
+        if self.include_all:
+            return True
+        return code in self.include_codes or filename.startswith(self.include_files)
+
+    def __contains__(self, code: CodeType) -> bool:
+        result = self.cache.get(code)
+        if result is None:
+            result = self._decide(code)
+            self.cache[code] = result
+        return result
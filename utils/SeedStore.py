@@ -0,0 +1,160 @@
+import heapq
+import mmap
+import os
+import pickle
+import struct
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.WriteBuffer import WriteBuffer
+
+STORE_DIR = "corpus/store"
+
+# 索引记录：seed id、数据在日志中的偏移与长度、数据类型、能量
+INDEX_RECORD = struct.Struct("<qQIId")
+
+# 数据类型
+KIND_BYTES = 0
+KIND_STR = 1
+KIND_PICKLE = 2
+
+
+def _encode(data: Any) -> Tuple[bytes, int]:
+    if isinstance(data, (bytes, bytearray)):
+        return bytes(data), KIND_BYTES
+    if isinstance(data, str):
+        return data.encode("utf-8", "surrogatepass"), KIND_STR
+    return pickle.dumps(data), KIND_PICKLE
+
+
+def _decode(raw: memoryview, kind: int) -> Any:
+    if kind == KIND_BYTES:
+        return bytes(raw)
+    if kind == KIND_STR:
+        return str(raw, "utf-8", "surrogatepass")
+    return pickle.loads(raw)
+
+
+class SeedStore:
+    """按目标隔离的只追加种子存储。
+
+    每个命名空间（如 "sample1"）对应两个文件：
+    - `<namespace>.data`：只追加的数据日志
+    - `<namespace>.index`：定长索引记录 (id, offset, length, kind, energy)
+    启动时只映射并扫描索引；读取种子时通过 mmap 直接切片数据日志，
+    `view` 不复制数据。写入经由 WriteBuffer 在后台线程中追加到两个文件末尾。
+    同一 id 的多条记录以最后一条为准。
+    """
+
+    def __init__(self, namespace: str = "default", directory: str = STORE_DIR) -> None:
+        self.namespace = namespace
+        # 后台线程稍后才打开文件，此时工作目录可能已经改变，因此使用绝对路径
+        self.directory = os.path.abspath(directory)
+        directory = self.directory
+        self.data_path = os.path.join(directory, f"{namespace}.data")
+        self.index_path = os.path.join(directory, f"{namespace}.index")
+        # {seed id: (offset, length, kind, energy)}
+        self.index: Dict[int, Tuple[int, int, int, float]] = {}
+        # 尚未写入数据日志的记录 {offset: 原始字节}
+        self._pending: Dict[int, bytes] = {}
+        self._map: Optional[mmap.mmap] = None
+        self._mapped_size = 0
+        self.write_buffer = WriteBuffer()
+
+        os.makedirs(directory, exist_ok=True)
+        self._data_size = os.path.getsize(self.data_path) if os.path.exists(self.data_path) else 0
+        # 已由后台线程写入数据日志的大小，写完一批后由后台线程更新
+        self._written = self._data_size
+        self._load_index()
+
+    def _load_index(self) -> None:
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, "r+b") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size % INDEX_RECORD.size:
+                # 末尾有未写完的记录：截掉，保证之后追加的记录仍然对齐
+                size -= size % INDEX_RECORD.size
+                f.truncate(size)
+            if not size:
+                return
+            with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as index_map:
+                for seed_id, offset, length, kind, energy in INDEX_RECORD.iter_unpack(index_map):
+                    # 忽略指向数据日志之外的记录（上次运行在写入中途退出）
+                    if offset + length <= self._data_size:
+                        self.index[seed_id] = (offset, length, kind, energy)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, seed_id: int) -> bool:
+        return seed_id in self.index
+
+    def put(self, seed_id: int, data: Any, energy: float) -> None:
+        """追加一条种子记录（在 `flush` 之前只存在于内存）"""
+        raw, kind = _encode(data)
+        offset = self._data_size
+        self._data_size += len(raw)
+        self._pending[offset] = raw
+        self.index[seed_id] = (offset, len(raw), kind, energy)
+        self.write_buffer.append(self.data_path, raw)
+        self.write_buffer.append(self.index_path, INDEX_RECORD.pack(seed_id, offset, len(raw), kind, energy))
+
+    def flush(self) -> None:
+        """把尚未写盘的记录交给后台线程"""
+        if self._pending:
+            # 丢弃已经落盘的内存副本（不访问文件系统）
+            written = self._written
+            for offset in [o for o, raw in self._pending.items() if o + len(raw) <= written]:
+                del self._pending[offset]
+            size = self._data_size
+            self.write_buffer.on_written(lambda: self._set_written(size))
+        self.write_buffer.flush()
+
+    def _set_written(self, size: int) -> None:
+        # 在后台线程中调用；批次按顺序写盘，大小只增不减
+        self._written = size
+
+    def close(self) -> None:
+        self.write_buffer.close()
+        self._map = None
+        self._mapped_size = 0
+
+    def view(self, seed_id: int) -> Optional[memoryview]:
+        """种子原始字节的只读视图（不复制数据），不存在时返回 None"""
+        entry = self.index.get(seed_id)
+        if entry is None:
+            return None
+        offset, length, _, _ = entry
+        raw = self._pending.get(offset)
+        if raw is not None:
+            return memoryview(raw)
+        if offset + length > self._mapped_size:
+            self._remap()
+        if offset + length > self._mapped_size:
+            # 后台线程尚未写完
+            self.write_buffer.close()
+            self._remap()
+        return memoryview(self._map)[offset:offset + length]
+
+    def _remap(self) -> None:
+        # 旧的映射可能仍被调用方持有的视图引用，交给垃圾回收关闭
+        self._map = None
+        size = os.path.getsize(self.data_path) if os.path.exists(self.data_path) else 0
+        if size:
+            with open(self.data_path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+        self._mapped_size = size
+
+    def load(self, seed_id: int) -> Optional[Any]:
+        """读取种子数据"""
+        raw = self.view(seed_id)
+        if raw is None:
+            return None
+        return _decode(raw, self.index[seed_id][2])
+
+    def energy(self, seed_id: int) -> float:
+        return self.index[seed_id][3]
+
+    def top(self, count: int) -> List[int]:
+        """能量最高的 `count` 个种子 id"""
+        return heapq.nlargest(count, self.index, key=lambda seed_id: self.index[seed_id][3])
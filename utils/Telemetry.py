@@ -0,0 +1,130 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+# 以 Prometheus counter 导出的指标，其余数值指标均为 gauge
+COUNTERS = {"execs"}
+# 嵌套的统计 {标签值: {字段: 数值}} 以带标签的 gauge 导出，如 fuzzer_operator_finds{operator="flip_bits"}
+LABELED = {"operators": "operator", "depths": "depth"}
+
+
+class Telemetry:
+    """非阻塞的模糊测试遥测。
+
+    后台线程每隔 `interval` 秒读取一次 `fuzzer.stats()`（只读取增量维护的 O(1) 计数器），
+    打印统计表（`fuzzer.print_stats()`），并可追加 JSONL 时间序列、原子地重写
+    Prometheus textfile。模糊测试主循环中不做任何输出。
+    """
+
+    def __init__(self, fuzzer: Any, interval: float = 1.0, print_table: bool = True,
+                 jsonl_path: Optional[str] = None, prometheus_path: Optional[str] = None,
+                 labels: Optional[Dict[str, str]] = None) -> None:
+        """Constructor.
+        `fuzzer` - the fuzzer whose `stats()` / `print_stats()` are reported
+        `interval` - seconds between two reports
+        `print_table` - render the stats table to stdout
+        `jsonl_path` - append one JSON object per report to this file
+        `prometheus_path` - rewrite this Prometheus textfile on every report
+        `labels` - extra Prometheus labels, e.g. {"target": "sample1"}
+        """
+        self.fuzzer = fuzzer
+        self.interval = interval
+        self.print_table = print_table
+        self.jsonl_path = jsonl_path
+        self.prometheus_path = prometheus_path
+        self.labels = labels or {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # 上一次报告时的 (时间, 执行次数)，用于计算瞬时速度
+        self._last = (fuzzer.start_time, 0)
+
+    @property
+    def enabled(self) -> bool:
+        return self.print_table or self.jsonl_path is not None or self.prometheus_path is not None
+
+    def start(self) -> None:
+        if not self.enabled or self._thread is not None:
+            return
+        for path in (self.jsonl_path, self.prometheus_path):
+            if path is not None and os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """停止后台线程并输出最后一次报告"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.report()
+
+    def __enter__(self) -> "Telemetry":
+        self.start()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.stop()
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.report()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """fuzzer 的当前统计，附加时间戳与瞬时执行速度"""
+        now = time.time()
+        stats = self.fuzzer.stats()
+        last_time, last_execs = self._last
+        stats["execs_per_sec_now"] = (stats["execs"] - last_execs) / max(now - last_time, 1e-9)
+        self._last = (now, stats["execs"])
+        stats["timestamp"] = now
+        return stats
+
+    def report(self) -> None:
+        stats = self.snapshot()
+        if self.print_table:
+            self.fuzzer.print_stats()
+        if self.jsonl_path is not None:
+            with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(stats) + "\n")
+        if self.prometheus_path is not None:
+            self._write_prometheus(stats)
+
+    def _write_prometheus(self, stats: Dict[str, Any]) -> None:
+        labels = ",".join(f'{key}="{value}"' for key, value in sorted(self.labels.items()))
+        labels = "{" + labels + "}" if labels else ""
+        lines = []
+        for key, value in stats.items():
+            if key in LABELED and isinstance(value, dict):
+                lines += self._labeled(LABELED[key], value)
+                continue
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or key == "timestamp":
+                continue
+            if key in COUNTERS:
+                name = f"fuzzer_{key}_total"
+                lines.append(f"# TYPE {name} counter")
+            else:
+                name = f"fuzzer_{key}"
+                lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name}{labels} {value}")
+        # 先写临时文件再替换，避免 node_exporter 读到写了一半的文件
+        tmp_path = self.prometheus_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, self.prometheus_path)
+
+    def _labeled(self, label: str, groups: Dict[str, Dict[str, Any]]) -> List[str]:
+        lines: List[str] = []
+        fields = sorted({field for values in groups.values() for field in values})
+        for field in fields:
+            name = f"fuzzer_{label}_{field}"
+            lines.append(f"# TYPE {name} gauge")
+            for group, values in groups.items():
+                labels = dict(self.labels, **{label: group})
+                labels = ",".join(f'{key}="{value}"' for key, value in sorted(labels.items()))
+                lines.append(f"{name}{{{labels}}} {values[field]}")
+        return lines
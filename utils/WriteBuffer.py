@@ -0,0 +1,83 @@
+import atexit
+import queue
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.ObjectUtils import dump_object
+
+
+class WriteBuffer:
+    """异步写缓冲：一批写操作在后台线程中按顺序执行。
+
+    `add`（pickle 整个对象）与 `append`（向文件末尾追加字节）只把写操作放入
+    内存中的当前批次，`flush` 把整批交给后台线程，调用方（模糊测试主循环）
+    不做任何同步磁盘 I/O。尚未落盘的 pickle 对象可以通过 `get` 读回；
+    进程退出前会等待所有批次写完。
+    """
+
+    def __init__(self) -> None:
+        # [(path, 对象或字节, 是否为追加)]
+        self._batch: List[Tuple[str, Any, bool]] = []
+        # 当前批次写完后在后台线程中调用的回调
+        self._callbacks: List[Callable[[], None]] = []
+        # {path: 尚未写入磁盘的对象}
+        self._pending: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Tuple[List[Tuple[str, Any, bool]], List[Callable[[], None]]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, path: str, obj: Any) -> None:
+        """加入当前批次；同一路径的旧内容会被覆盖"""
+        self._batch.append((path, obj, False))
+        with self._lock:
+            self._pending[path] = obj
+
+    def append(self, path: str, data: bytes) -> None:
+        """加入当前批次：把 `data` 追加到文件末尾"""
+        self._batch.append((path, data, True))
+
+    def get(self, path: str, default: Any = None) -> Any:
+        """尚未落盘的对象"""
+        with self._lock:
+            return self._pending.get(path, default)
+
+    def on_written(self, callback: Callable[[], None]) -> None:
+        """当前批次写盘完成后，在后台线程中调用 `callback`"""
+        self._callbacks.append(callback)
+
+    def flush(self) -> None:
+        """把当前批次交给后台线程写盘"""
+        if not self._batch:
+            return
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._writer, daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+        self._queue.put((self._batch, self._callbacks))
+        self._batch = []
+        self._callbacks = []
+
+    def close(self) -> None:
+        """写出剩余内容并等待后台线程完成"""
+        self.flush()
+        if self._thread is not None:
+            self._queue.join()
+
+    def _writer(self) -> None:
+        while True:
+            batch, callbacks = self._queue.get()
+            try:
+                for path, obj, append in batch:
+                    if append:
+                        with open(path, "ab") as f:
+                            f.write(obj)
+                        continue
+                    dump_object(path, obj)
+                    with self._lock:
+                        # 写盘期间可能又有同一路径的新内容加入
+                        if self._pending.get(path) is obj:
+                            del self._pending[path]
+                for callback in callbacks:
+                    callback()
+            finally:
+                self._queue.task_done()